@@ -0,0 +1,131 @@
+"""
+Helpers for native async read views.
+
+DRF views are synchronous, so under ASGI every request to them is handed to
+a worker thread. The busiest read endpoints also have plain Django async
+versions, built on the async ORM and cache API and routed in place of the
+DRF actions when the ``ASYNC_READ_VIEWS`` setting is on. These helpers give
+them the same authentication, envelope, error bodies and conditional-request
+handling as the DRF views, so clients cannot tell the two apart.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import timing, versioning
+
+# Matches DRF's JSONRenderer with the default UNICODE_JSON and COMPACT_JSON settings
+JSON_DUMPS_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    return JsonResponse(
+        data, status=status_code, headers=headers, safe=False,
+        encoder=JSONEncoder, json_dumps_params=JSON_DUMPS_PARAMS,
+    )
+
+def success_response(data=None, message="Operation successful", pagination=None):
+    """
+    Same envelope as ``ResponseMixin.success_response``.
+    """
+    response = {
+        "status": "success",
+        "message": message
+    }
+    if data is not None:
+        response["data"] = data
+    if pagination is not None:
+        response["pagination"] = pagination
+    return json_response(response)
+
+def error_response(message="An error occurred", errors=None, status_code=status.HTTP_400_BAD_REQUEST):
+    """
+    Same envelope as ``ResponseMixin.error_response``.
+    """
+    response = {
+        "status": "error",
+        "message": message
+    }
+    if errors is not None:
+        response["errors"] = errors
+    return json_response(response, status_code=status_code)
+
+async def aauthenticate(request, required=True):
+    """
+    Runs DRF's authentication classes on ``request`` and returns the user.
+
+    Raises ``NotAuthenticated`` for anonymous users when ``required``.
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    request.authenticators = drf_request.authenticators
+    with timing.measure('auth'):
+        if drf_request.authenticators:
+            # Authenticators may read the session or token tables
+            user = await sync_to_async(lambda: drf_request.user)()
+        else:
+            user = drf_request.user
+    if required and not (user and user.is_authenticated):
+        raise exceptions.NotAuthenticated()
+    return user
+
+def exception_response(request, exc):
+    """
+    Same status, headers and body as DRF's default exception handler.
+    """
+    headers = {}
+    status_code = exc.status_code
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        authenticators = getattr(request, 'authenticators', None)
+        auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+        if auth_header:
+            headers['WWW-Authenticate'] = auth_header
+        else:
+            status_code = status.HTTP_403_FORBIDDEN
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(data, status_code=status_code, headers=headers)
+
+def async_api_view(query_budgets=None):
+    """
+    Decorates an async view serving GET and HEAD, answering ``APIException``
+    the way DRF does. ``query_budgets`` is keyed by method, as on API views.
+    """
+    def decorator(view):
+        view.query_budgets = query_budgets or {}
+
+        @require_safe
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return exception_response(request, exc)
+        return wrapper
+    return decorator
+
+async def aget_validators(models):
+    """
+    Returns the ``(etag, last_modified)`` of a response built from ``models``.
+    """
+    return versioning.validators(await versioning.aget_stamps([model._meta.label_lower for model in models]))
+
+def not_modified_response(request, validators):
+    """
+    Returns a 304 response when the client already has the representation, else None.
+    """
+    if versioning.is_not_modified(request.headers, *validators):
+        return conditional_response(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), validators)
+    return None
+
+def conditional_response(response, validators):
+    etag, last_modified = validators
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,231 @@
+"""
+A small database-backed job queue.
+
+``enqueue(func, payload)`` only inserts a ``Job`` row, so a request can hand
+slow work such as sending email to the background and return at once. The
+``run_jobs`` worker claims due jobs, runs them on a thread pool and retries
+failures with exponential backoff and jitter. A job whose worker died is
+claimed again once its lock times out.
+
+Jobs are functions decorated with ``@job`` and are stored by dotted path.
+The worker only imports paths that resolve to such a function. A job with
+``batch_size`` receives a list of payloads and returns one error (or None)
+per payload, so several queued calls can share one expensive resource,
+such as the SMTP connection of ``send_emails``. ``enqueue_debounced`` turns
+a burst of triggers, such as plays recorded one after another, into one job.
+"""
+import datetime
+import hashlib
+import json
+import random
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+DEFAULT_JOBS = {
+    'THREADS': 4,            # Jobs or batches run at the same time by one worker
+    'CLAIM_SIZE': 100,       # Jobs claimed per poll
+    'POLL_INTERVAL': 1.0,    # Seconds between polls of an empty queue
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 10.0,         # Seconds before the first retry, doubled for every later one
+    'BACKOFF_MAX': 3600.0,
+    'LOCK_TIMEOUT': 600.0,   # Seconds before a running job is assumed lost and run again
+}
+
+
+def get_config():
+    return {**DEFAULT_JOBS, **getattr(settings, 'JOBS', {})}
+
+def job(func=None, *, max_attempts=None, batch_size=None):
+    """
+    Marks a function as a job. Payloads are passed as keyword arguments,
+    or as a list to jobs with a ``batch_size``.
+    """
+    def decorator(func):
+        func.job_options = {'max_attempts': max_attempts, 'batch_size': batch_size}
+        return func
+    return decorator(func) if func is not None else decorator
+
+def get_job_function(name):
+    func = import_string(name)
+    if not hasattr(func, 'job_options'):
+        raise ImportError(f"{name} is not a job")
+    return func
+
+def enqueue(func, payload=None, delay=0, max_attempts=None):
+    """
+    Queues a call of the job ``func`` with a JSON ``payload``, ``delay`` seconds from now.
+    Called inside a transaction, the job only becomes visible when it commits.
+    """
+    if not hasattr(func, 'job_options'):
+        raise ValueError(f"{func!r} is not a job")
+    return Job.objects.create(
+        name=f'{func.__module__}.{func.__qualname__}',
+        payload=payload or {},
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+        max_attempts=max_attempts or func.job_options['max_attempts'] or get_config()['MAX_ATTEMPTS'],
+    )
+
+def enqueue_debounced(func, delay, payload=None):
+    """
+    Queues ``func`` to run in ``delay`` seconds, unless the same call was
+    already queued less than ``delay`` seconds ago; a burst of triggers then
+    runs the job once. Returns the new Job, or None.
+    """
+    payload = payload or {}
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    if not cache.add(f'job-debounce:{func.__module__}.{func.__qualname__}:{digest}', True, timeout=delay):
+        return None
+    return enqueue(func, payload, delay=delay)
+
+def backoff(attempts, config=None):
+    """
+    Seconds to wait before retrying a job that failed ``attempts`` times.
+    """
+    config = config or get_config()
+    delay = min(config['BACKOFF'] * 2 ** (attempts - 1), config['BACKOFF_MAX'])
+    return delay * random.uniform(0.5, 1.0)  # Jitter keeps retries of a common failure apart
+
+
+class Worker:
+    """
+    Claims due jobs and runs them on a thread pool, one batch of claims at a time.
+    """
+
+    def __init__(self, threads=None, claim_size=None):
+        self.config = get_config()
+        self.threads = threads or self.config['THREADS']
+        self.claim_size = claim_size or self.config['CLAIM_SIZE']
+
+    def claim(self):
+        now = timezone.now()
+        lost = now - datetime.timedelta(seconds=self.config['LOCK_TIMEOUT'])
+        with transaction.atomic():
+            # Skipping locked rows lets several workers claim side by side
+            jobs = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='queued', run_at__lte=now) | Q(status='running', locked_at__lt=lost))
+                .order_by('run_at', 'id')[:self.claim_size]
+            )
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='running', locked_at=now, attempts=F('attempts') + 1
+            )
+        for job in jobs:
+            job.attempts += 1
+        return jobs
+
+    def get_tasks(self, jobs):
+        """
+        Returns ``(func, jobs)`` pairs, one per call; jobs that cannot run are failed.
+        """
+        groups = {}
+        for job in jobs:
+            groups.setdefault(job.name, []).append(job)
+        tasks = []
+        for name, group in groups.items():
+            try:
+                func = get_job_function(name)
+            except ImportError as error:
+                for job in group:
+                    self.fail(job, f"Unknown job: {error}", retry=False)
+                continue
+            size = func.job_options['batch_size']
+            if size:
+                tasks.extend((func, group[start:start + size]) for start in range(0, len(group), size))
+            else:
+                tasks.extend((func, [job]) for job in group)
+        return tasks
+
+    @staticmethod
+    def call(func, jobs):
+        """
+        Runs one task on a pool thread; returns one error message (or None) per job.
+        """
+        try:
+            if func.job_options['batch_size']:
+                errors = func([job.payload for job in jobs])
+                return [None if error is None else _format(error) for error in errors]
+            func(**jobs[0].payload)
+            return [None]
+        except Exception:
+            return [traceback.format_exc()] * len(jobs)
+        finally:
+            connections.close_all()  # Only this thread's connections
+
+    def fail(self, job, error, retry=True):
+        if retry and job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', locked_at=None, last_error=error,
+                run_at=timezone.now() + datetime.timedelta(seconds=backoff(job.attempts, self.config)),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status='failed', locked_at=None, last_error=error)
+
+    def run_once(self, executor):
+        """
+        Runs the jobs due now; returns ``(succeeded, failed)`` counts.
+        """
+        claimed = self.claim()
+        futures = [(jobs, executor.submit(self.call, func, jobs)) for func, jobs in self.get_tasks(claimed)]
+        done = []
+        for jobs, future in futures:
+            for job, error in zip(jobs, future.result()):
+                if error is None:
+                    done.append(job.pk)
+                else:
+                    self.fail(job, error)
+        Job.objects.filter(pk__in=done).delete()
+        return len(done), len(claimed) - len(done)
+
+    def run(self, stop, drain=False, on_run=None):
+        """
+        Polls until ``stop`` (a ``threading.Event``) is set, or until the
+        queue has no due jobs when ``drain`` is true.
+        """
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as executor:
+            while not stop.is_set():
+                succeeded, failed = self.run_once(executor)
+                if on_run and (succeeded or failed):
+                    on_run(succeeded, failed)
+                if not (succeeded or failed):
+                    if drain:
+                        return
+                    stop.wait(self.config['POLL_INTERVAL'])
+
+
+def _format(error):
+    return ''.join(traceback.format_exception(error)) if isinstance(error, BaseException) else str(error)
+
+
+@job(batch_size=50)
+def send_emails(messages):
+    """
+    Sends ``{'subject', 'body', 'to', 'from_email'}`` payloads over a single
+    connection to the mail server.
+    """
+    errors = []
+    with get_connection() as connection:
+        for message in messages:
+            try:
+                EmailMessage(connection=connection, **message).send()
+                errors.append(None)
+            except Exception as error:
+                errors.append(error)
+    return errors
+
+def enqueue_mail(subject, body, to, from_email=None):
+    return enqueue(send_emails, {
+        'subject': subject,
+        'body': body,
+        'to': list(to),
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+    })
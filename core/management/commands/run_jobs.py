@@ -0,0 +1,36 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (see core.jobs) until interrupted. "
+        "Start several workers to share the queue; --once exits when no job is due."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help="Jobs or mail batches run at the same time")
+        parser.add_argument('--claim-size', type=int, help="Jobs claimed per poll")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue has no due jobs")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # Finish the jobs already claimed instead of leaving them locked
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+        totals = {'succeeded': 0, 'failed': 0}
+
+        def on_run(succeeded, failed):
+            totals['succeeded'] += succeeded
+            totals['failed'] += failed
+            self.stdout.write(f"Ran {succeeded + failed} jobs: {succeeded} succeeded, {failed} failed")
+
+        Worker(options['threads'], options['claim_size']).run(stop, drain=options['once'], on_run=on_run)
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['succeeded']} jobs succeeded, {totals['failed']} failed"
+        ))
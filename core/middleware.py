@@ -0,0 +1,114 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import timing
+
+logger = logging.getLogger('kingdom_chronicles.timing')
+
+DEFAULT_SERVER_TIMING = {
+    'SAMPLE_RATE': 1.0,  # Share of requests that get the full breakdown
+    'HEADER': True,      # Send the Server-Timing header on sampled responses
+    'LOG': True,         # Log one JSON line per sampled request
+    'SLOW_MS': None,     # Always log requests slower than this, sampled or not
+}
+
+
+class ServerTimingMiddleware:
+    """
+    Breaks sampled requests down into DB, auth, serializer and renderer time,
+    sent as a ``Server-Timing`` header and logged as one structured line.
+    See ``core.timing`` and the ``SERVER_TIMING`` setting.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {**DEFAULT_SERVER_TIMING, **getattr(settings, 'SERVER_TIMING', {})}
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(timing.install, dispatch_uid='core-timing-install')
+        for connection in connections.all(initialized_only=True):
+            timing.install(connection)
+
+    def is_sampled(self):
+        rate = self.config['SAMPLE_RATE']
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.log_slow(request, response, (time.perf_counter() - started) * 1000)
+            return response
+
+        timer, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            self.log_slow(request, response, (time.perf_counter() - started) * 1000)
+            return response
+
+        timer, token = timing.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.stop(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        metrics = timer.metrics()
+        if self.config['HEADER']:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.2f}' + (f';desc="{description}"' if description else '')
+                for name, duration, description in metrics
+            )
+        if self.config['LOG'] or self.is_slow(metrics[-1][1]):
+            self.log(request, response, {
+                **{f'{name}_ms': round(duration, 2) for name, duration, _ in metrics},
+                'db_queries': timer.db_queries,
+            })
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        timer = timing.current()
+        if timer is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timer.add('render', time.perf_counter() - started))
+        return response
+
+    def is_slow(self, duration):
+        return self.config['SLOW_MS'] is not None and duration >= self.config['SLOW_MS']
+
+    def log_slow(self, request, response, duration):
+        if self.is_slow(duration):
+            self.log(request, response, {'total_ms': round(duration, 2)})
+
+    def log(self, request, response, metrics):
+        resolver_match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'event': 'request_timing',
+            'method': request.method,
+            'path': request.path,
+            'route': resolver_match.route if resolver_match else None,
+            'view': resolver_match.view_name if resolver_match else None,
+            'status': response.status_code,
+            **metrics,
+        }))
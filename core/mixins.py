@@ -1,12 +1,33 @@
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework import status
 
+from . import timing, versioning
+
 class ResponseMixin:
     """
     Mixin to standardize API responses across the application.
     """
+    def initial(self, request, *args, **kwargs):
+        # Authentication, permission and throttle checks
+        with timing.measure('auth'):
+            super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        return self.timed_serializer(super().get_serializer(*args, **kwargs))
+
+    @staticmethod
+    def timed_serializer(serializer):
+        """
+        Records the serializer's output time as the "serialize" Server-Timing phase
+        """
+        if timing.current() is not None:
+            serializer.to_representation = timing.timed('serialize', serializer.to_representation)
+        return serializer
+
     @staticmethod
-    def success_response(data=None, message="Operation successful", status_code=status.HTTP_200_OK):
+    def success_response(data=None, message="Operation successful", status_code=status.HTTP_200_OK, pagination=None):
         """
         Standard success response format
         """
@@ -17,8 +38,28 @@ class ResponseMixin:
         
         if data is not None:
             response["data"] = data
+
+        if pagination is not None:
+            response["pagination"] = pagination
             
         return Response(response, status=status_code)
+
+    def paginated_response(self, queryset, message, serializer_class=None):
+        """
+        Standard success response for a list, paginated with the view's paginator
+        """
+        serializer_class = serializer_class or self.get_serializer_class()
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            serializer = self.timed_serializer(serializer_class(queryset, many=True, context=self.get_serializer_context()))
+            return self.success_response(data=serializer.data, message=message)
+
+        serializer = self.timed_serializer(serializer_class(page, many=True, context=self.get_serializer_context()))
+        return self.success_response(
+            data=serializer.data,
+            message=message,
+            pagination=self.paginator.get_pagination_data()
+        )
     
     @staticmethod
     def error_response(message="An error occurred", errors=None, status_code=status.HTTP_400_BAD_REQUEST):
@@ -33,4 +74,55 @@ class ResponseMixin:
         if errors is not None:
             response["errors"] = errors
             
-        return Response(response, status=status_code)
\ No newline at end of file
+        return Response(response, status=status_code)
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = "Not modified"
+
+
+class ConditionalResponseMixin(ResponseMixin):
+    """
+    Adds ETag and Last-Modified support to read endpoints.
+
+    ``conditional_models`` lists the models whose changes affect the response.
+    Their version stamps (see ``core.versioning``) are compared with
+    ``If-None-Match`` / ``If-Modified-Since`` before the handler runs, so a
+    matching request is answered with 304 without any query or serialization.
+    """
+    conditional_models = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def is_conditional(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and bool(self.conditional_models)
+            and getattr(self, 'action', None) in self.conditional_actions
+        )
+
+    def get_version_stamps(self):
+        return versioning.get_stamps([model._meta.label_lower for model in self.conditional_models])
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._etag = None
+        self._last_modified = None
+        if not self.is_conditional(request):
+            return
+
+        self._etag, self._last_modified = versioning.validators(self.get_version_stamps())
+        if versioning.is_not_modified(request.headers, self._etag, self._last_modified):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, '_etag', None) and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = self._etag
+            response['Last-Modified'] = http_date(self._last_modified)
+            response['Cache-Control'] = 'no-cache'
+        return response
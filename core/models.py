@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """
+    A queued call of a ``core.jobs.job`` function, run by the ``run_jobs`` worker.
+    Jobs are deleted once they succeed; failed ones are kept for inspection.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)  # Dotted path of the job function
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'], name='job_status_run_at_idx'),
+        ]
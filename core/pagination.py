@@ -0,0 +1,138 @@
+"""
+Keyset (cursor) pagination for Kingdom Chronicles.
+
+Pages are selected with ``WHERE (ordering columns) > (last row values)``
+instead of OFFSET, so with an index matching the ordering a deep page costs
+the same as the first one. The cursor is an opaque token encoding the
+ordering values of the last row of the previous page.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Views set ``pagination_ordering``: a tuple of concrete column names,
+    optionally prefixed with '-', whose last entry must be unique (usually ``id``).
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    default_ordering = ('id',)
+    invalid_cursor_message = "Invalid cursor"
+
+    @staticmethod
+    def get_query_params(request):
+        # DRF requests and the plain Django requests of the async views
+        return getattr(request, 'query_params', request.GET)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(self.get_query_params(request)[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    @staticmethod
+    def _encode_value(value):
+        # Keep full microsecond precision so no row falls between two pages
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        raise TypeError(f"Cannot use {type(value).__name__} in a cursor")
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, default=self._encode_value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = self.get_query_params(request).get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # The token is client supplied, so values must be valid for their columns before reaching the query
+        try:
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_after_filter(self, position):
+        """
+        Builds the row-value comparison ``(a, b, c) > (x, y, z)`` honouring each field's direction.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        # Redundant, but a plain bound on the first column is what lets the
+        # planner start the index range at the cursor instead of scanning to it
+        first = self.ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & condition
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Returns the queryset of the requested page plus one row, to tell whether a next page exists.
+        """
+        self.request = request
+        self.ordering = tuple(getattr(view, 'pagination_ordering', self.default_ordering))
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_after_filter(position))
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            last = rows[-1]
+            self.next_position = [getattr(last, field.lstrip('-')) for field in self.ordering]
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.get_page([row async for row in self.get_page_queryset(queryset, request, view)])
+
+    def get_next_cursor(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_pagination_data(self):
+        return {
+            'next_cursor': self.get_next_cursor(),
+            'next': self.get_next_link(),
+        }
@@ -0,0 +1,69 @@
+"""
+Query counting and N+1 detection.
+
+``QueryRecorder`` captures the queries run inside a block. Queries that only
+differ in their literal values have the same *shape*; one shape repeated
+many times within a single request is almost always a per-row lookup that
+should have been a ``select_related`` / ``prefetch_related`` or a grouped
+query.
+
+Views declare the most queries each action may run as ``query_budgets``,
+keyed by action name on viewsets and by HTTP method on plain API views;
+``manage.py check_query_budgets`` enforces them.
+"""
+import re
+from collections import Counter
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+
+REPEAT_THRESHOLD = 3
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\?, )*\?\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+_IGNORED_RE = re.compile(r'^\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b', re.IGNORECASE)
+
+
+def query_shape(sql):
+    """
+    Returns ``sql`` with its literal values replaced by ``?``.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder(CaptureQueriesContext):
+    """
+    Captures the queries of a block, leaving out savepoint bookkeeping.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        super().__init__(connections[using])
+
+    @property
+    def queries(self):
+        return [query['sql'] for query in self.captured_queries if not _IGNORED_RE.match(query['sql'])]
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """
+        Returns ``(shape, count)`` for every query shape run at least ``threshold`` times.
+        """
+        counts = Counter(query_shape(sql) for sql in self.queries)
+        return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+
+def get_query_budget(view_class, action, method):
+    """
+    Returns the declared query budget of a view for ``action`` (viewsets) or
+    ``method`` (plain API views), or None when it has not declared one.
+    """
+    budgets = getattr(view_class, 'query_budgets', {})
+    return budgets.get(action or method.lower())
@@ -0,0 +1,316 @@
+"""
+Ranking engine for Kingdom Chronicles.
+
+Boards are sorted sets of (member, score) pairs ordered by score descending,
+with the member id breaking ties. ``InMemoryRankBackend`` keeps every board
+in an indexable skip list so rank, top-N and neighbour lookups are O(log n).
+Other backends (e.g. a shared store) can be plugged in with the
+``RANKING_BACKEND`` setting.
+
+Every process holds its own in-memory boards. A version counter per board in
+the shared cache (see the CACHES setting) counts the writes to it, so a
+process whose copy missed a write made by another one, or committed while
+the board was loading, drops it and loads it again from the database.
+"""
+import math
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+VERSION_TIMEOUT = None  # Counters live as long as the boards they describe
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level
+
+
+class SkipList:
+    """
+    Indexable skip list. Every link stores how many bottom-level steps it
+    spans, which gives O(log n) insert, remove, rank and positional access.
+    """
+    MAX_LEVEL = 32
+
+    def __init__(self, rng=None):
+        self._rng = rng or random.Random()
+        self._nil = _Node(None, 0)
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._head.next = [self._nil] * self.MAX_LEVEL
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        return min(self.MAX_LEVEL, 1 - int(math.log(1.0 - self._rng.random(), 2.0)))
+
+    def _find(self, key):
+        chain = [None] * self.MAX_LEVEL
+        steps = [0] * self.MAX_LEVEL
+        node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps_at_level = self._find(key)
+        level_count = self._random_level()
+        node = _Node(key, level_count)
+        steps = 0
+        for level in range(level_count):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(level_count, self.MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._find(key)
+        node = chain[0].next[0]
+        if node is self._nil or node.key != key:
+            raise KeyError(key)
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key):
+        """
+        Returns the 0-based position of ``key``.
+        """
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        if node.next[0] is self._nil or node.next[0].key != key:
+            raise KeyError(key)
+        return position
+
+    def slice(self, start, stop):
+        """
+        Returns the keys between positions ``start`` (inclusive) and ``stop`` (exclusive).
+        """
+        start = max(start, 0)
+        stop = min(stop, self._size)
+        if start >= stop:
+            return []
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.width[level] <= remaining and node.next[level] is not self._nil:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class RankBackend:
+    """
+    Interface every ranking backend implements.
+    Ranks are 1-based positions ordered by score descending, then member id.
+    """
+
+    def is_loaded(self, board):
+        raise NotImplementedError
+
+    def load(self, board, entries):
+        """
+        Replaces the content of ``board`` with ``entries`` of (member, score).
+        """
+        raise NotImplementedError
+
+    def unload(self, board):
+        """
+        Drops ``board`` so it is loaded again from the database on next use,
+        in every process.
+        """
+        raise NotImplementedError
+
+    def set_score(self, board, member, score):
+        raise NotImplementedError
+
+    def increment(self, board, member, delta):
+        raise NotImplementedError
+
+    def remove(self, board, member):
+        raise NotImplementedError
+
+    def rank(self, board, member):
+        """
+        Returns ``(rank, score)`` for ``member`` or None if it is not ranked.
+        """
+        raise NotImplementedError
+
+    def top(self, board, count):
+        """
+        Returns a list of ``(rank, member, score)`` for the first ``count`` members.
+        """
+        raise NotImplementedError
+
+    def around(self, board, member, radius):
+        """
+        Returns up to ``radius`` members on each side of ``member``, including it.
+        """
+        raise NotImplementedError
+
+
+class _Board:
+    def __init__(self, version):
+        self.scores = {}
+        self.entries = SkipList()
+        self.version = version  # Value of the board's counter this copy reflects
+
+    @staticmethod
+    def key(member, score):
+        return (-score, member)
+
+    def set(self, member, score):
+        if member in self.scores:
+            self.entries.remove(self.key(member, self.scores[member]))
+        self.scores[member] = score
+        self.entries.insert(self.key(member, score))
+
+    def discard(self, member):
+        if member in self.scores:
+            self.entries.remove(self.key(member, self.scores.pop(member)))
+
+    def window(self, start, stop):
+        return [
+            (start + offset + 1, member, -negative_score)
+            for offset, (negative_score, member) in enumerate(self.entries.slice(start, stop))
+        ]
+
+
+class InMemoryRankBackend(RankBackend):
+    """
+    Keeps every board in process memory. Each worker process holds its own
+    copy, checked against the board's shared version counter on every read.
+    """
+
+    def __init__(self):
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(board):
+        return f"rank-board-version:{board}"
+
+    def _current_version(self, board):
+        key = self._version_key(board)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, 0, timeout=VERSION_TIMEOUT)
+            version = cache.get(key)
+        return version
+
+    def _next_version(self, board):
+        key = self._version_key(board)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # The counter was evicted, so every copy of the board is reloaded anyway
+            cache.add(key, 0, timeout=VERSION_TIMEOUT)
+            return cache.incr(key)
+
+    def _write(self, board, apply):
+        version = self._next_version(board)
+        with self._lock:
+            loaded = self._boards.get(board)
+            if loaded is None:
+                return
+            if loaded.version == version - 1:
+                apply(loaded)
+                loaded.version = version
+            else:
+                # Another process wrote in between; this copy cannot be patched up
+                del self._boards[board]
+
+    def is_loaded(self, board):
+        loaded = self._boards.get(board)
+        return loaded is not None and loaded.version == self._current_version(board)
+
+    def load(self, board, entries):
+        # Read before ``entries`` is consumed, so a write committed during the
+        # load leaves this copy behind the counter and it is loaded again
+        loaded = _Board(self._current_version(board))
+        for member, score in entries:
+            loaded.set(member, score)
+        with self._lock:
+            self._boards[board] = loaded
+
+    def unload(self, board):
+        self._next_version(board)
+        with self._lock:
+            self._boards.pop(board, None)
+
+    def set_score(self, board, member, score):
+        self._write(board, lambda loaded: loaded.set(member, score))
+
+    def increment(self, board, member, delta):
+        self._write(board, lambda loaded: loaded.set(member, loaded.scores.get(member, 0) + delta))
+
+    def remove(self, board, member):
+        self._write(board, lambda loaded: loaded.discard(member))
+
+    def rank(self, board, member):
+        with self._lock:
+            loaded = self._boards.get(board)
+            if loaded is None or member not in loaded.scores:
+                return None
+            score = loaded.scores[member]
+            return loaded.entries.index(loaded.key(member, score)) + 1, score
+
+    def top(self, board, count):
+        with self._lock:
+            loaded = self._boards.get(board)
+            if loaded is None:
+                return []
+            return loaded.window(0, count)
+
+    def around(self, board, member, radius):
+        with self._lock:
+            loaded = self._boards.get(board)
+            if loaded is None or member not in loaded.scores:
+                return []
+            position = loaded.entries.index(loaded.key(member, loaded.scores[member]))
+            return loaded.window(max(position - radius, 0), position + radius + 1)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_rank_backend():
+    """
+    Returns the process-wide backend configured by ``RANKING_BACKEND``.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'RANKING_BACKEND', 'core.ranking.InMemoryRankBackend')
+                _backend = import_string(path)()
+    return _backend
@@ -0,0 +1,97 @@
+"""
+Per-request timing breakdown.
+
+``ServerTimingMiddleware`` starts a ``RequestTimer`` for a sampled share of
+requests. While it is active, every query is timed by ``execute_wrapper``
+(installed on each database connection, so it also sees queries that the
+async ORM runs in worker threads), and views record named phases with
+``measure()`` (``ResponseMixin`` times authentication and serialization).
+Unsampled requests only pay for one ``ContextVar`` lookup per hook.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.db_time = 0.0
+        self.db_queries = 0
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_query(self, seconds):
+        self.db_time += seconds
+        self.db_queries += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def metrics(self):
+        """
+        Returns ``(name, milliseconds, description)`` for every measured phase.
+        """
+        metrics = [('db', self.db_time * 1000, f'{self.db_queries} queries')]
+        metrics += [(name, seconds * 1000, '') for name, seconds in self.phases.items()]
+        metrics.append(('total', self.elapsed() * 1000, ''))
+        return metrics
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    timer = _current.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.add_query(time.perf_counter() - started)
+
+def install(connection, **kwargs):
+    """
+    Adds ``execute_wrapper`` to a database connection; a ``connection_created`` receiver.
+    """
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+def current():
+    """
+    Returns the active RequestTimer, or None when the request is not sampled.
+    """
+    return _current.get()
+
+def start():
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+def stop(token):
+    _current.reset(token)
+
+@contextmanager
+def measure(name):
+    """
+    Adds the time spent in the block to phase ``name`` of the active timer.
+    """
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+def timed(name, function):
+    """
+    Wraps ``function`` so its calls are measured as phase ``name``.
+    """
+    def wrapper(*args, **kwargs):
+        with measure(name):
+            return function(*args, **kwargs)
+    return wrapper
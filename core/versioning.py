@@ -0,0 +1,92 @@
+"""
+Cheap version stamps for resource collections.
+
+A collection is identified by a model label. Its stamp is a random token plus
+the time of the last change, kept in the cache and replaced when a write to
+a tracked model commits. Comparing stamps lets views answer conditional
+requests without touching the database.
+"""
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils.http import parse_etags, parse_http_date_safe
+
+STAMP_TIMEOUT = None  # Stamps live until the collection changes
+
+
+def _key(label):
+    return f"collection-version:{label}"
+
+def bump(label):
+    """
+    Gives the collection a new stamp and returns it.
+    """
+    stamp = (uuid.uuid4().hex, time.time())
+    cache.set(_key(label), stamp, timeout=STAMP_TIMEOUT)
+    return stamp
+
+def get_stamps(labels):
+    """
+    Returns ``{label: (token, modified)}``, creating stamps for unknown collections.
+    """
+    stamps = cache.get_many([_key(label) for label in labels])
+    result = {}
+    for label in labels:
+        stamp = stamps.get(_key(label))
+        if stamp is None:
+            # A lost stamp means we cannot vouch for old ETags, so start a new one
+            cache.add(_key(label), (uuid.uuid4().hex, time.time()), timeout=STAMP_TIMEOUT)
+            stamp = cache.get(_key(label))
+        result[label] = stamp
+    return result
+
+async def aget_stamps(labels):
+    """
+    Async version of ``get_stamps``.
+    """
+    stamps = await cache.aget_many([_key(label) for label in labels])
+    result = {}
+    for label in labels:
+        stamp = stamps.get(_key(label))
+        if stamp is None:
+            await cache.aadd(_key(label), (uuid.uuid4().hex, time.time()), timeout=STAMP_TIMEOUT)
+            stamp = await cache.aget(_key(label))
+        result[label] = stamp
+    return result
+
+def validators(stamps):
+    """
+    Returns the ``(etag, last_modified)`` of a response built from the collections
+    whose ``get_stamps`` result is ``stamps``.
+    """
+    ordered = [stamp for _, stamp in sorted(stamps.items())]
+    etag = '"%s"' % hashlib.sha1('|'.join(token for token, _ in ordered).encode()).hexdigest()
+    return etag, int(max(modified for _, modified in ordered))
+
+def is_not_modified(headers, etag, last_modified):
+    """
+    Tells whether a request with these headers already has the current representation.
+    """
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+def _bump_on_change(sender, **kwargs):
+    # Bumping before the commit would let a reader pair the new stamp with the old rows
+    label = sender._meta.label_lower
+    transaction.on_commit(lambda: bump(label))
+
+def track(*models):
+    """
+    Replaces the stamp of each model's collection whenever a row is saved or deleted.
+    Writes that skip signals (``update()``, ``bulk_create()``) must call ``bump`` themselves.
+    """
+    for model in models:
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=f'versioning-save-{model._meta.label_lower}')
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=f'versioning-delete-{model._meta.label_lower}')
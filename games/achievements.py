@@ -0,0 +1,250 @@
+"""
+Batch evaluation of achievement rules.
+
+Rules are declared in ``RULES`` and are checked against the precomputed
+per-user aggregates (UserGameStats, UserScoreTotal and ScorePeriodTotal),
+never against Score history. ``consume_events`` reads the Scores and
+SessionScores written since its last run, in primary key order. Each batch
+of events becomes one evaluation of the users they belong to. A batch costs
+a fixed number of queries whatever the number of rules, and new unlocks are
+written with a single ``bulk_create``.
+
+Cursors are advanced in the transaction that writes the unlocks, so a batch
+interrupted halfway is evaluated again. The unique ``(user, code)``
+constraint on Achievement keeps that from unlocking anything twice. A row
+committed after a later id was consumed is never read as an event. Its
+user is evaluated again on their next event.
+"""
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from users.models import Achievement, User
+from .leaderboard import period_start
+from .models import EventCursor, GameType, Score, ScorePeriodTotal, SessionScore, UserGameStats, UserScoreTotal
+
+DEFAULT_BATCH_SIZE = 500
+
+# Event streams: cursor name -> model
+STREAMS = {
+    'achievements.scores': Score,
+    'achievements.session_scores': SessionScore,
+}
+
+
+class Batch:
+    """
+    The aggregates of a batch of users, each loaded with one query on first use.
+    """
+
+    def __init__(self, user_ids):
+        self.user_ids = list(user_ids)
+        self._leaders = {}
+
+    @cached_property
+    def stats(self):
+        """
+        ``{user_id: {game_type_id: (games_played, best_score)}}``
+        """
+        stats = {}
+        rows = UserGameStats.objects.filter(user_id__in=self.user_ids, games_played__gt=0)
+        for user_id, game_type_id, games_played, best_score in rows.values_list(
+            'user_id', 'game_type_id', 'games_played', 'best_score'
+        ):
+            stats.setdefault(user_id, {})[game_type_id] = (games_played, best_score)
+        return stats
+
+    @cached_property
+    def points(self):
+        return dict(UserScoreTotal.objects.filter(user_id__in=self.user_ids).values_list('user_id', 'points'))
+
+    @cached_property
+    def game_type_count(self):
+        return GameType.objects.count()
+
+    def leaders(self, period, limit):
+        """
+        Returns the users of the batch in the top ``limit`` of a current
+        ``period`` board: one query for the game types they play, then one
+        index range scan per game type.
+        """
+        if (period, limit) not in self._leaders:
+            start = period_start(period, timezone.localdate())
+            boards = ScorePeriodTotal.objects.filter(period=period, start=start)
+            game_type_ids = set(boards.filter(user_id__in=self.user_ids).values_list('game_type_id', flat=True))
+            leaders = set()
+            for game_type_id in game_type_ids:
+                leaders.update(
+                    boards.filter(game_type_id=game_type_id)
+                    .order_by('-points', 'user_id')
+                    .values_list('user_id', flat=True)[:limit]
+                )
+            self._leaders[period, limit] = leaders & set(self.user_ids)
+        return self._leaders[period, limit]
+
+
+class Rule:
+    """
+    An achievement unlocked by ``qualifies``. ``code`` is stored on the
+    Achievement and must never change once the rule has unlocked anything.
+    """
+
+    def __init__(self, code, title, description):
+        self.code = code
+        self.title = title
+        self.description = description
+
+    def qualifies(self, user_id, batch):
+        raise NotImplementedError
+
+    def unlock(self, user_id):
+        return Achievement(user_id=user_id, code=self.code, title=self.title, description=self.description)
+
+
+class GamesPlayed(Rule):
+    """
+    Play ``count`` games, of any type or of ``game_type_id``.
+    """
+
+    def __init__(self, code, title, description, count, game_type_id=None):
+        super().__init__(code, title, description)
+        self.count = count
+        self.game_type_id = game_type_id
+
+    def qualifies(self, user_id, batch):
+        stats = batch.stats.get(user_id, {})
+        if self.game_type_id is not None:
+            return stats.get(self.game_type_id, (0, None))[0] >= self.count
+        return sum(games_played for games_played, _ in stats.values()) >= self.count
+
+
+class BestScore(Rule):
+    """
+    Score at least ``points`` in one game.
+    """
+
+    def __init__(self, code, title, description, points):
+        super().__init__(code, title, description)
+        self.points = points
+
+    def qualifies(self, user_id, batch):
+        return any(
+            best is not None and best >= self.points for _, best in batch.stats.get(user_id, {}).values()
+        )
+
+
+class TotalPoints(Rule):
+    """
+    Earn ``points`` across all games.
+    """
+
+    def __init__(self, code, title, description, points):
+        super().__init__(code, title, description)
+        self.points = points
+
+    def qualifies(self, user_id, batch):
+        return batch.points.get(user_id, 0) >= self.points
+
+
+class PeriodTop(Rule):
+    """
+    Reach the top ``limit`` of the current ``period`` leaderboard of any game type.
+    """
+
+    def __init__(self, code, title, description, period, limit):
+        super().__init__(code, title, description)
+        self.period = period
+        self.limit = limit
+
+    def qualifies(self, user_id, batch):
+        return user_id in batch.leaders(self.period, self.limit)
+
+
+class AllGameTypes(Rule):
+    """
+    Play every game type at least once.
+    """
+
+    def qualifies(self, user_id, batch):
+        return batch.game_type_count > 0 and len(batch.stats.get(user_id, {})) >= batch.game_type_count
+
+
+RULES = [
+    GamesPlayed('games-10', "Getting started", "Play 10 games.", count=10),
+    GamesPlayed('games-100', "Devoted", "Play 100 games.", count=100),
+    GamesPlayed('games-1000', "Unwavering", "Play 1000 games.", count=1000),
+    BestScore('score-500', "Sharp", "Score 500 points in one game.", points=500),
+    BestScore('score-1000', "Perfect", "Score 1000 points in one game.", points=1000),
+    TotalPoints('points-10000', "Treasure", "Earn 10000 points in total.", points=10000),
+    PeriodTop('weekly-top-10', "Weekly top 10", "Reach the top 10 of a weekly leaderboard.", period='week', limit=10),
+    PeriodTop('monthly-top-3', "Monthly podium", "Reach the top 3 of a monthly leaderboard.", period='month', limit=3),
+    AllGameTypes('all-game-types', "Explorer", "Play every game type."),
+]
+
+
+def evaluate(user_ids, rules=None):
+    """
+    Unlocks the achievements ``user_ids`` qualify for and do not have yet.
+    Returns the new Achievement rows.
+    """
+    rules = RULES if rules is None else rules
+    user_ids = set(user_ids)
+    if not user_ids or not rules:
+        return []
+    with transaction.atomic():
+        # Evaluators of the same users take turns, so the unlocks read below include
+        # those of a concurrent run and the returned rows are only the ones created here
+        list(User.objects.select_for_update().filter(pk__in=user_ids).order_by('pk').values_list('pk'))
+        unlocked = set(
+            Achievement.objects.filter(user_id__in=user_ids, code__in=[rule.code for rule in rules])
+            .values_list('user_id', 'code')
+        )
+        batch = Batch(user_ids)
+        new = [
+            rule.unlock(user_id)
+            for user_id in sorted(user_ids)
+            for rule in rules
+            if (user_id, rule.code) not in unlocked and rule.qualifies(user_id, batch)
+        ]
+        # Only writers that skip the lock above, such as the admin, can still conflict
+        Achievement.objects.bulk_create(new, ignore_conflicts=True)
+    return new
+
+def _read(name, model, batch_size):
+    # Locked, so concurrent consumers take turns instead of reading the same events
+    cursor, _ = EventCursor.objects.select_for_update().get_or_create(name=name)
+    rows = list(
+        model.objects.filter(pk__gt=cursor.position).order_by('pk').values_list('pk', 'user_id')[:batch_size]
+    )
+    return cursor, rows
+
+def consume_events(batch_size=DEFAULT_BATCH_SIZE, rules=None):
+    """
+    Evaluates the users of up to ``batch_size`` new events per stream.
+    Returns ``(events, unlocks)``; no events means the streams are drained.
+    """
+    with transaction.atomic():
+        user_ids = set()
+        events = 0
+        for name, model in STREAMS.items():
+            cursor, rows = _read(name, model, batch_size)
+            if rows:
+                events += len(rows)
+                user_ids.update(user_id for _, user_id in rows)
+                EventCursor.objects.filter(pk=cursor.pk).update(position=rows[-1][0], updated_at=timezone.now())
+        return events, evaluate(user_ids, rules)
+
+def evaluate_all(batch_size=DEFAULT_BATCH_SIZE, rules=None):
+    """
+    Evaluates every user with plays, for rules added after their events
+    were consumed. Yields the new unlocks of each batch.
+    """
+    users = UserGameStats.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+    last = 0
+    while True:
+        user_ids = list(users.filter(user_id__gt=last)[:batch_size])
+        if not user_ids:
+            return
+        last = user_ids[-1]
+        with transaction.atomic():
+            yield evaluate(user_ids, rules)
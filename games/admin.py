@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GameType, Question, QuestionOption, Score, GameSession, SessionScore, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion, VerseVersion
+from .models import GameType, Question, QuestionOption, Score, ScoreTotal, UserScoreTotal, ScorePeriodTotal, UserGameStats, GameSession, SessionScore, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion, VerseVersion, PackSnapshot
 
 class QuestionOptionInline(admin.TabularInline):
     model = QuestionOption
@@ -23,6 +23,29 @@ class ScoreAdmin(admin.ModelAdmin):
     list_filter = ('game_type', 'timestamp')
     search_fields = ('user__username',)
 
+@admin.register(ScoreTotal)
+class ScoreTotalAdmin(admin.ModelAdmin):
+    list_display = ('user', 'game_type', 'points')
+    list_filter = ('game_type',)
+    search_fields = ('user__username',)
+
+@admin.register(UserScoreTotal)
+class UserScoreTotalAdmin(admin.ModelAdmin):
+    list_display = ('user', 'points')
+    search_fields = ('user__username',)
+
+@admin.register(ScorePeriodTotal)
+class ScorePeriodTotalAdmin(admin.ModelAdmin):
+    list_display = ('user', 'game_type', 'period', 'start', 'points')
+    list_filter = ('game_type', 'period', 'start')
+    search_fields = ('user__username',)
+
+@admin.register(UserGameStats)
+class UserGameStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'game_type', 'games_played', 'best_score', 'last_played')
+    list_filter = ('game_type',)
+    search_fields = ('user__username',)
+
 @admin.register(GameSession)
 class GameSessionAdmin(admin.ModelAdmin):
     list_display = ('game_type', 'start_time', 'end_time', 'status')
@@ -40,6 +63,14 @@ class ScriptureSprintQuestionAdmin(admin.ModelAdmin):
     search_fields = ('verse', 'description')
     list_filter = ('game_type',)
 
+@admin.register(PackSnapshot)
+class PackSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('pack_type', 'version', 'question_count', 'size', 'is_stale', 'built_at')
+    list_filter = ('is_stale',)
+    search_fields = ('pack_type',)
+    exclude = ('content',)
+    readonly_fields = ('pack_type', 'version', 'digest', 'size', 'question_count', 'is_stale', 'built_at')
+
 @admin.register(FindTheBibleVerseQuestion)
 class FindTheBibleVerseQuestionAdmin(admin.ModelAdmin):
     list_display = ('reference', 'text', 'book', 'chapter', 'verse', 'game_type')
@@ -0,0 +1,136 @@
+"""
+Async versions of the busiest games read endpoints, routed in place of the
+DRF actions when ``ASYNC_READ_VIEWS`` is on (see ``core.async_views``).
+Each one returns the same body as the action it replaces.
+
+``session_stream`` is async only: it holds the connection open for as long
+as the client watches the session (see ``games.streams``).
+"""
+import random
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import exceptions
+
+from core import timing
+from core.async_views import (
+    aauthenticate, aget_validators, async_api_view, conditional_response, error_response, json_response,
+    not_modified_response, success_response
+)
+from core.pagination import KeysetPagination
+from . import streams
+from .leaderboard import FROZEN_BOARD_CACHE_CONTROL, aget_period_board, total_board_queryset
+from .models import GameType, SessionScore
+from .serializers import GameTypeSerializer, PeriodLeaderboardQuerySerializer
+from .views import (
+    GameTypeViewSet, QuestionViewSet, ScriptureSprintQuestionViewSet, FindTheBibleVerseQuestionViewSet,
+    BibleCharadesQuestionViewSet
+)
+
+
+@async_api_view(query_budgets={'get': 1})
+async def game_type_list(request):
+    await aauthenticate(request, required=False)
+    validators = await aget_validators(GameTypeViewSet.conditional_models)
+    response = not_modified_response(request, validators)
+    if response is not None:
+        return response
+
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(GameType.objects.all(), request, view=GameTypeViewSet)
+    with timing.measure('serialize'):
+        data = GameTypeSerializer(page, many=True).data
+    return conditional_response(
+        success_response(
+            data=data,
+            message="Game types retrieved successfully",
+            pagination=paginator.get_pagination_data()
+        ),
+        validators
+    )
+
+def sampled_list(viewset, message=None, query_budget=2):
+    """
+    Builds the async list view of a ``SampledListMixin`` viewset.
+    """
+    @async_api_view(query_budgets={'get': query_budget})
+    async def view(request):
+        await aauthenticate(request, required=False)
+        # An unseeded sample is different on every request
+        seed = request.GET.get('seed')
+        validators = None
+        if seed:
+            validators = await aget_validators(viewset.conditional_models)
+            response = not_modified_response(request, validators)
+            if response is not None:
+                return response
+
+        rng = random.Random(seed) if seed else random.Random()
+        limit = request.GET.get('limit', viewset.default_limit)
+        filters = {name: request.GET.get(name, '') for name in viewset.sampler.filter_map}
+        ids = await viewset.sampler.asample_ids(limit=int(limit) if limit is not None else None, rng=rng, **filters)
+
+        serializer = viewset.values_serializer_class(context={'rng': rng})
+        with timing.measure('serialize'):
+            # The pool was built with the same filters, so the ids need no further filtering
+            data = await serializer.aserialize_ids(serializer.model._default_manager.all(), ids)
+
+        response = success_response(data=data, message=message) if message else json_response(data)
+        return conditional_response(response, validators) if validators else response
+
+    view.__name__ = view.__qualname__ = f'{viewset.sampler.model._meta.model_name}_list'
+    return view
+
+question_list = sampled_list(QuestionViewSet, message="Questions retrieved successfully")
+scripture_sprint_question_list = sampled_list(ScriptureSprintQuestionViewSet)
+find_the_bible_verse_question_list = sampled_list(FindTheBibleVerseQuestionViewSet, query_budget=1)
+bible_charades_question_list = sampled_list(BibleCharadesQuestionViewSet, query_budget=1)
+
+@async_api_view(query_budgets={'get': 1})
+async def leaderboard(request):
+    await aauthenticate(request)
+    if 'period' in request.GET:
+        return await period_leaderboard(request)
+    game_type = request.GET.get('game_type', '')
+    limit = int(request.GET.get('limit', 10))
+
+    return success_response(
+        data=[row async for row in total_board_queryset(game_type)[:limit]],
+        message="Leaderboard retrieved successfully"
+    )
+
+async def period_leaderboard(request):
+    serializer = PeriodLeaderboardQuerySerializer(data=request.GET.dict())
+    if not serializer.is_valid():
+        return error_response(message="Invalid leaderboard query", errors=serializer.errors)
+
+    params = serializer.validated_data
+    board = await aget_period_board(
+        params['game_type'], params['period'], params.get('date') or timezone.localdate(), params['limit']
+    )
+    response = success_response(data=board, message="Leaderboard retrieved successfully")
+    if board['frozen']:
+        response['Cache-Control'] = FROZEN_BOARD_CACHE_CONTROL
+    return response
+
+@async_api_view(query_budgets={'get': 3})
+async def session_stream(request, pk):
+    """
+    Streams a session's scoreboard as server-sent events: a ``snapshot``, then
+    a ``score`` event per new score, ``status`` changes and a final ``end``.
+    Clients reconnecting with ``Last-Event-ID`` only receive the scores they missed.
+    """
+    user = await aauthenticate(request)
+    # Same rule as GameSessionViewSet: players see the sessions they have scores in
+    if not await SessionScore.objects.filter(session_id=pk, user=user).aexists():
+        raise exceptions.NotFound("No GameSession matches the given query.")
+
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+    publisher, subscription = await streams.subscribe(pk, last_event_id)
+    response = StreamingHttpResponse(streams.event_stream(publisher, subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
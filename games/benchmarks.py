@@ -0,0 +1,254 @@
+"""
+In-process endpoint benchmarks.
+
+``build_endpoints`` describes one request for every route in ``games.urls``
+and ``users.urls`` against the fixtures made by ``create_fixtures``;
+``run_endpoint`` replays it through the DRF test client and reports latency
+percentiles, query counts and allocations. Writes run in a savepoint that is
+rolled back after every request, so each iteration sees the same data.
+"""
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.queries import QueryRecorder
+from users.models import Achievement
+from .models import (
+    Question, Score, GameSession, SessionScore, ScriptureSprintQuestion, FindTheBibleVerseQuestion,
+    BibleCharadesQuestion
+)
+from .packs import build_snapshot
+
+PASSWORD = 'Benchmark-pass-2024'
+# Password hashing dominates these endpoints, so they get fewer iterations
+HASHING_ITERATIONS = 5
+
+
+class Endpoint:
+    def __init__(self, name, method, path, data=None, user='player', status=200, iterations=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.user = user
+        self.status = status
+        self.iterations = iterations
+
+    @property
+    def is_write(self):
+        return self.method != 'get'
+
+
+def create_fixtures(game_types):
+    """
+    Creates the users and rows the benchmarked requests point at.
+    """
+    User = get_user_model()
+    player = User.objects.create_user('bench_player', 'bench_player@example.com', PASSWORD, points=500)
+    staff = User.objects.create_user('bench_staff', 'bench_staff@example.com', PASSWORD, is_staff=True)
+    victim = User.objects.create_user('bench_victim', 'bench_victim@example.com', PASSWORD)
+
+    Achievement.objects.bulk_create([
+        Achievement(user=player, title=f'Achievement {index}', description='Unlocked in a benchmark')
+        for index in range(25)
+    ])
+    for game_type in game_types:
+        Score.objects.create(user=player, game_type=game_type, points=250)
+    for _ in range(5):
+        session = GameSession.objects.create(game_type=game_types[0], status='completed')
+        SessionScore.objects.create(session=session, user=player, score=100)
+        SessionScore.objects.create(session=session, user=staff, score=80)
+
+    sprint = ScriptureSprintQuestion.objects.order_by('id').first()
+    snapshot = build_snapshot(sprint.pack_type)
+    return {
+        'users': {'player': player, 'staff': staff, 'victim': victim},
+        'player': player.pk,
+        'staff': staff.pk,
+        'victim': victim.pk,
+        'game_type': game_types[0].pk,
+        'game_name': game_types[0].name,
+        'session': session.pk,
+        'score': Score.objects.filter(user=player).values_list('pk', flat=True).first(),
+        'question': Question.objects.order_by('id').values_list('pk', flat=True).first(),
+        'sprint': sprint.pk,
+        'pack_type': snapshot.pack_type,
+        'digest': snapshot.digest,
+        'find_the_bible_verse': FindTheBibleVerseQuestion.objects.order_by('id').values_list('pk', flat=True).first(),
+        'bible_charades': BibleCharadesQuestion.objects.order_by('id').values_list('pk', flat=True).first(),
+        'uid': urlsafe_base64_encode(force_bytes(player.pk)),
+        'token': default_token_generator.make_token(player),
+    }
+
+def build_endpoints(f):
+    games, users = '/api/games', '/api/users'
+    new_password = {'new_password': 'Another-pass-2024', 'confirm_password': 'Another-pass-2024'}
+    return [
+        Endpoint('games.list', 'get', f'{games}/games/', user=None),
+        Endpoint('games.retrieve', 'get', f"{games}/games/{f['game_type']}/", user=None),
+        Endpoint('questions.list', 'get', f'{games}/questions/', user=None),
+        Endpoint('questions.list_filtered', 'get', f"{games}/questions/?game_type={f['game_name']}&difficulty=easy", user=None),
+        Endpoint('questions.retrieve', 'get', f"{games}/questions/{f['question']}/", user=None),
+        Endpoint('scores.list', 'get', f'{games}/scores/'),
+        Endpoint('scores.retrieve', 'get', f"{games}/scores/{f['score']}/"),
+        Endpoint('scores.update', 'patch', f"{games}/scores/{f['score']}/", data={'points': 300}),
+        Endpoint('scores.destroy', 'delete', f"{games}/scores/{f['score']}/", status=204),
+        Endpoint('scores.leaderboard', 'get', f'{games}/scores/leaderboard/'),
+        Endpoint('scores.leaderboard_by_game', 'get', f"{games}/scores/leaderboard/?game_type={f['game_name']}"),
+        Endpoint('scores.leaderboard_week', 'get', f"{games}/scores/leaderboard/?game_type={f['game_name']}&period=week"),
+        Endpoint('scores.leaderboard_frozen', 'get',
+                 f"{games}/scores/leaderboard/?game_type={f['game_name']}&period=month&date=2020-01-01"),
+        Endpoint('sessions.list', 'get', f'{games}/sessions/'),
+        Endpoint('sessions.list_summary', 'get', f'{games}/sessions/?summary=1'),
+        Endpoint('sessions.retrieve', 'get', f"{games}/sessions/{f['session']}/"),
+        Endpoint('sessions.create', 'post', f'{games}/sessions/', status=201, data={
+            'game_type': f['game_type'], 'status': 'completed', 'scores': [{'score': 42}, {'score': 17}, {'score': 8}],
+        }),
+        Endpoint('sessions.bulk', 'post', f'{games}/sessions/bulk/', status=201, data={
+            'sessions': [
+                {'game_type': f['game_type'], 'status': 'completed', 'scores': [{'score': index}]}
+                for index in range(50)
+            ],
+        }),
+        Endpoint('scripture_sprint.list', 'get', f'{games}/scripture-sprint-questions/', user=None),
+        Endpoint('scripture_sprint.retrieve', 'get', f"{games}/scripture-sprint-questions/{f['sprint']}/", user=None),
+        Endpoint('scripture_sprint.add_version', 'post', f"{games}/scripture-sprint-questions/{f['sprint']}/add_version/",
+                 status=201, data={'translation': 'BENCH', 'text': 'In the beginning was the Word'}),
+        Endpoint('scripture_sprint.packs', 'get', f'{games}/scripture-sprint-questions/packs/', user=None),
+        Endpoint('scripture_sprint.pack', 'get', f"{games}/scripture-sprint-questions/packs/{f['pack_type']}/", user=None),
+        Endpoint('scripture_sprint.pack_digest', 'get',
+                 f"{games}/scripture-sprint-questions/packs/{f['pack_type']}/{f['digest']}/", user=None),
+        Endpoint('find_the_bible_verse.list', 'get', f'{games}/find-the-bible-verse-questions/', user=None),
+        Endpoint('find_the_bible_verse.retrieve', 'get',
+                 f"{games}/find-the-bible-verse-questions/{f['find_the_bible_verse']}/", user=None),
+        Endpoint('bible_charades.list', 'get', f'{games}/bible-charades-questions/', user=None),
+        Endpoint('bible_charades.retrieve', 'get', f"{games}/bible-charades-questions/{f['bible_charades']}/", user=None),
+        Endpoint('search', 'get', f'{games}/search/?q=loved world', user=None),
+        Endpoint('references', 'get', f'{games}/references/?ref=John 3', user=None),
+        Endpoint('exports.scores', 'get', f'{games}/exports/scores/', user='staff', iterations=10),
+        Endpoint('exports.session_scores', 'get', f'{games}/exports/session_scores/?output=jsonl', user='staff',
+                 iterations=10),
+        Endpoint('exports.sessions', 'get', f"{games}/exports/sessions/?game_type={f['game_name']}", user='staff',
+                 iterations=10),
+
+        Endpoint('users.list', 'get', f'{users}/users/'),
+        Endpoint('users.retrieve', 'get', f"{users}/users/{f['player']}/"),
+        Endpoint('users.create', 'post', f'{users}/users/', status=201,
+                 data={'username': 'bench_created', 'email': 'bench_created@example.com', 'password': PASSWORD},
+                 iterations=HASHING_ITERATIONS),
+        Endpoint('users.update', 'patch', f"{users}/users/{f['player']}/", data={'email': 'bench_updated@example.com'}),
+        Endpoint('users.destroy', 'delete', f"{users}/users/{f['victim']}/", user='victim', status=204),
+        Endpoint('users.me', 'get', f'{users}/users/me/'),
+        Endpoint('users.achievements', 'get', f"{users}/users/{f['player']}/achievements/"),
+        Endpoint('users.rank', 'get', f"{users}/users/{f['player']}/rank/"),
+        Endpoint('users.stats', 'get', f"{users}/users/{f['player']}/stats/"),
+        Endpoint('users.top', 'get', f'{users}/users/top/'),
+        Endpoint('users.neighbours', 'get', f'{users}/users/neighbours/'),
+        Endpoint('users.update_points', 'post', f"{users}/users/{f['player']}/update_points/",
+                 data={'points': 10, 'reason': 'benchmark'}),
+        Endpoint('users.batch_points', 'post', f'{users}/users/batch_points/', user='staff', data={
+            'entries': [{'user': f['player'], 'points': 1, 'reason': 'benchmark'}] * 50,
+        }),
+        Endpoint('users.change_password', 'post', f'{users}/users/change_password/',
+                 data={'old_password': PASSWORD, **new_password}, iterations=HASHING_ITERATIONS),
+        Endpoint('signup', 'post', f'{users}/signup/', user=None, status=201,
+                 data={'username': 'bench_signup', 'email': 'bench_signup@example.com', 'password': PASSWORD},
+                 iterations=HASHING_ITERATIONS),
+        Endpoint('login', 'post', f'{users}/login/', user=None,
+                 data={'username': 'bench_player', 'password': PASSWORD}, iterations=HASHING_ITERATIONS),
+        Endpoint('password_reset', 'post', f'{users}/password-reset/', user=None,
+                 data={'email': 'bench_player@example.com'}),
+        Endpoint('password_reset_confirm', 'post', f'{users}/password-reset/confirm/', user=None,
+                 data={'uidb64': f['uid'], 'token': f['token'], **new_password}, iterations=HASHING_ITERATIONS),
+    ]
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def prepare_request(client, endpoint, fixtures):
+    if endpoint.user:
+        # Fetch a fresh user so in-memory changes from a rolled back write do not leak
+        client.force_authenticate(get_user_model().objects.get(pk=fixtures['users'][endpoint.user].pk))
+    else:
+        client.force_authenticate(None)
+
+    def send():
+        return getattr(client, endpoint.method)(endpoint.path, endpoint.data, format='json')
+    return send
+
+def call(send, endpoint):
+    if not endpoint.is_write:
+        return drain(send())
+    with transaction.atomic():
+        response = drain(send())
+        transaction.set_rollback(True)
+    return response
+
+def drain(response):
+    # A streaming response only runs its queries while it is read
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+def run_endpoint(client, endpoint, fixtures, iterations=50, warmup=3, alloc_iterations=5):
+    """
+    Replays ``endpoint`` and returns its timings in milliseconds, query counts,
+    allocation sizes in KiB and the status codes seen.
+    """
+    iterations = min(iterations, endpoint.iterations or iterations)
+    for _ in range(min(warmup, iterations)):
+        call(prepare_request(client, endpoint, fixtures), endpoint)
+
+    timings, queries, statuses = [], [], {}
+    for _ in range(iterations):
+        send = prepare_request(client, endpoint, fixtures)
+        with QueryRecorder() as recorder:
+            started = time.perf_counter()
+            response = call(send, endpoint)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(recorder.count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(min(alloc_iterations, iterations)):
+            send = prepare_request(client, endpoint, fixtures)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(send, endpoint)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((current - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'method': endpoint.method.upper(),
+        'path': endpoint.path,
+        'iterations': iterations,
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'expected_status': endpoint.status,
+        'latency_ms': {
+            'min': round(min(timings), 3),
+            'mean': round(statistics.fmean(timings), 3),
+            'p50': round(_percentile(timings, 50), 3),
+            'p90': round(_percentile(timings, 90), 3),
+            'p99': round(_percentile(timings, 99), 3),
+            'max': round(max(timings), 3),
+        },
+        'queries': {'min': min(queries), 'max': max(queries)},
+        'allocations_kib': {
+            'peak': round(statistics.median(peaks), 1) if peaks else None,
+            'retained': round(statistics.median(retained), 1) if retained else None,
+        },
+    }
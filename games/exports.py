@@ -0,0 +1,101 @@
+"""
+Streaming CSV / JSONL exports of scores and sessions for analytics.
+
+Rows are read as tuples with ``.values_list().iterator(chunk_size)`` (a
+server-side cursor on PostgreSQL) and encoded one chunk at a time, so an
+export of any size runs in constant memory and its first bytes go out as
+soon as the first chunk is read. Rows are ordered by primary key.
+"""
+import csv
+import datetime
+import io
+import json
+from itertools import islice
+
+from .models import GameSession, Score, SessionScore
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+class Export:
+    """
+    ``columns`` maps output column names to ``values_list`` lookups;
+    ``date_field`` and ``game_type_field`` are the lookups the filters apply to.
+    """
+
+    def __init__(self, model, columns, date_field, game_type_field):
+        self.model = model
+        self.columns = columns
+        self.date_field = date_field
+        self.game_type_field = game_type_field
+
+    def get_queryset(self, since=None, until=None, game_type=None):
+        queryset = self.model._default_manager.order_by('pk')
+        if since is not None:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': since})
+        if until is not None:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': until})
+        if game_type:
+            queryset = queryset.filter(**{f'{self.game_type_field}__name': game_type})
+        return queryset.values_list(*self.columns.values())
+
+    def stream(self, queryset, format='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields the export as text, one chunk of rows at a time.
+        """
+        encode = self.encode_csv if format == 'csv' else self.encode_jsonl
+        if format == 'csv':
+            yield self.encode_csv([list(self.columns)])
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield encode([[_value(value) for value in row] for row in chunk])
+
+    @staticmethod
+    def encode_csv(rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def encode_jsonl(self, rows):
+        names = list(self.columns)
+        return ''.join(
+            json.dumps(dict(zip(names, row)), ensure_ascii=False, separators=(',', ':')) + '\n' for row in rows
+        )
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+EXPORTS = {
+    'scores': Export(
+        Score,
+        {
+            'id': 'id', 'user_id': 'user_id', 'username': 'user__username', 'game_type': 'game_type__name',
+            'points': 'points', 'timestamp': 'timestamp',
+        },
+        date_field='timestamp',
+        game_type_field='game_type',
+    ),
+    'session_scores': Export(
+        SessionScore,
+        {
+            'id': 'id', 'session_id': 'session_id', 'user_id': 'user_id', 'username': 'user__username',
+            'game_type': 'session__game_type__name', 'score': 'score', 'timestamp': 'timestamp',
+        },
+        date_field='timestamp',
+        game_type_field='session__game_type',
+    ),
+    'sessions': Export(
+        GameSession,
+        {
+            'id': 'id', 'game_type': 'game_type__name', 'status': 'status', 'start_time': 'start_time',
+            'end_time': 'end_time',
+        },
+        date_field='start_time',
+        game_type_field='game_type',
+    ),
+}
@@ -0,0 +1,145 @@
+"""
+Values-based serialization for the read-only question lists.
+
+Building a ModelSerializer per row (and per nested option or version) spends
+most of a list request inside DRF's field machinery. The serializers here
+read ``.values()`` rows instead, fetch child rows with one grouped query and
+assemble plain dicts with the same keys, order and values as the matching
+ModelSerializer, so the rendered JSON is byte-for-byte identical.
+
+Only fields whose ModelSerializer representation is the stored value itself
+(integers, strings, booleans, JSON and primary keys) can be served this way.
+"""
+import random
+from collections import defaultdict
+
+from .models import (
+    Question, QuestionOption, ScriptureSprintQuestion, VerseVersion, FindTheBibleVerseQuestion,
+    BibleCharadesQuestion
+)
+
+
+class ValuesChild:
+    """
+    A nested ``many=True`` serializer read from the child table in one query.
+    """
+
+    def __init__(self, model, fk, fields, shuffle=False):
+        self.model = model
+        self.fk = fk
+        self.fields = fields
+        self.shuffle = shuffle
+
+    def get_rows(self, parent_ids):
+        # Same filter and ordering as prefetch_related on the reverse relation
+        return self.model._default_manager.filter(**{f'{self.fk}__in': parent_ids}).values_list(self.fk, *self.fields)
+
+    def group_rows(self, rows):
+        groups = defaultdict(list)
+        for parent_id, *values in rows:
+            groups[parent_id].append(dict(zip(self.fields, values)))
+        return groups
+
+    def group(self, parent_ids):
+        return self.group_rows(self.get_rows(parent_ids))
+
+    async def agroup(self, parent_ids):
+        return self.group_rows([row async for row in self.get_rows(parent_ids)])
+
+
+class ValuesSerializer:
+    """
+    Serializes a queryset from ``.values()`` rows.
+
+    ``fields`` lists the output keys in serializer order; ``sources`` maps a
+    key to a different column (e.g. a foreign key to its ``_id`` attname);
+    ``children`` maps a key to a ``ValuesChild``.
+    """
+    model = None
+    fields = ()
+    sources = {}
+    children = {}
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    def get_columns(self):
+        return ['pk'] + [self.sources.get(name, name) for name in self.fields if name not in self.children]
+
+    def build(self, rows, groups=None):
+        rng = self.context.get('rng', random)
+        if groups is None:
+            parent_ids = [row['pk'] for row in rows]
+            groups = {name: child.group(parent_ids) for name, child in self.children.items()} if rows else {}
+
+        data = []
+        for row in rows:
+            item = {}
+            for name in self.fields:
+                if name in self.children:
+                    items = groups[name].get(row['pk'], [])
+                    if self.children[name].shuffle:
+                        rng.shuffle(items)
+                    item[name] = items
+                else:
+                    item[name] = row[self.sources.get(name, name)]
+            data.append(item)
+        return data
+
+    def serialize(self, queryset):
+        """
+        Returns the serialized rows of ``queryset`` in queryset order.
+        """
+        return self.build(list(queryset.prefetch_related(None).values(*self.get_columns())))
+
+    def get_id_rows(self, queryset, ids):
+        return queryset.prefetch_related(None).order_by().filter(pk__in=ids).values(*self.get_columns())
+
+    def serialize_ids(self, queryset, ids):
+        """
+        Returns the rows of ``queryset`` with the given primary keys, in ``ids`` order.
+        """
+        rows = {row['pk']: row for row in self.get_id_rows(queryset, ids)}
+        return self.build([rows[pk] for pk in ids if pk in rows])
+
+    async def aserialize_ids(self, queryset, ids):
+        """
+        Async version of ``serialize_ids()``.
+        """
+        rows = {row['pk']: row async for row in self.get_id_rows(queryset, ids)}
+        rows = [rows[pk] for pk in ids if pk in rows]
+        parent_ids = [row['pk'] for row in rows]
+        groups = {name: await child.agroup(parent_ids) for name, child in self.children.items()} if rows else {}
+        return self.build(rows, groups)
+
+
+class QuestionValuesSerializer(ValuesSerializer):
+    model = Question
+    fields = ('id', 'title', 'description', 'scripture', 'difficulty', 'options')
+    children = {
+        # QuestionOptionSerializer's list shuffles options with the context rng
+        'options': ValuesChild(QuestionOption, 'question', ('id', 'text', 'is_correct'), shuffle=True),
+    }
+
+
+class ScriptureSprintQuestionValuesSerializer(ValuesSerializer):
+    model = ScriptureSprintQuestion
+    fields = ('id', 'verse', 'description', 'pack_type', 'versions', 'game_type')
+    sources = {'game_type': 'game_type_id'}
+    children = {
+        'versions': ValuesChild(VerseVersion, 'verse', ('id', 'translation', 'text')),
+    }
+
+
+class FindTheBibleVerseQuestionValuesSerializer(ValuesSerializer):
+    model = FindTheBibleVerseQuestion
+    fields = ('id', 'reference', 'text', 'book', 'chapter', 'verse', 'options', 'correct_answer', 'game_type')
+    sources = {'game_type': 'game_type_id'}
+
+
+class BibleCharadesQuestionValuesSerializer(ValuesSerializer):
+    model = BibleCharadesQuestion
+    fields = (
+        'id', 'title', 'description', 'scripture', 'difficulty', 'image_url', 'options', 'correct_answer', 'game_type'
+    )
+    sources = {'game_type': 'game_type_id'}
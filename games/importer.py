@@ -0,0 +1,375 @@
+"""
+Streaming bulk import of questions and verse translations.
+
+Rows are read one at a time from CSV or JSONL, validated with the model
+fields' own ``clean()``, and written in batches with ``bulk_create``: rows
+with an ``id`` are upserted on the primary key, VerseVersions on their
+``(verse, translation)`` unique constraint. Memory use only depends on the
+batch size, never on the size of the input.
+
+``bulk_create`` skips model signals, so each batch does their work itself:
+reference keys, search entries, question options, pack snapshots, sampling
+pools and collection version stamps.
+"""
+import csv
+import json
+import sys
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+
+from core import versioning
+from .models import (
+    GameType, Question, QuestionOption, ScriptureSprintQuestion, VerseVersion, FindTheBibleVerseQuestion,
+    BibleCharadesQuestion, SearchEntry
+)
+from .packs import mark_stale
+from .references import instance_range
+from .sampling import SAMPLERS
+from .search import KINDS, document_for
+
+DEFAULT_BATCH_SIZE = 1000
+FORMATS = ('csv', 'jsonl')
+
+
+class RowError(Exception):
+    pass
+
+
+@contextmanager
+def _open(path):
+    if path == '-':
+        yield sys.stdin
+    else:
+        with open(path, newline='', encoding='utf-8') as handle:
+            yield handle
+
+def read_rows(path, format=None):
+    """
+    Yields ``(line_number, row)`` from a CSV file with a header or a JSONL file.
+    ``format`` defaults to the file extension.
+    """
+    format = format or path.rsplit('.', 1)[-1].lower()
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format {format!r}, expected one of {', '.join(FORMATS)}")
+    with _open(path) as handle:
+        if format == 'csv':
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield line_number, RowError(f"Invalid JSON: {error}")
+                continue
+            yield line_number, row if isinstance(row, dict) else RowError("Expected a JSON object")
+
+
+class ContentImporter:
+    """
+    Imports rows for one model.
+
+    ``fields`` are the model fields read from each row, ``json_fields`` the
+    ones given as JSON text in CSV files. Rows carrying an ``id`` update the
+    existing row with that primary key.
+    """
+    model = None
+    fields = ()
+    json_fields = ()
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.imported = 0
+        self.errors = []
+        self.explicit_ids = False
+        self.game_types = None
+        if 'game_type' in self.fields:
+            self.game_types = dict(GameType.objects.values_list('name', 'id'))
+
+    def clean_value(self, name, value):
+        field = self.model._meta.get_field(name)
+        if name in self.json_fields and isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise RowError(f"{name}: invalid JSON")
+        if value == '' and field.null:
+            value = None
+        try:
+            return field.clean(value, None)
+        except ValidationError as error:
+            raise RowError(f"{name}: {' '.join(error.messages)}")
+
+    def build(self, row):
+        """
+        Returns an unsaved instance for ``row``, or raises RowError.
+        """
+        values = {}
+        for name in self.fields:
+            if name == 'game_type':
+                game_type_id = self.game_types.get(row.get('game_type'))
+                if game_type_id is None:
+                    raise RowError(f"game_type: unknown game type {row.get('game_type')!r}")
+                values['game_type_id'] = game_type_id
+            else:
+                values[name] = self.clean_value(name, row.get(name))
+        if row.get('id') not in (None, ''):
+            values['id'] = self.clean_value('id', row['id'])
+        return self.model(**values)
+
+    def run(self, rows):
+        """
+        Imports ``(line_number, row)`` pairs and returns the number of rows written.
+        """
+        batch = []
+        for line_number, row in rows:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                batch.append((line_number, self.build(row)))
+            except RowError as error:
+                self.errors.append((line_number, str(error)))
+                continue
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        if self.explicit_ids:
+            # Rows inserted with an explicit id leave PostgreSQL's sequence behind
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [self.model]):
+                    cursor.execute(sql)
+        return self.imported
+
+    def flush(self, batch):
+        with transaction.atomic():
+            instances = self.save(batch)
+            self.after_save(instances)
+        self.invalidate(instances)
+        self.imported += len(instances)
+
+    def get_update_fields(self):
+        return [self.model._meta.get_field(name).attname for name in self.fields]
+
+    def save(self, batch):
+        instances = [instance for _, instance in batch]
+        for instance in instances:
+            instance.ref_start, instance.ref_end = instance_range(instance)
+        # The last row wins when one id appears twice in a batch
+        existing = list({instance.pk: instance for instance in instances if instance.pk is not None}.values())
+        new = [instance for instance in instances if instance.pk is None]
+        self.before_update(existing)
+        if existing:
+            self.explicit_ids = True
+            self.model.objects.bulk_create(
+                existing,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=self.get_update_fields() + ['ref_start', 'ref_end'],
+            )
+        if new:
+            self.model.objects.bulk_create(new)
+        return existing + new
+
+    def before_update(self, instances):
+        pass
+
+    def after_save(self, instances):
+        """
+        Does the work of the model's signal receivers for a saved batch.
+        """
+        if self.model not in KINDS:
+            return
+        SearchEntry.objects.bulk_create(
+            [
+                SearchEntry(kind=KINDS[self.model], object_id=instance.pk, **document_for(instance))
+                for instance in instances
+            ],
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['translation', 'title', 'body'],
+        )
+
+    def invalidate(self, instances):
+        SAMPLERS[self.model].invalidate()
+        versioning.bump(self.model._meta.label_lower)
+
+
+class QuestionImporter(ContentImporter):
+    """
+    ``options`` is a list of ``{"text": ..., "is_correct": ...}``; it replaces
+    the options of an updated question.
+    """
+    model = Question
+    fields = ('game_type', 'title', 'description', 'scripture', 'difficulty')
+
+    def build(self, row):
+        instance = super().build(row)
+        options = row.get('options') or []
+        if isinstance(options, str):
+            try:
+                options = json.loads(options)
+            except ValueError:
+                raise RowError("options: invalid JSON")
+        if not isinstance(options, list) or not all(isinstance(option, dict) for option in options):
+            raise RowError("options: expected a list of objects")
+        text_field = QuestionOption._meta.get_field('text')
+        try:
+            instance._import_options = [
+                QuestionOption(text=text_field.clean(option.get('text'), None), is_correct=bool(option.get('is_correct')))
+                for option in options
+            ]
+        except ValidationError as error:
+            raise RowError(f"options: {' '.join(error.messages)}")
+        return instance
+
+    def get_update_fields(self):
+        return super().get_update_fields() + ['updated_at']
+
+    def save(self, batch):
+        instances = super().save(batch)
+        QuestionOption.objects.filter(question__in=[instance.pk for instance in instances]).delete()
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question_id=instance.pk, text=option.text, is_correct=option.is_correct)
+            for instance in instances
+            for option in instance._import_options
+        ])
+        return instances
+
+    def invalidate(self, instances):
+        super().invalidate(instances)
+        versioning.bump(QuestionOption._meta.label_lower)
+
+
+class ScriptureSprintQuestionImporter(ContentImporter):
+    model = ScriptureSprintQuestion
+    fields = ('game_type', 'verse', 'description', 'pack_type')
+
+    def before_update(self, instances):
+        # Packs the updated questions move out of go stale too
+        self.previous_packs = set(
+            ScriptureSprintQuestion.objects.filter(pk__in=[instance.pk for instance in instances])
+            .values_list('pack_type', flat=True)
+        )
+
+    def after_save(self, instances):
+        # Verse search entries are titled with their question's verse
+        ids = [instance.pk for instance in instances]
+        SearchEntry.objects.filter(
+            kind='verse', object_id__in=VerseVersion.objects.filter(verse__in=ids).values('id')
+        ).update(title=Subquery(VerseVersion.objects.filter(pk=OuterRef('object_id')).values('verse__verse')[:1]))
+        mark_stale(*self.previous_packs, *{instance.pack_type for instance in instances})
+
+
+class FindTheBibleVerseQuestionImporter(ContentImporter):
+    model = FindTheBibleVerseQuestion
+    fields = ('game_type', 'reference', 'text', 'book', 'chapter', 'verse', 'options', 'correct_answer')
+    json_fields = ('options',)
+
+
+class BibleCharadesQuestionImporter(ContentImporter):
+    model = BibleCharadesQuestion
+    fields = (
+        'game_type', 'title', 'description', 'scripture', 'difficulty', 'image_url', 'options', 'correct_answer'
+    )
+    json_fields = ('options',)
+
+
+class VerseVersionImporter(ContentImporter):
+    """
+    Upserts translations on ``(verse, translation)``. A row names its verse
+    by ``verse_id``, or by ``verse`` text, which applies the translation to
+    every Scripture Sprint question with that verse.
+    """
+    model = VerseVersion
+    fields = ('translation', 'text')
+
+    def build(self, row):
+        instance = super().build(row)
+        instance.pk = None  # Translations are matched on (verse, translation), not id
+        if row.get('verse_id') not in (None, ''):
+            try:
+                instance.verse_id = int(row['verse_id'])
+            except (TypeError, ValueError):
+                raise RowError("verse_id: expected an integer")
+            instance._import_verse = None
+        elif row.get('verse'):
+            instance._import_verse = row['verse']
+        else:
+            raise RowError("verse_id or verse is required")
+        return instance
+
+    def resolve(self, batch):
+        """
+        Returns one instance per (verse id, translation), with ``verse`` set to
+        a question carrying the verse text and pack type.
+        """
+        instances = [instance for _, instance in batch]
+        verses = {instance._import_verse for instance in instances if instance._import_verse}
+        verse_ids = {instance.verse_id for instance in instances if not instance._import_verse}
+        questions = ScriptureSprintQuestion.objects.filter(verse__in=verses) | \
+            ScriptureSprintQuestion.objects.filter(pk__in=verse_ids)
+        by_id = {question.pk: question for question in questions.only('id', 'verse', 'pack_type')}
+        by_verse = {}
+        for question in by_id.values():
+            by_verse.setdefault(question.verse, []).append(question)
+
+        resolved = {}
+        for line_number, instance in batch:
+            if instance._import_verse:
+                targets = by_verse.get(instance._import_verse, [])
+            else:
+                targets = [by_id[instance.verse_id]] if instance.verse_id in by_id else []
+            if not targets:
+                self.errors.append((line_number, "verse: no Scripture Sprint question matches"))
+            for question in targets:
+                resolved[question.pk, instance.translation] = VerseVersion(
+                    verse=question, translation=instance.translation, text=instance.text
+                )
+        return list(resolved.values())
+
+    def save(self, batch):
+        instances = self.resolve(batch)
+        VerseVersion.objects.bulk_create(
+            instances,
+            update_conflicts=True,
+            unique_fields=['verse', 'translation'],
+            update_fields=['text'],
+        )
+        missing = [instance for instance in instances if instance.pk is None]
+        if missing:
+            # Backends that cannot return the ids of upserted rows
+            ids = {
+                (verse_id, translation): pk
+                for pk, verse_id, translation in VerseVersion.objects.filter(
+                    verse__in={instance.verse_id for instance in missing},
+                    translation__in={instance.translation for instance in missing},
+                ).values_list('id', 'verse_id', 'translation')
+            }
+            for instance in missing:
+                instance.pk = ids[instance.verse_id, instance.translation]
+        return instances
+
+    def after_save(self, instances):
+        super().after_save(instances)
+        mark_stale(*{instance.verse.pack_type for instance in instances})
+
+    def invalidate(self, instances):
+        versioning.bump(VerseVersion._meta.label_lower)
+
+
+IMPORTERS = {
+    'question': QuestionImporter,
+    'scripture_sprint': ScriptureSprintQuestionImporter,
+    'find_the_bible_verse': FindTheBibleVerseQuestionImporter,
+    'bible_charades': BibleCharadesQuestionImporter,
+    'verse_version': VerseVersionImporter,
+}
@@ -0,0 +1,23 @@
+from django.db import transaction
+
+from core.jobs import enqueue_debounced, job
+from .achievements import DEFAULT_BATCH_SIZE, consume_events
+
+# Plays recorded within this many seconds are evaluated by one job
+EVALUATE_DELAY = 10
+
+
+@job(max_attempts=3)
+def evaluate_achievements(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Drains the achievement event stream (see games.achievements).
+    """
+    while consume_events(batch_size)[0]:
+        pass
+
+def schedule_achievements():
+    """
+    Queues ``evaluate_achievements`` once the current transaction commits.
+    """
+    # The play is saved either way; a job missed here is covered by the next one
+    transaction.on_commit(lambda: enqueue_debounced(evaluate_achievements, EVALUATE_DELAY), robust=True)
@@ -0,0 +1,242 @@
+"""
+Incrementally maintained leaderboard totals.
+
+Every Score create, update or delete is turned into a points delta that is
+applied with an atomic ``F()`` update to the per-(user, game_type) and
+per-user total rows, so the leaderboard never has to aggregate Score.
+
+The same delta goes to the ``ScorePeriodTotal`` rows of the day, week
+(starting Monday) and month the score falls in, in the current time zone.
+Only open periods are written: once a period has ended its totals are
+frozen, even when an old score is later changed or deleted, so its board
+is computed once and cached until the next ``rebuild_totals``.
+"""
+import datetime
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import DateField, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from core import versioning
+from core.ranking import get_rank_backend
+from users.ranking import game_board
+from .models import GameType, Score, ScoreTotal, UserScoreTotal, ScorePeriodTotal
+from .stats import rebuild_stats
+
+PERIODS = [period for period, _ in ScorePeriodTotal.PERIOD_CHOICES]
+PERIOD_TRUNCS = {
+    'day': TruncDate('timestamp'),
+    'week': TruncWeek('timestamp', output_field=DateField()),
+    'month': TruncMonth('timestamp', output_field=DateField()),
+}
+FROZEN_BOARD_TIMEOUT = None  # Closed periods never change
+FROZEN_BOARD_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+PERIOD_TOTALS_LABEL = ScorePeriodTotal._meta.label_lower
+
+
+def _apply(queryset, delta, create_kwargs, create_missing):
+    """
+    Returns True when a total row was changed or created.
+    """
+    if queryset.update(points=F('points') + delta):
+        return True
+    if not create_missing:
+        return False
+    try:
+        with transaction.atomic():
+            queryset.model.objects.create(points=delta, **create_kwargs)
+    except IntegrityError:
+        # Another request created the row first
+        queryset.update(points=F('points') + delta)
+    return True
+
+def period_start(period, day):
+    """
+    Returns the first day of the ``period`` containing ``day``.
+    """
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def period_end(period, start):
+    """
+    Returns the first day after the ``period`` starting on ``start``.
+    """
+    if period == 'day':
+        return start + datetime.timedelta(days=1)
+    if period == 'week':
+        return start + datetime.timedelta(days=7)
+    return (start + datetime.timedelta(days=32)).replace(day=1)
+
+def is_frozen(period, start, today=None):
+    return period_end(period, start) <= (today or timezone.localdate())
+
+def _apply_periods(user_id, game_type_id, timestamp, delta, create_missing):
+    day = timezone.localdate(timestamp)
+    today = timezone.localdate()
+    starts = {period: period_start(period, day) for period in PERIODS}
+    starts = {period: start for period, start in starts.items() if not is_frozen(period, start, today)}
+    if not starts:
+        return
+    totals = ScorePeriodTotal.objects.filter(user_id=user_id, game_type_id=game_type_id)
+    buckets = Q()
+    for period, start in starts.items():
+        buckets |= Q(period=period, start=start)
+    # One update covers every open period; rows are only missing on a user's first score of a period
+    updated = totals.filter(buckets).update(points=F('points') + delta)
+    if updated == len(starts) or not create_missing:
+        return
+    existing = set(totals.filter(buckets).values_list('period', flat=True)) if updated else set()
+    missing = {period: start for period, start in starts.items() if period not in existing}
+    try:
+        with transaction.atomic():
+            ScorePeriodTotal.objects.bulk_create([
+                ScorePeriodTotal(user_id=user_id, game_type_id=game_type_id, period=period, start=start, points=delta)
+                for period, start in missing.items()
+            ])
+    except IntegrityError:
+        # Another request created some of them first
+        for period, start in missing.items():
+            _apply(
+                totals.filter(period=period, start=start),
+                delta,
+                {'user_id': user_id, 'game_type_id': game_type_id, 'period': period, 'start': start},
+                create_missing,
+            )
+
+def apply_score_delta(user_id, game_type_id, delta, create_missing=True, timestamp=None):
+    """
+    Adds ``delta`` points to the totals of a user for a game type, and to
+    the open period totals containing ``timestamp`` when it is given.
+    Deletes pass ``create_missing=False`` so a delete cascading from a removed
+    user or game type never tries to recreate their totals.
+    """
+    if not delta:
+        return
+    with transaction.atomic():
+        if timestamp is not None:
+            _apply_periods(user_id, game_type_id, timestamp, delta, create_missing)
+        applied = _apply(
+            ScoreTotal.objects.filter(user_id=user_id, game_type_id=game_type_id),
+            delta,
+            {'user_id': user_id, 'game_type_id': game_type_id},
+            create_missing,
+        )
+        _apply(
+            UserScoreTotal.objects.filter(user_id=user_id),
+            delta,
+            {'user_id': user_id},
+            create_missing,
+        )
+        if applied:
+            transaction.on_commit(lambda: get_rank_backend().increment(game_board(game_type_id), user_id, delta))
+
+def rebuild_totals(batch_size=1000):
+    """
+    Recomputes every total, and the play statistics, from the Score table. Used for repairs.
+    """
+    with transaction.atomic():
+        ScoreTotal.objects.all().delete()
+        UserScoreTotal.objects.all().delete()
+        ScorePeriodTotal.objects.all().delete()
+
+        per_game = Score.objects.order_by().values('user_id', 'game_type_id').annotate(total=Sum('points'))
+        ScoreTotal.objects.bulk_create(
+            (ScoreTotal(user_id=row['user_id'], game_type_id=row['game_type_id'], points=row['total'])
+             for row in per_game.iterator()),
+            batch_size=batch_size,
+        )
+
+        per_user = Score.objects.order_by().values('user_id').annotate(total=Sum('points'))
+        UserScoreTotal.objects.bulk_create(
+            (UserScoreTotal(user_id=row['user_id'], points=row['total']) for row in per_user.iterator()),
+            batch_size=batch_size,
+        )
+
+        for period, trunc in PERIOD_TRUNCS.items():
+            per_period = (
+                Score.objects.order_by().annotate(start=trunc)
+                .values('user_id', 'game_type_id', 'start').annotate(total=Sum('points'))
+            )
+            ScorePeriodTotal.objects.bulk_create(
+                (ScorePeriodTotal(
+                    user_id=row['user_id'], game_type_id=row['game_type_id'], period=period, start=row['start'],
+                    points=row['total'],
+                ) for row in per_period.iterator()),
+                batch_size=batch_size,
+            )
+
+    rebuild_stats(batch_size=batch_size)
+
+    # Frozen boards were cached from the old totals
+    versioning.bump(PERIOD_TOTALS_LABEL)
+    backend = get_rank_backend()
+    for game_type_id in GameType.objects.values_list('id', flat=True):
+        backend.unload(game_board(game_type_id))
+
+
+def total_board_queryset(game_type=''):
+    """
+    All-time totals of one game type, or across all of them without ``game_type``.
+    """
+    if game_type:
+        queryset = ScoreTotal.objects.filter(game_type__name=game_type)
+    else:
+        queryset = UserScoreTotal.objects.all()
+    return queryset.order_by('-points').values('user__username', total_score=F('points'))
+
+def period_board_queryset(game_type, period, start):
+    return (
+        ScorePeriodTotal.objects.filter(game_type__name=game_type, period=period, start=start)
+        .order_by('-points', 'user_id')
+        .values('user__username', total_score=F('points'))
+    )
+
+def _period_board(game_type, period, start, leaders):
+    return {
+        'game_type': game_type,
+        'period': period,
+        'start': start.isoformat(),
+        'end': period_end(period, start).isoformat(),
+        'frozen': is_frozen(period, start),
+        'leaders': leaders,
+    }
+
+def _frozen_board_key(stamps, game_type, period, start, limit):
+    token, _ = stamps[PERIOD_TOTALS_LABEL]
+    return f"period-leaderboard:{token}:{period}:{start.isoformat()}:{limit}:{game_type}"
+
+def get_period_board(game_type, period, day, limit):
+    """
+    Returns the top ``limit`` users of ``game_type`` in the ``period`` containing ``day``.
+    Boards of closed periods come from the cache.
+    """
+    start = period_start(period, day)
+    if not is_frozen(period, start):
+        return _period_board(game_type, period, start, list(period_board_queryset(game_type, period, start)[:limit]))
+    key = _frozen_board_key(versioning.get_stamps([PERIOD_TOTALS_LABEL]), game_type, period, start, limit)
+    board = cache.get(key)
+    if board is None:
+        board = _period_board(game_type, period, start, list(period_board_queryset(game_type, period, start)[:limit]))
+        cache.set(key, board, timeout=FROZEN_BOARD_TIMEOUT)
+    return board
+
+async def aget_period_board(game_type, period, day, limit):
+    """
+    Async version of ``get_period_board``.
+    """
+    start = period_start(period, day)
+    if not is_frozen(period, start):
+        leaders = [row async for row in period_board_queryset(game_type, period, start)[:limit]]
+        return _period_board(game_type, period, start, leaders)
+    key = _frozen_board_key(await versioning.aget_stamps([PERIOD_TOTALS_LABEL]), game_type, period, start, limit)
+    board = await cache.aget(key)
+    if board is None:
+        leaders = [row async for row in period_board_queryset(game_type, period, start)[:limit]]
+        board = _period_board(game_type, period, start, leaders)
+        await cache.aset(key, board, timeout=FROZEN_BOARD_TIMEOUT)
+    return board
@@ -0,0 +1,131 @@
+import json
+import platform
+
+import django
+import rest_framework
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.ranking import get_rank_backend
+from games.benchmarks import build_endpoints, create_fixtures, run_endpoint
+from games.leaderboard import rebuild_totals
+from games.sampling import SAMPLERS
+from games.seeding import seed_dataset
+from users.ranking import POINTS_BOARD, game_board
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every games and users endpoint in-process against a seeded dataset and "
+        "writes latency percentiles, query counts and allocations to a JSON file. "
+        "The dataset is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--scores', type=int, default=100000)
+        parser.add_argument('--questions', type=int, default=5000)
+        parser.add_argument('--sessions', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--alloc-iterations', type=int, default=5, help="Requests traced with tracemalloc")
+        parser.add_argument('--only', action='append', default=[], help="Run endpoints whose name contains this")
+        parser.add_argument('--output', default='benchmark-results.json')
+        parser.add_argument('--compare', help="Earlier results file to compare against")
+        parser.add_argument('--server-timing', action='store_true', help="Keep Server-Timing sampling on")
+
+    def get_metadata(self, options):
+        return {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'djangorestframework': rest_framework.VERSION,
+            'database': connection.vendor,
+            'dataset': {name: options[name] for name in ('users', 'scores', 'questions', 'sessions')},
+            'iterations': options['iterations'],
+        }
+
+    def run(self, options):
+        game_types = seed_dataset(
+            users=options['users'],
+            scores=options['scores'],
+            questions=options['questions'],
+            sessions=options['sessions'],
+            stdout=self.stdout,
+        )
+        fixtures = create_fixtures(game_types)
+        rebuild_totals()
+        self.boards = [POINTS_BOARD] + [game_board(game_type.pk) for game_type in game_types]
+
+        client = APIClient()
+        results = {}
+        for endpoint in build_endpoints(fixtures):
+            if options['only'] and not any(part in endpoint.name for part in options['only']):
+                continue
+            result = run_endpoint(
+                client, endpoint, fixtures,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                alloc_iterations=options['alloc_iterations'],
+            )
+            results[endpoint.name] = result
+            unexpected = set(result['statuses']) - {str(endpoint.status)}
+            style = self.style.WARNING if unexpected else (lambda text: text)
+            self.stdout.write(style(
+                f"{endpoint.name:34} p50 {result['latency_ms']['p50']:9.2f} ms  p99 {result['latency_ms']['p99']:9.2f} ms  "
+                f"{result['queries']['max']:4} queries  {result['allocations_kib']['peak']:9.1f} KiB  "
+                f"{','.join(result['statuses'])}"
+            ))
+        return results
+
+    def compare(self, path, results):
+        try:
+            with open(path) as handle:
+                previous = json.load(handle)['endpoints']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+
+        self.stdout.write(f"\nCompared with {path}:")
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            before, after = previous[name], result
+            ratio = after['latency_ms']['p50'] / before['latency_ms']['p50'] if before['latency_ms']['p50'] else 0
+            query_delta = after['queries']['max'] - before['queries']['max']
+            style = self.style.ERROR if query_delta > 0 or ratio > 1.2 else (lambda text: text)
+            self.stdout.write(style(f"{name:34} p50 x{ratio:5.2f}  queries {query_delta:+d}"))
+
+    def handle(self, *args, **options):
+        setup_test_environment()  # locmem email and the test client's host
+        self.boards = []
+        server_timing = getattr(settings, 'SERVER_TIMING', {})
+        if not options['server_timing']:
+            server_timing = {**server_timing, 'SAMPLE_RATE': 0, 'SLOW_MS': None}
+        try:
+            with override_settings(SERVER_TIMING=server_timing), transaction.atomic():
+                results = self.run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            teardown_test_environment()
+            # Cached pools and rank boards refer to rolled back rows
+            for sampler in SAMPLERS.values():
+                sampler.invalidate()
+            for board in self.boards:
+                get_rank_backend().unload(board)
+
+        with open(options['output'], 'w') as handle:
+            json.dump({'meta': self.get_metadata(options), 'endpoints': results}, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} endpoint results to {options['output']}"))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
@@ -0,0 +1,85 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from games.models import Question, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion
+from games.seeding import seed_dataset
+from games.views import (
+    QuestionViewSet, ScriptureSprintQuestionViewSet, FindTheBibleVerseQuestionViewSet, BibleCharadesQuestionViewSet
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the ModelSerializer and values-based list serialization of the question "
+        "endpoints on a seeded dataset. Fails if the rendered JSON differs. The dataset is rolled back."
+    )
+
+    def get_cases(self):
+        # (viewset, queryset the ModelSerializer path reads from)
+        return [
+            (QuestionViewSet, Question.objects.prefetch_related('options')),
+            (ScriptureSprintQuestionViewSet, ScriptureSprintQuestion.objects.prefetch_related('versions')),
+            (FindTheBibleVerseQuestionViewSet, FindTheBibleVerseQuestion.objects.all()),
+            (BibleCharadesQuestionViewSet, BibleCharadesQuestion.objects.all()),
+        ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=4000)
+        parser.add_argument('--limit', type=int, default=200, help="Rows per simulated list request")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def model_path(self, viewset, queryset, ids, seed):
+        serializer_class = viewset.serializer_class
+        instances = queryset.order_by().in_bulk(ids)
+        rows = [instances[pk] for pk in ids if pk in instances]
+        return JSONRenderer().render(serializer_class(rows, many=True, context={'rng': random.Random(seed)}).data)
+
+    def values_path(self, viewset, queryset, ids, seed):
+        serializer = viewset.values_serializer_class(context={'rng': random.Random(seed)})
+        return JSONRenderer().render(serializer.serialize_ids(queryset, ids))
+
+    def time(self, function, repeat):
+        timings = []
+        for seed in range(repeat):
+            started = time.perf_counter()
+            function(seed)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def benchmark(self, viewset, queryset, options):
+        ids = viewset.sampler.sample_ids(limit=options['limit'], rng=random.Random(0))
+
+        for seed in range(3):
+            if self.model_path(viewset, queryset, ids, seed) != self.values_path(viewset, queryset, ids, seed):
+                raise CommandError(f"{viewset.__name__}: values serializer output differs")
+
+        model_ms = self.time(lambda seed: self.model_path(viewset, queryset, ids, seed), options['repeat'])
+        values_ms = self.time(lambda seed: self.values_path(viewset, queryset, ids, seed), options['repeat'])
+        self.stdout.write(
+            f"{viewset.__name__:36} {len(ids):5} rows  model {model_ms:8.2f} ms  "
+            f"values {values_ms:8.2f} ms  x{model_ms / values_ms:5.1f}"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                seed_dataset(users=10, scores=0, questions=options['questions'], sessions=0, stdout=self.stdout)
+                for viewset, queryset in self.get_cases():
+                    viewset.sampler.invalidate()
+                    self.benchmark(viewset, queryset, options)
+                raise Rollback()
+        except Rollback:
+            pass
+        # The cached ID pools point at rolled back rows
+        for viewset, _ in self.get_cases():
+            viewset.sampler.invalidate()
+        self.stdout.write(self.style.SUCCESS("Values serializers match the model serializers"))
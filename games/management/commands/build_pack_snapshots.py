@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from games.models import ScriptureSprintQuestion
+from games.packs import build_snapshot
+
+
+class Command(BaseCommand):
+    help = "Builds the compressed snapshot of every Scripture Sprint question pack"
+
+    def add_arguments(self, parser):
+        parser.add_argument('pack_types', nargs='*', help="Packs to build (defaults to all)")
+
+    def handle(self, *args, **options):
+        pack_types = options['pack_types'] or (
+            ScriptureSprintQuestion.objects.order_by('pack_type').values_list('pack_type', flat=True).distinct()
+        )
+        for pack_type in pack_types:
+            snapshot = build_snapshot(pack_type)
+            if snapshot is None:
+                self.stdout.write(f"{pack_type}: no questions, snapshot removed")
+                continue
+            self.stdout.write(
+                f"{snapshot.pack_type}: v{snapshot.version} {snapshot.question_count} questions, "
+                f"{snapshot.size} bytes -> {len(snapshot.content)} compressed"
+            )
+        self.stdout.write(self.style.SUCCESS("Pack snapshots built"))
@@ -0,0 +1,102 @@
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+from core.queries import REPEAT_THRESHOLD, QueryRecorder, get_query_budget
+from core.ranking import get_rank_backend
+from games.benchmarks import build_endpoints, call, create_fixtures, prepare_request
+from games.leaderboard import rebuild_totals
+from games.sampling import SAMPLERS
+from games.seeding import seed_dataset
+from users.ranking import POINTS_BOARD, game_board
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests every games and users endpoint once against a seeded dataset and fails if an "
+        "action runs more queries than the query_budgets declared on its view, or repeats one "
+        "query shape (an N+1). The dataset is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--scores', type=int, default=2000)
+        parser.add_argument('--questions', type=int, default=200)
+        parser.add_argument('--sessions', type=int, default=100)
+        parser.add_argument('--repeat-threshold', type=int, default=REPEAT_THRESHOLD)
+        parser.add_argument('--only', action='append', default=[], help="Check endpoints whose name contains this")
+
+    def get_budget(self, endpoint):
+        match = resolve(urlsplit(endpoint.path).path)
+        actions = getattr(match.func, 'actions', None) or {}
+        # Async read views are plain functions carrying their own query_budgets
+        view_class = getattr(match.func, 'cls', match.func)
+        return view_class, get_query_budget(view_class, actions.get(endpoint.method), endpoint.method)
+
+    def check_endpoint(self, client, endpoint, fixtures, threshold):
+        view_class, budget = self.get_budget(endpoint)
+        if not endpoint.is_write:
+            # Budgets are for the steady state, after caches and snapshots are warm
+            call(prepare_request(client, endpoint, fixtures), endpoint)
+        send = prepare_request(client, endpoint, fixtures)
+        with QueryRecorder() as recorder:
+            call(send, endpoint)
+
+        problems = []
+        if budget is None:
+            problems.append(f"{view_class.__name__} declares no query budget for this action")
+        elif recorder.count > budget:
+            problems.append(f"{recorder.count} queries, budget is {budget}")
+        for shape, count in recorder.repeated(threshold):
+            problems.append(f"repeated {count}x: {shape[:160]}")
+
+        label = f"{recorder.count}/{budget if budget is not None else '-'}"
+        style = self.style.ERROR if problems else self.style.SUCCESS
+        self.stdout.write(style(f"{'FAIL' if problems else 'ok':5} {endpoint.name:34} {label}"))
+        for problem in problems:
+            self.stdout.write(f"      {problem}")
+        return problems
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        failures = []
+        boards = []
+        try:
+            with override_settings(SERVER_TIMING={'SAMPLE_RATE': 0, 'SLOW_MS': None}), transaction.atomic():
+                game_types = seed_dataset(
+                    users=options['users'],
+                    scores=options['scores'],
+                    questions=options['questions'],
+                    sessions=options['sessions'],
+                )
+                fixtures = create_fixtures(game_types)
+                rebuild_totals()
+                boards = [POINTS_BOARD] + [game_board(game_type.pk) for game_type in game_types]
+
+                client = APIClient()
+                for endpoint in build_endpoints(fixtures):
+                    if options['only'] and not any(part in endpoint.name for part in options['only']):
+                        continue
+                    if self.check_endpoint(client, endpoint, fixtures, options['repeat_threshold']):
+                        failures.append(endpoint.name)
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            teardown_test_environment()
+            for sampler in SAMPLERS.values():
+                sampler.invalidate()
+            for board in boards:
+                get_rank_backend().unload(board)
+
+        if failures:
+            raise CommandError(f"Query budget check failed for: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All endpoints are within their query budgets"))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from games.achievements import DEFAULT_BATCH_SIZE, consume_events, evaluate_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Unlocks achievements for the users of the scores and session scores written since the "
+        "last run. Recorded plays queue the same work as a run_jobs job, so this is for catching "
+        "up by hand; --all evaluates every user with plays instead, e.g. after adding a rule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Events or users per batch")
+        parser.add_argument('--all', action='store_true', help="Evaluate every user with plays")
+        parser.add_argument('--follow', action='store_true', help="Keep polling for new events")
+        parser.add_argument('--interval', type=float, default=10.0, help="Seconds between polls with --follow")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            unlocks = sum(len(batch) for batch in evaluate_all(options['batch_size']))
+            self.stdout.write(self.style.SUCCESS(f"Unlocked {unlocks} achievements"))
+            return
+
+        while True:
+            total_events = total_unlocks = 0
+            while True:
+                events, unlocks = consume_events(options['batch_size'])
+                if not events:
+                    break
+                total_events += events
+                total_unlocks += len(unlocks)
+            if total_events or not options['follow']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Consumed {total_events} events and unlocked {total_unlocks} achievements"
+                ))
+            if not options['follow']:
+                return
+            time.sleep(options['interval'])
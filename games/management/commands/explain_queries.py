@@ -0,0 +1,175 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.pagination import KeysetPagination
+from games.leaderboard import period_board_queryset, period_start, rebuild_totals, total_board_queryset
+from games.models import Score, SessionScore
+from games.packs import pack_questions
+from games.references import overlapping, parse_reference
+from games.sampling import question_sampler
+from games.seeding import seed_dataset
+from games.views import GameSessionViewSet, ReferenceSearchView, ScoreViewSet
+from users.models import Achievement, User
+from users.views import UserViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+class PageCapture(KeysetPagination):
+    """
+    Records the page queryset a view builds instead of running it.
+    """
+    queryset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.queryset = self.get_page_queryset(queryset, request, view)
+        self.next_position = None
+        return []
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the queries behind each endpoint against a seeded dataset and "
+        "fails if any of them falls back to a sequential scan, or if a cursor page walks its "
+        "index from the start instead of seeking to the cursor. The dataset is rolled back."
+    )
+    page_size = 3  # Small, so even light players have a second page
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--scores', type=int, default=20000)
+        parser.add_argument('--questions', type=int, default=2000)
+        parser.add_argument('--sessions', type=int, default=2000)
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan")
+
+    def page_queryset(self, viewset, action, user, page=1, **kwargs):
+        """
+        Runs ``action`` of ``viewset`` as ``user`` and returns the queryset it
+        paginates for ``page``, following the real cursors of the pages before it.
+        """
+        params = {'page_size': self.page_size}
+        for number in range(1, page + 1):
+            request = APIRequestFactory().get('/', params)
+            force_authenticate(request, user=user)
+            view = viewset(action_map={'get': action}, args=(), kwargs=kwargs, format_kwarg=None)
+            view.request = view.initialize_request(request)
+            view._paginator = capture = PageCapture()
+            getattr(view, action)(view.request, **kwargs)
+            if number < page:
+                capture.get_page(list(capture.queryset))
+                if not capture.has_next:
+                    raise CommandError(f"{viewset.__name__}.{action} has no page {number + 1} to explain")
+                params[capture.cursor_query_param] = capture.get_next_cursor()
+        return capture.queryset
+
+    def get_queries(self):
+        """
+        Builds each endpoint's queries the way its view does.
+        """
+        # The most active players have the deepest lists
+        player = User.objects.get(pk=Score.objects.values('user').annotate(n=Count('id')).order_by('-n')[0]['user'])
+        session_player = User.objects.get(
+            pk=SessionScore.objects.values('user').annotate(n=Count('id')).order_by('-n')[0]['user']
+        )
+        Achievement.objects.bulk_create([
+            Achievement(user=player, title=f'Achievement {index}', description='Seeded for EXPLAIN')
+            for index in range(self.page_size * 3)
+        ])
+        today = timezone.localdate()
+        queries = {
+            'users.list': self.page_queryset(UserViewSet, 'list', player),
+            'users.list_page_2': self.page_queryset(UserViewSet, 'list', player, page=2),
+            'users.achievements': self.page_queryset(UserViewSet, 'achievements', player, pk=str(player.pk)),
+            'users.achievements_page_2': self.page_queryset(
+                UserViewSet, 'achievements', player, page=2, pk=str(player.pk)
+            ),
+            'scores.list': self.page_queryset(ScoreViewSet, 'list', player),
+            'scores.list_page_2': self.page_queryset(ScoreViewSet, 'list', player, page=2),
+            'scores.leaderboard': total_board_queryset()[:10],
+            'scores.leaderboard_by_game': total_board_queryset('trivia')[:10],
+            'scores.leaderboard_week': period_board_queryset('trivia', 'week', period_start('week', today))[:10],
+            'sessions.list': self.page_queryset(GameSessionViewSet, 'list', session_player),
+            'sessions.list_page_2': self.page_queryset(GameSessionViewSet, 'list', session_player, page=2),
+            'questions.pool': question_sampler._pool_queryset({'game_type': 'trivia', 'difficulty': 'easy'}),
+            'questions.pool_by_difficulty': question_sampler._pool_queryset({'difficulty': 'hard'}),
+            'scripture_sprint.pack': pack_questions('psalms'),
+        }
+        start, end = parse_reference('John 3')
+        for kind, (queryset, _) in ReferenceSearchView.sources.items():
+            queries[f'references.{kind}'] = overlapping(queryset, start, end)[:20]
+        return queries
+
+    def is_sequential_scan(self, plan):
+        if connection.vendor == 'postgresql':
+            return 'Seq Scan' in plan
+        if connection.vendor == 'sqlite':
+            # Each line is "<id> <parent> <unused> <detail>"; "SCAN t" without an index is a full scan
+            details = [line.split(' ', 3)[-1] for line in plan.splitlines()]
+            return any(
+                detail.startswith('SCAN ') and 'USING' not in detail and 'CONSTANT ROW' not in detail
+                for detail in details
+            )
+        return 'ALL' in plan.split()
+
+    def seeks_to_cursor(self, queryset, plan):
+        """
+        Whether a cursor page enters its index at a bound on the first
+        ordering column, rather than reading it from the start.
+        """
+        field = queryset.query.order_by[0].lstrip('-')
+        column = re.escape(queryset.model._meta.get_field(field).column)
+        if connection.vendor == 'postgresql':
+            return re.search(rf'Index Cond: .*\b{column} [<>]', plan) is not None
+        if connection.vendor == 'sqlite':
+            return 'MULTI-INDEX OR' not in plan and any(
+                line.split(' ', 3)[-1].startswith('SEARCH ') and re.search(rf'\b{column}[<>]', line)
+                for line in plan.splitlines()
+            )
+        return 'range' in plan.split()
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                seed_dataset(
+                    users=options['users'],
+                    scores=options['scores'],
+                    questions=options['questions'],
+                    sessions=options['sessions'],
+                    stdout=self.stdout,
+                )
+                rebuild_totals()
+                self.analyze()
+
+                for name, queryset in self.get_queries().items():
+                    plan = queryset.explain()
+                    if self.is_sequential_scan(plan):
+                        problem = 'SEQ SCAN'
+                    elif name.endswith('_page_2') and not self.seeks_to_cursor(queryset, plan):
+                        problem = 'NO SEEK'
+                    else:
+                        problem = None
+                    style = self.style.ERROR if problem else self.style.SUCCESS
+                    self.stdout.write(style(f"{problem or 'ok':8} {name}"))
+                    if problem or options['verbose_plans']:
+                        self.stdout.write('    ' + plan.replace('\n', '\n    '))
+                    if problem:
+                        failures.append(name)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"Full scans in: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("No full scans found"))
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from games.exports import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS
+from games.serializers import ExportQuerySerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams every Score, SessionScore or GameSession matching the filters to a CSV or JSONL "
+        "file in constant memory. Dates are ISO 8601; since is inclusive, until exclusive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--since')
+        parser.add_argument('--until')
+        parser.add_argument('--game-type')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--output', default='-', help="Output file, or - for standard output")
+
+    def handle(self, *args, **options):
+        # Same validation as the export endpoint
+        serializer = ExportQuerySerializer(data={
+            key: value for key, value in {
+                'output': options['format'],
+                'since': options['since'],
+                'until': options['until'],
+                'game_type': options['game_type'],
+            }.items() if value is not None
+        })
+        if not serializer.is_valid():
+            raise CommandError(f"Invalid export: {serializer.errors}")
+
+        params = serializer.validated_data
+        export = EXPORTS[options['kind']]
+        queryset = export.get_queryset(params.get('since'), params.get('until'), params.get('game_type'))
+        chunks = export.stream(queryset, params['output'], chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['kind']} to {options['output']}"))
@@ -0,0 +1,38 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from games.importer import DEFAULT_BATCH_SIZE, FORMATS, IMPORTERS, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams questions or verse translations from a CSV (with a header) or JSONL file into the "
+        "database in batches. Rows with an id update that row; translations are upserted on "
+        "(verse, translation). Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(IMPORTERS), help="What the file contains")
+        parser.add_argument('path', help="Input file, or - for standard input")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=20, help="Invalid rows to list in the output")
+
+    def handle(self, *args, **options):
+        format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if format not in FORMATS:
+            raise CommandError("Pass --format when the file extension is not .csv or .jsonl")
+        importer = IMPORTERS[options['model']](batch_size=options['batch_size'])
+        try:
+            imported = importer.run(read_rows(options['path'], format))
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(f"Cannot read {options['path']}: {error}")
+
+        for line_number, message in importer.errors[:options['max_errors']]:
+            self.stderr.write(f"line {line_number}: {message}")
+        if len(importer.errors) > options['max_errors']:
+            self.stderr.write(f"... and {len(importer.errors) - options['max_errors']} more")
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} rows of {options['model']}"))
+        if importer.errors:
+            raise CommandError(f"{len(importer.errors)} rows were skipped")
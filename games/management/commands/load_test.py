@@ -0,0 +1,203 @@
+import asyncio
+import importlib
+import json
+import statistics
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from games.leaderboard import rebuild_totals
+from games.seeding import seed_dataset
+
+JWT_AUTHENTICATION = 'rest_framework_simplejwt.authentication.JWTAuthentication'
+LOAD_TEST_USERNAME = 'load-test'
+
+ENDPOINTS = [
+    ('games.list', '/api/games/games/'),
+    ('questions.list', '/api/games/questions/?limit=10'),
+    ('questions.list_seeded', '/api/games/questions/?limit=10&seed=7'),
+    ('sprint.list', '/api/games/scripture-sprint-questions/?limit=10'),
+    ('find_verse.list', '/api/games/find-the-bible-verse-questions/?limit=10'),
+    ('charades.list', '/api/games/bible-charades-questions/?limit=10'),
+    ('scores.leaderboard', '/api/games/scores/leaderboard/'),
+    ('users.me', '/api/users/users/me/'),
+]
+
+
+def reload_urlconfs():
+    # The async routes are chosen when the URLconfs are imported
+    for name in ('games.urls', 'users.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+@contextmanager
+def read_views(use_async):
+    try:
+        with override_settings(ASYNC_READ_VIEWS=use_async):
+            reload_urlconfs()
+            yield
+    finally:
+        reload_urlconfs()
+
+@contextmanager
+def view_authentication():
+    # APIView read DEFAULT_AUTHENTICATION_CLASSES when it was imported, so an
+    # overridden setting only reaches the sync views through this attribute
+    original = APIView.authentication_classes
+    APIView.authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    try:
+        yield
+    finally:
+        APIView.authentication_classes = original
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the concurrent throughput of the sync DRF read endpoints with their native "
+        "async versions (ASYNC_READ_VIEWS), serving both through Django's ASGI handler. "
+        "Reads committed data; --seed adds a seeded dataset to the database first, so run it "
+        "against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, action='append', help="Concurrent clients (repeatable)")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint, mode and concurrency")
+        parser.add_argument('--only', action='append', default=[], help="Run endpoints whose name contains this")
+        parser.add_argument('--seed', action='store_true', help="Seed and commit a dataset before the run")
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--scores', type=int, default=10000)
+        parser.add_argument('--questions', type=int, default=1000)
+        parser.add_argument('--sessions', type=int, default=1000)
+        parser.add_argument('--output', help="Write the results to this JSON file")
+
+    def get_headers(self):
+        user, created = get_user_model().objects.get_or_create(username=LOAD_TEST_USERNAME)
+        return user if created else None, {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    async def warm_up(self, path, headers):
+        # Fills the question pools and version stamps before timing
+        await AsyncClient().get(path, headers=headers)
+
+    async def run_level(self, path, headers, concurrency, total):
+        latencies = []
+        statuses = Counter()
+        remaining = iter(range(total))
+
+        async def worker():
+            client = AsyncClient()
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+
+        await self.warm_up(path, headers)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            'requests_per_second': round(total / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'errors': sum(count for code, count in statuses.items() if code >= 400),
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    def run(self, endpoints, headers, levels, total):
+        results = {}
+        for use_async in (False, True):
+            mode = 'async' if use_async else 'sync'
+            with read_views(use_async):
+                for name, path in endpoints:
+                    for concurrency in levels:
+                        result = asyncio.run(self.run_level(path, headers, concurrency, total))
+                        results.setdefault(name, {}).setdefault(mode, {})[str(concurrency)] = result
+                        style = self.style.WARNING if result['errors'] else (lambda text: text)
+                        self.stdout.write(style(
+                            f"{name:24} {mode:5} c={concurrency:<4} {result['requests_per_second']:9.1f} req/s  "
+                            f"p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+                            f"{result['errors']} errors"
+                        ))
+        return results
+
+    def summarize(self, results, levels):
+        self.stdout.write("\nAsync / sync throughput:")
+        for name, modes in results.items():
+            ratios = []
+            for concurrency in map(str, levels):
+                before = modes['sync'][concurrency]['requests_per_second']
+                after = modes['async'][concurrency]['requests_per_second']
+                ratios.append(f"c={concurrency} x{after / before if before else 0:.2f}")
+            self.stdout.write(f"{name:24} {'  '.join(ratios)}")
+
+    def handle(self, *args, **options):
+        levels = options['concurrency'] or [1, 10, 50]
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if not options['only'] or any(part in endpoint[0] for part in options['only'])
+        ]
+        if options['seed']:
+            with transaction.atomic():
+                seed_dataset(
+                    users=options['users'],
+                    scores=options['scores'],
+                    questions=options['questions'],
+                    sessions=options['sessions'],
+                    stdout=self.stdout,
+                )
+            rebuild_totals()
+
+        # Both modes authenticate the load test user with a JWT
+        rest_framework = getattr(settings, 'REST_FRAMEWORK', {})
+        authentication = tuple(rest_framework.get('DEFAULT_AUTHENTICATION_CLASSES', ()))
+        if JWT_AUTHENTICATION not in authentication:
+            authentication += (JWT_AUTHENTICATION,)
+        overrides = {
+            'REST_FRAMEWORK': {**rest_framework, 'DEFAULT_AUTHENTICATION_CLASSES': authentication},
+            'SERVER_TIMING': {**getattr(settings, 'SERVER_TIMING', {}), 'SAMPLE_RATE': 0, 'SLOW_MS': None},
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+        }
+        created_user, headers = self.get_headers()
+        try:
+            with override_settings(**overrides), view_authentication():
+                results = self.run(endpoints, headers, levels, options['requests'])
+        finally:
+            if created_user is not None:
+                created_user.delete()
+
+        self.summarize(results, levels)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                meta = {
+                    'created_at': timezone.now().isoformat(),
+                    'concurrency': levels,
+                    'requests': options['requests'],
+                }
+                json.dump({'meta': meta, 'endpoints': results}, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+        # A ratio between error responses and real ones means nothing
+        failing = sorted(
+            f"{name} ({mode})"
+            for name, modes in results.items()
+            for mode, levels_results in modes.items()
+            if any(result['errors'] for result in levels_results.values())
+        )
+        if failing:
+            raise CommandError(f"Requests failed in: {', '.join(failing)}")
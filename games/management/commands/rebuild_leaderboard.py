@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from games.leaderboard import rebuild_totals
+from games.models import ScoreTotal, UserScoreTotal, ScorePeriodTotal, UserGameStats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the leaderboard totals and play statistics from scratch using the Score tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuild_totals(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {ScoreTotal.objects.count()} game totals, {UserScoreTotal.objects.count()} user totals, "
+            f"{ScorePeriodTotal.objects.count()} period totals and {UserGameStats.objects.count()} play statistics"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0004_remove_scripturesprintquestion_versions_verseversion'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='biblecharadesquestion',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='findthebibleversequestion',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='question',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='questionoption',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='scripturesprintquestion',
+            options={'ordering': ['id']},
+        ),
+    ]
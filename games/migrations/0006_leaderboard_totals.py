@@ -0,0 +1,66 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_totals(apps, schema_editor):
+    Score = apps.get_model('games', 'Score')
+    ScoreTotal = apps.get_model('games', 'ScoreTotal')
+    UserScoreTotal = apps.get_model('games', 'UserScoreTotal')
+
+    per_game = Score.objects.order_by().values('user_id', 'game_type_id').annotate(total=models.Sum('points'))
+    ScoreTotal.objects.bulk_create(
+        [ScoreTotal(user_id=row['user_id'], game_type_id=row['game_type_id'], points=row['total']) for row in per_game],
+        batch_size=1000,
+    )
+    per_user = Score.objects.order_by().values('user_id').annotate(total=models.Sum('points'))
+    UserScoreTotal.objects.bulk_create(
+        [UserScoreTotal(user_id=row['user_id'], points=row['total']) for row in per_user],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_remove_random_default_ordering'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserScoreTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_total', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-points'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScoreTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('game_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_totals', to='games.gametype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-points'],
+                'indexes': [models.Index(fields=['game_type', '-points'], name='score_total_game_points_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scoretotal',
+            constraint=models.UniqueConstraint(fields=('user', 'game_type'), name='unique_score_total_per_game'),
+        ),
+        migrations.AddIndex(
+            model_name='userscoretotal',
+            index=models.Index(fields=['-points'], name='user_score_total_points_idx'),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_leaderboard_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PackSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pack_type', models.CharField(max_length=50, unique=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('digest', models.CharField(max_length=64)),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('question_count', models.PositiveIntegerField(default=0)),
+                ('is_stale', models.BooleanField(default=False)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['pack_type'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0007_pack_snapshots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['-start_time', '-id'], name='session_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['user', '-points', '-timestamp', '-id'], name='score_user_ranking_idx'),
+        ),
+    ]
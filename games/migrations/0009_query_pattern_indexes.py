@@ -0,0 +1,43 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['status', '-start_time'], name='session_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['game_type', 'difficulty'], name='question_game_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['difficulty'], name='question_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['game_type', '-points', '-timestamp'], include=('user',), name='score_game_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['-points', '-timestamp'], name='score_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scripturesprintquestion',
+            index=models.Index(fields=['pack_type', 'id'], name='sprint_pack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionscore',
+            index=models.Index(fields=['user', 'session'], include=('score',), name='session_score_user_idx'),
+        ),
+    ]
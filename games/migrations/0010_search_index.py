@@ -0,0 +1,100 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE games_searchentry_fts USING fts5("
+    "title, body, content='games_searchentry', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER games_searchentry_ai AFTER INSERT ON games_searchentry BEGIN "
+    "INSERT INTO games_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER games_searchentry_ad AFTER DELETE ON games_searchentry BEGIN "
+    "INSERT INTO games_searchentry_fts(games_searchentry_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER games_searchentry_au AFTER UPDATE ON games_searchentry BEGIN "
+    "INSERT INTO games_searchentry_fts(games_searchentry_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO games_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS games_searchentry_au",
+    "DROP TRIGGER IF EXISTS games_searchentry_ad",
+    "DROP TRIGGER IF EXISTS games_searchentry_ai",
+    "DROP TABLE IF EXISTS games_searchentry_fts",
+]
+POSTGRESQL_FORWARD = [
+    "ALTER TABLE games_searchentry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED",
+    "CREATE INDEX games_searchentry_vector_idx ON games_searchentry USING GIN (search_vector)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS games_searchentry_vector_idx",
+    "ALTER TABLE games_searchentry DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+def create_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD})
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD})
+
+def populate_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('games', 'SearchEntry')
+    VerseVersion = apps.get_model('games', 'VerseVersion')
+    FindTheBibleVerseQuestion = apps.get_model('games', 'FindTheBibleVerseQuestion')
+    BibleCharadesQuestion = apps.get_model('games', 'BibleCharadesQuestion')
+    Question = apps.get_model('games', 'Question')
+
+    entries = [
+        SearchEntry(kind='verse', object_id=row['id'], translation=row['translation'],
+                    title=row['verse__verse'], body=row['text'])
+        for row in VerseVersion.objects.values('id', 'translation', 'verse__verse', 'text').iterator()
+    ]
+    entries += [
+        SearchEntry(kind='find_the_bible_verse', object_id=row['id'], title=row['reference'], body=row['text'])
+        for row in FindTheBibleVerseQuestion.objects.values('id', 'reference', 'text').iterator()
+    ]
+    entries += [
+        SearchEntry(kind='bible_charades', object_id=row['id'], title=row['title'], body=row['description'])
+        for row in BibleCharadesQuestion.objects.values('id', 'title', 'description').iterator()
+    ]
+    entries += [
+        SearchEntry(kind='question', object_id=row['id'], title=row['title'], body=row['description'])
+        for row in Question.objects.values('id', 'title', 'description').iterator()
+    ]
+    SearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0009_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('verse', 'Verse version'), ('find_the_bible_verse', 'Find the Bible verse question'), ('bible_charades', 'Bible charades question'), ('question', 'Question')], max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('translation', models.CharField(blank=True, max_length=10)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['translation'], name='search_entry_translation_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_entry'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_entries, migrations.RunPython.noop),
+    ]
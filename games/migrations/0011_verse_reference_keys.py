@@ -0,0 +1,85 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+from games.references import instance_range
+
+REFERENCE_MODELS = ['Question', 'ScriptureSprintQuestion', 'FindTheBibleVerseQuestion', 'BibleCharadesQuestion']
+
+
+def populate_reference_keys(apps, schema_editor):
+    for name in REFERENCE_MODELS:
+        model = apps.get_model('games', name)
+        changed = []
+        for instance in model.objects.iterator(chunk_size=1000):
+            instance.ref_start, instance.ref_end = instance_range(instance)
+            if instance.ref_start is not None:
+                changed.append(instance)
+        model.objects.bulk_update(changed, ['ref_start', 'ref_end'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='biblecharadesquestion',
+            name='ref_end',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='biblecharadesquestion',
+            name='ref_start',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='findthebibleversequestion',
+            name='ref_end',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='findthebibleversequestion',
+            name='ref_start',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='ref_end',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='ref_start',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scripturesprintquestion',
+            name='ref_end',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scripturesprintquestion',
+            name='ref_start',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='biblecharadesquestion',
+            index=models.Index(fields=['ref_start', 'ref_end'], name='charades_reference_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='findthebibleversequestion',
+            index=models.Index(fields=['ref_start', 'ref_end'], name='find_verse_reference_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['ref_start', 'ref_end'], name='question_reference_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scripturesprintquestion',
+            index=models.Index(fields=['ref_start', 'ref_end'], name='sprint_reference_idx'),
+        ),
+        migrations.RunPython(populate_reference_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+
+
+def populate_period_totals(apps, schema_editor):
+    Score = apps.get_model('games', 'Score')
+    ScorePeriodTotal = apps.get_model('games', 'ScorePeriodTotal')
+
+    truncs = {
+        'day': TruncDate('timestamp'),
+        'week': TruncWeek('timestamp', output_field=models.DateField()),
+        'month': TruncMonth('timestamp', output_field=models.DateField()),
+    }
+    for period, trunc in truncs.items():
+        per_period = (
+            Score.objects.order_by().annotate(start=trunc)
+            .values('user_id', 'game_type_id', 'start').annotate(total=models.Sum('points'))
+        )
+        ScorePeriodTotal.objects.bulk_create(
+            [
+                ScorePeriodTotal(
+                    user_id=row['user_id'], game_type_id=row['game_type_id'], period=period, start=row['start'],
+                    points=row['total'],
+                )
+                for row in per_period
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0011_verse_reference_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScorePeriodTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('start', models.DateField()),
+                ('points', models.IntegerField(default=0)),
+                ('game_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_period_totals', to='games.gametype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_period_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-points'],
+                'indexes': [models.Index(fields=['game_type', 'period', 'start', '-points'], name='score_period_board_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scoreperiodtotal',
+            constraint=models.UniqueConstraint(fields=('user', 'game_type', 'period', 'start'), name='unique_score_period_total'),
+        ),
+        migrations.RunPython(populate_period_totals, migrations.RunPython.noop),
+    ]
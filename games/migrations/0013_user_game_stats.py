@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_stats(apps, schema_editor):
+    Score = apps.get_model('games', 'Score')
+    SessionScore = apps.get_model('games', 'SessionScore')
+    UserGameStats = apps.get_model('games', 'UserGameStats')
+
+    aggregates = {'plays': models.Count('id'), 'last': models.Max('timestamp')}
+    per_game = (
+        Score.objects.order_by().values('user_id', 'game_type_id')
+        .annotate(total=models.Sum('points'), best=models.Max('points'), **aggregates)
+        .values_list('user_id', 'game_type_id', 'plays', 'total', 'best', 'last')
+    )
+    per_session_game = (
+        SessionScore.objects.order_by().values('user_id', 'session__game_type_id')
+        .annotate(total=models.Sum('score'), best=models.Max('score'), **aggregates)
+        .values_list('user_id', 'session__game_type_id', 'plays', 'total', 'best', 'last')
+    )
+    rows = {}
+    for queryset in (per_game, per_session_game):
+        for user_id, game_type_id, plays, points, best, last in queryset:
+            stats = rows.setdefault((user_id, game_type_id), UserGameStats(user_id=user_id, game_type_id=game_type_id))
+            stats.games_played += plays
+            stats.points_total += points
+            stats.best_score = best if stats.best_score is None else max(stats.best_score, best)
+            stats.last_played = last if stats.last_played is None else max(stats.last_played, last)
+    UserGameStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0012_score_period_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserGameStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('points_total', models.BigIntegerField(default=0)),
+                ('best_score', models.IntegerField(blank=True, null=True)),
+                ('last_played', models.DateTimeField(blank=True, null=True)),
+                ('game_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_stats', to='games.gametype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usergamestats',
+            constraint=models.UniqueConstraint(fields=('user', 'game_type'), name='unique_user_game_stats'),
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
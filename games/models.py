@@ -28,9 +28,32 @@ class ScriptureSprintQuestion(models.Model):
     verse = models.CharField(max_length=100)
     description = models.TextField()
     pack_type = models.CharField(max_length=50)
+    ref_start = models.BigIntegerField(null=True, blank=True, editable=False)  # See games.references
+    ref_end = models.BigIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
-        ordering = ['?']  # Random ordering by default
+        ordering = ['id']  # Random selection is done by games.sampling
+        indexes = [
+            models.Index(fields=['pack_type', 'id'], name='sprint_pack_idx'),
+            models.Index(fields=['ref_start', 'ref_end'], name='sprint_reference_idx'),
+        ]
+
+class PackSnapshot(models.Model):
+    """
+    Precompiled, gzip-compressed JSON of every ScriptureSprintQuestion in a pack.
+    ``digest`` is the SHA-256 of the uncompressed JSON and doubles as the ETag.
+    """
+    pack_type = models.CharField(max_length=50, unique=True)
+    version = models.PositiveIntegerField(default=1)
+    digest = models.CharField(max_length=64)
+    content = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)
+    question_count = models.PositiveIntegerField(default=0)
+    is_stale = models.BooleanField(default=False)
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['pack_type']
 
 class FindTheBibleVerseQuestion(models.Model):
     game_type = models.ForeignKey(GameType, on_delete=models.CASCADE, related_name='find_the_bible_verse_questions')
@@ -41,9 +64,14 @@ class FindTheBibleVerseQuestion(models.Model):
     verse = models.IntegerField()
     options = models.JSONField()  # Store options as a JSON array
     correct_answer = models.CharField(max_length=100)
+    ref_start = models.BigIntegerField(null=True, blank=True, editable=False)  # See games.references
+    ref_end = models.BigIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
-        ordering = ['?']  # Random ordering by default
+        ordering = ['id']  # Random selection is done by games.sampling
+        indexes = [
+            models.Index(fields=['ref_start', 'ref_end'], name='find_verse_reference_idx'),
+        ]
 
 class BibleCharadesQuestion(models.Model):
     game_type = models.ForeignKey(GameType, on_delete=models.CASCADE, related_name='bible_charades_questions')
@@ -54,9 +82,14 @@ class BibleCharadesQuestion(models.Model):
     image_url = models.URLField()
     options = models.JSONField()
     correct_answer = models.CharField(max_length=200)
+    ref_start = models.BigIntegerField(null=True, blank=True, editable=False)  # See games.references
+    ref_end = models.BigIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
-        ordering = ['?']  # Random ordering by default
+        ordering = ['id']  # Random selection is done by games.sampling
+        indexes = [
+            models.Index(fields=['ref_start', 'ref_end'], name='charades_reference_idx'),
+        ]
 
 class Question(models.Model):
     game_type = models.ForeignKey(GameType, on_delete=models.CASCADE, related_name='questions')
@@ -73,9 +106,16 @@ class Question(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    ref_start = models.BigIntegerField(null=True, blank=True, editable=False)  # See games.references
+    ref_end = models.BigIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
-        ordering = ['?']  # Random ordering by default
+        ordering = ['id']  # Random selection is done by games.sampling
+        indexes = [
+            models.Index(fields=['game_type', 'difficulty'], name='question_game_difficulty_idx'),
+            models.Index(fields=['difficulty'], name='question_difficulty_idx'),
+            models.Index(fields=['ref_start', 'ref_end'], name='question_reference_idx'),
+        ]
 
 class QuestionOption(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='options')
@@ -83,7 +123,7 @@ class QuestionOption(models.Model):
     is_correct = models.BooleanField(default=False)
 
     class Meta:
-        ordering = ['?']  # Random ordering for options
+        ordering = ['id']
 
 class Score(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scores')
@@ -93,6 +133,102 @@ class Score(models.Model):
 
     class Meta:
         ordering = ['-points', '-timestamp']
+        indexes = [
+            models.Index(fields=['user', '-points', '-timestamp', '-id'], name='score_user_ranking_idx'),
+            models.Index(fields=['game_type', '-points', '-timestamp'], name='score_game_ranking_idx', include=['user']),
+            models.Index(fields=['-points', '-timestamp'], name='score_ranking_idx'),
+        ]
+
+class ScoreTotal(models.Model):
+    """
+    Denormalized sum of a user's points for one game type.
+    Kept up to date by games.leaderboard on every Score write.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_totals')
+    game_type = models.ForeignKey(GameType, on_delete=models.CASCADE, related_name='score_totals')
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-points']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'game_type'], name='unique_score_total_per_game'),
+        ]
+        indexes = [
+            models.Index(fields=['game_type', '-points'], name='score_total_game_points_idx'),
+        ]
+
+class UserScoreTotal(models.Model):
+    """
+    Denormalized sum of a user's points across all game types.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='score_total')
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-points']
+        indexes = [
+            models.Index(fields=['-points'], name='user_score_total_points_idx'),
+        ]
+
+class ScorePeriodTotal(models.Model):
+    """
+    Sum of a user's points for one game type within one day, week or month,
+    starting on ``start``. Kept up to date by games.leaderboard while the
+    period is open; closed periods are never written again.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_period_totals')
+    game_type = models.ForeignKey(GameType, on_delete=models.CASCADE, related_name='score_period_totals')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    start = models.DateField()
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-points']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'game_type', 'period', 'start'], name='unique_score_period_total'),
+        ]
+        indexes = [
+            models.Index(fields=['game_type', 'period', 'start', '-points'], name='score_period_board_idx'),
+        ]
+
+class UserGameStats(models.Model):
+    """
+    Running play statistics of a user for one game type, over their Scores
+    and their SessionScores in sessions of that type.
+    Kept up to date by games.stats on every write to either.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='game_stats')
+    game_type = models.ForeignKey(GameType, on_delete=models.CASCADE, related_name='user_stats')
+    games_played = models.PositiveIntegerField(default=0)
+    points_total = models.BigIntegerField(default=0)
+    best_score = models.IntegerField(null=True, blank=True)
+    last_played = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'game_type'], name='unique_user_game_stats'),
+        ]
+
+    @property
+    def average_score(self):
+        if not self.games_played:
+            return None
+        return round(self.points_total / self.games_played, 2)
+
+class EventCursor(models.Model):
+    """
+    How far a batch consumer has read an append-only table, as the last
+    primary key it processed. See games.achievements.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
 class GameSession(models.Model):
     game_type = models.ForeignKey(GameType, on_delete=models.CASCADE)
@@ -108,6 +244,12 @@ class GameSession(models.Model):
         default='in_progress'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-start_time', '-id'], name='session_start_idx'),
+            models.Index(fields=['status', '-start_time'], name='session_status_start_idx'),
+        ]
+
 class SessionScore(models.Model):
     session = models.ForeignKey(GameSession, on_delete=models.CASCADE, related_name='scores')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -115,4 +257,35 @@ class SessionScore(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-score', '-timestamp']
\ No newline at end of file
+        ordering = ['-score', '-timestamp']
+        indexes = [
+            models.Index(fields=['user', 'session'], name='session_score_user_idx', include=['score']),
+        ]
+
+class SearchEntry(models.Model):
+    """
+    One searchable document (a verse translation or a question's text).
+    The full-text index over it is engine specific and lives in the database:
+    an FTS5 table on SQLite, a generated tsvector column on PostgreSQL.
+    See games.search.
+    """
+    KIND_CHOICES = [
+        ('verse', 'Verse version'),
+        ('find_the_bible_verse', 'Find the Bible verse question'),
+        ('bible_charades', 'Bible charades question'),
+        ('question', 'Question'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    translation = models.CharField(max_length=10, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['translation'], name='search_entry_translation_idx'),
+        ]
@@ -0,0 +1,99 @@
+"""
+Question-pack snapshots.
+
+Each ScriptureSprintQuestion pack is serialized once into a versioned,
+gzip-compressed, content-addressed blob. Signals mark a snapshot stale when
+a question or VerseVersion in its pack changes, and it is rebuilt on the
+next read, so the API never re-serializes an unchanged pack.
+"""
+import gzip
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import PackSnapshot, ScriptureSprintQuestion, VerseVersion
+from .serializers import ScriptureSprintQuestionSerializer
+
+# Bump when the snapshot payload layout changes
+SNAPSHOT_FORMAT = 1
+
+
+def pack_questions(pack_type):
+    return (
+        ScriptureSprintQuestion.objects.filter(pack_type=pack_type)
+        # VerseVersion has no default ordering, and a reordering would change the digest
+        .prefetch_related(Prefetch('versions', queryset=VerseVersion.objects.order_by('translation', 'id')))
+        .order_by('id')
+    )
+
+def render_pack(pack_type):
+    """
+    Returns the canonical JSON bytes of a pack and its question count.
+    """
+    data = ScriptureSprintQuestionSerializer(pack_questions(pack_type), many=True).data
+    payload = {'format': SNAPSHOT_FORMAT, 'pack_type': pack_type, 'questions': data}
+    content = json.dumps(payload, cls=JSONEncoder, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
+    return content.encode('utf-8'), len(data)
+
+def build_snapshot(pack_type):
+    """
+    Rebuilds the snapshot of ``pack_type``. The version only moves when the
+    content actually changed. A pack with no questions left has its snapshot
+    deleted and returns None, so it is not served as an empty pack.
+    """
+    with transaction.atomic():
+        # Rendering under the lock keeps an older render from overwriting a newer snapshot
+        snapshot = PackSnapshot.objects.select_for_update().filter(pack_type=pack_type).first()
+        content, question_count = render_pack(pack_type)
+        if not question_count:
+            if snapshot is not None:
+                snapshot.delete()
+            return None
+        digest = hashlib.sha256(content).hexdigest()
+        if snapshot is None:
+            snapshot = PackSnapshot(pack_type=pack_type, version=0)
+        elif snapshot.digest == digest:
+            snapshot.is_stale = False
+            snapshot.save(update_fields=['is_stale', 'built_at'])
+            return snapshot
+        snapshot.version += 1
+        snapshot.digest = digest
+        snapshot.content = gzip.compress(content, mtime=0)
+        snapshot.size = len(content)
+        snapshot.question_count = question_count
+        snapshot.is_stale = False
+        try:
+            with transaction.atomic():
+                snapshot.save()
+        except IntegrityError:
+            # A concurrent build created the pack's first snapshot; render again under its lock
+            return build_snapshot(pack_type)
+    return snapshot
+
+def get_snapshot(pack_type):
+    """
+    Returns a fresh snapshot of ``pack_type``, or None when the pack is empty.
+    """
+    snapshot = PackSnapshot.objects.filter(pack_type=pack_type).first()
+    if snapshot is not None and not snapshot.is_stale:
+        return snapshot
+    return build_snapshot(pack_type)
+
+def get_manifest_snapshots(pack_types):
+    """
+    Returns fresh snapshots of ``pack_types`` without their content, reading
+    all of them with one query and rebuilding only missing or stale ones.
+    Packs emptied since ``pack_types`` was read are left out.
+    """
+    snapshots = {
+        snapshot.pack_type: snapshot
+        for snapshot in PackSnapshot.objects.filter(pack_type__in=pack_types, is_stale=False).defer('content')
+    }
+    fresh = [snapshots.get(pack_type) or build_snapshot(pack_type) for pack_type in pack_types]
+    return [snapshot for snapshot in fresh if snapshot is not None]
+
+def mark_stale(*pack_types):
+    PackSnapshot.objects.filter(pack_type__in=[pack for pack in pack_types if pack]).update(is_stale=True)
@@ -0,0 +1,205 @@
+"""
+Canonical scripture references.
+
+References such as "John 3:16-18", "1 Cor 13", "Ps 23:1" or "Genesis 1-11"
+are parsed into a pair of packed integer keys ``book * 1_000_000 +
+chapter * 1000 + verse``. Every question model stores the pair in indexed
+``ref_start`` / ``ref_end`` columns, so "everything touching Romans 8" is a
+single range scan.
+"""
+import re
+
+BOOK_FACTOR = 1_000_000
+CHAPTER_FACTOR = 1000
+LAST_VERSE = 999
+
+# (canonical name, aliases) in canonical order; ordinals start at 1
+BOOKS = [
+    ('Genesis', ['gen', 'ge', 'gn']),
+    ('Exodus', ['exod', 'exo', 'ex']),
+    ('Leviticus', ['lev', 'le', 'lv']),
+    ('Numbers', ['num', 'nu', 'nm', 'nb']),
+    ('Deuteronomy', ['deut', 'deu', 'dt']),
+    ('Joshua', ['josh', 'jos', 'jsh']),
+    ('Judges', ['judg', 'jdg', 'jg', 'jdgs']),
+    ('Ruth', ['rth', 'ru']),
+    ('1 Samuel', ['1 sam', '1 sa', '1sam', '1sa', 'i samuel', '1st samuel', 'first samuel']),
+    ('2 Samuel', ['2 sam', '2 sa', '2sam', '2sa', 'ii samuel', '2nd samuel', 'second samuel']),
+    ('1 Kings', ['1 kgs', '1 ki', '1kgs', '1ki', 'i kings', '1st kings', 'first kings']),
+    ('2 Kings', ['2 kgs', '2 ki', '2kgs', '2ki', 'ii kings', '2nd kings', 'second kings']),
+    ('1 Chronicles', ['1 chron', '1 chr', '1 ch', '1chr', 'i chronicles', 'first chronicles']),
+    ('2 Chronicles', ['2 chron', '2 chr', '2 ch', '2chr', 'ii chronicles', 'second chronicles']),
+    ('Ezra', ['ezr', 'ez']),
+    ('Nehemiah', ['neh', 'ne']),
+    ('Esther', ['est', 'esth', 'es']),
+    ('Job', ['jb']),
+    ('Psalms', ['psalm', 'ps', 'psa', 'pss', 'psm']),
+    ('Proverbs', ['prov', 'pro', 'prv', 'pr']),
+    ('Ecclesiastes', ['eccles', 'eccl', 'ecc', 'ec', 'qoh']),
+    ('Song of Solomon', ['song of songs', 'song', 'sos', 'so', 'canticles']),
+    ('Isaiah', ['isa', 'is']),
+    ('Jeremiah', ['jer', 'je', 'jr']),
+    ('Lamentations', ['lam', 'la']),
+    ('Ezekiel', ['ezek', 'eze', 'ezk']),
+    ('Daniel', ['dan', 'da', 'dn']),
+    ('Hosea', ['hos', 'ho']),
+    ('Joel', ['jl']),
+    ('Amos', ['am']),
+    ('Obadiah', ['obad', 'ob']),
+    ('Jonah', ['jnh', 'jon']),
+    ('Micah', ['mic', 'mc']),
+    ('Nahum', ['nah', 'na']),
+    ('Habakkuk', ['hab', 'hb']),
+    ('Zephaniah', ['zeph', 'zep', 'zp']),
+    ('Haggai', ['hag', 'hg']),
+    ('Zechariah', ['zech', 'zec', 'zc']),
+    ('Malachi', ['mal', 'ml']),
+    ('Matthew', ['matt', 'mat', 'mt']),
+    ('Mark', ['mrk', 'mar', 'mk', 'mr']),
+    ('Luke', ['luk', 'lk']),
+    ('John', ['joh', 'jhn', 'jn']),
+    ('Acts', ['act', 'ac']),
+    ('Romans', ['rom', 'ro', 'rm']),
+    ('1 Corinthians', ['1 cor', '1 co', '1cor', '1co', 'i corinthians', 'first corinthians']),
+    ('2 Corinthians', ['2 cor', '2 co', '2cor', '2co', 'ii corinthians', 'second corinthians']),
+    ('Galatians', ['gal', 'ga']),
+    ('Ephesians', ['eph', 'ephes']),
+    ('Philippians', ['phil', 'php', 'pp']),
+    ('Colossians', ['col', 'co']),
+    ('1 Thessalonians', ['1 thess', '1 thes', '1 th', '1thess', 'i thessalonians', 'first thessalonians']),
+    ('2 Thessalonians', ['2 thess', '2 thes', '2 th', '2thess', 'ii thessalonians', 'second thessalonians']),
+    ('1 Timothy', ['1 tim', '1 ti', '1tim', 'i timothy', 'first timothy']),
+    ('2 Timothy', ['2 tim', '2 ti', '2tim', 'ii timothy', 'second timothy']),
+    ('Titus', ['tit', 'ti']),
+    ('Philemon', ['philem', 'phm', 'pm']),
+    ('Hebrews', ['heb']),
+    ('James', ['jas', 'jm']),
+    ('1 Peter', ['1 pet', '1 pe', '1 pt', '1pet', 'i peter', 'first peter']),
+    ('2 Peter', ['2 pet', '2 pe', '2 pt', '2pet', 'ii peter', 'second peter']),
+    ('1 John', ['1 jn', '1 jhn', '1jn', '1john', 'i john', 'first john']),
+    ('2 John', ['2 jn', '2 jhn', '2jn', '2john', 'ii john', 'second john']),
+    ('3 John', ['3 jn', '3 jhn', '3jn', '3john', 'iii john', 'third john']),
+    ('Jude', ['jud', 'jd']),
+    ('Revelation', ['rev', 're', 'revelations', 'the revelation']),
+]
+
+def _normalise(name):
+    return re.sub(r'[\s.]+', ' ', name.strip().lower())
+
+BOOK_ORDINALS = {}
+for _ordinal, (_name, _aliases) in enumerate(BOOKS, start=1):
+    for _alias in [_name, *_aliases]:
+        BOOK_ORDINALS.setdefault(_normalise(_alias), _ordinal)
+        BOOK_ORDINALS.setdefault(_normalise(_alias).replace(' ', ''), _ordinal)
+
+# "<book> <chapter>[:<verse>][-[<chapter>:]<verse or chapter>]"
+_REFERENCE_RE = re.compile(
+    r'^\s*(?P<book>(?:[1-3]|i{1,3})?\s*[a-z][a-z .]*?)\.?\s*'
+    r'(?P<chapter>\d+)(?::(?P<verse>\d+))?'
+    r'(?:\s*[-–—]\s*(?:(?P<end_chapter>\d+):)?(?P<end>\d+))?\s*$',
+    re.IGNORECASE,
+)
+
+
+def pack(book, chapter, verse):
+    return book * BOOK_FACTOR + chapter * CHAPTER_FACTOR + verse
+
+def unpack(key):
+    return key // BOOK_FACTOR, key // CHAPTER_FACTOR % 1000, key % CHAPTER_FACTOR
+
+def book_ordinal(name):
+    return BOOK_ORDINALS.get(_normalise(name)) or BOOK_ORDINALS.get(_normalise(name).replace(' ', ''))
+
+def book_floor(key):
+    """
+    Returns the smallest key of the book containing ``key``.
+    """
+    return key // BOOK_FACTOR * BOOK_FACTOR
+
+def parse_reference(text):
+    """
+    Parses one reference into ``(start_key, end_key)``, or returns None.
+    Only the first of several references separated by ';' or ',' is used.
+    A bare book, chapter ("Romans 8") or chapter range ("Genesis 1-11")
+    covers every verse it contains.
+    """
+    if not text:
+        return None
+    first = re.split(r'[;,]', text, maxsplit=1)[0]
+    match = _REFERENCE_RE.match(first)
+    if not match:
+        # A bare book name covers the whole book
+        book = book_ordinal(first)
+        return (pack(book, 0, 0), pack(book, 999, LAST_VERSE)) if book else None
+    book = book_ordinal(match['book'])
+    if not book:
+        return None
+
+    chapter = int(match['chapter'])
+    verse = int(match['verse']) if match['verse'] else None
+    end = int(match['end']) if match['end'] else None
+
+    if verse is None:
+        end_chapter = end if end is not None else chapter
+        start, stop = pack(book, chapter, 0), pack(book, end_chapter, LAST_VERSE)
+    elif match['end_chapter']:
+        start, stop = pack(book, chapter, verse), pack(book, int(match['end_chapter']), end)
+    else:
+        start, stop = pack(book, chapter, verse), pack(book, chapter, end if end is not None else verse)
+
+    if stop < start or chapter >= 1000 or (verse or 0) >= 1000 or (end or 0) >= 1000:
+        return None
+    return start, stop
+
+def format_key(key):
+    book, chapter, verse = unpack(key)
+    return f"{BOOKS[book - 1][0]} {chapter}:{verse}"
+
+def format_range(start, end):
+    """
+    Formats a parsed range back into its shortest canonical reference.
+    """
+    book, chapter, verse = unpack(start)
+    _, end_chapter, end_verse = unpack(end)
+    name = BOOKS[book - 1][0]
+    if verse == 0 and end_verse == LAST_VERSE:
+        if chapter == 0 and end_chapter == 999:
+            return name
+        return f"{name} {chapter}" if chapter == end_chapter else f"{name} {chapter}-{end_chapter}"
+    if start == end:
+        return format_key(start)
+    if chapter == end_chapter:
+        return f"{name} {chapter}:{verse}-{end_verse}"
+    return f"{name} {chapter}:{verse}-{end_chapter}:{end_verse}"
+
+# Free-text reference field of each question model, by model name
+REFERENCE_FIELDS = {
+    'question': 'scripture',
+    'scripturesprintquestion': 'verse',
+    'findthebibleversequestion': 'reference',
+    'biblecharadesquestion': 'scripture',
+}
+
+def instance_range(instance):
+    """
+    Returns ``(ref_start, ref_end)`` for a question instance, or ``(None, None)``.
+    Works on historical models too, so migrations can use it.
+    """
+    if instance._meta.model_name == 'findthebibleversequestion':
+        # The structured fields win over the display reference
+        book = book_ordinal(instance.book or '')
+        if book and 0 < instance.chapter < 1000 and 0 <= instance.verse < 1000:
+            key = pack(book, instance.chapter, instance.verse)
+            return key, key
+    parsed = parse_reference(getattr(instance, REFERENCE_FIELDS[instance._meta.model_name]))
+    return parsed or (None, None)
+
+def overlapping(queryset, start, end):
+    """
+    Filters ``queryset`` to rows whose reference range overlaps ``start..end``.
+    A range never spans books, so bounding ``ref_start`` below by the start of
+    the book keeps this a single index range scan on (ref_start, ref_end).
+    """
+    return queryset.filter(
+        ref_start__gte=book_floor(start), ref_start__lte=end, ref_end__gte=start
+    ).order_by('ref_start', 'ref_end', 'id')
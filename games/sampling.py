@@ -0,0 +1,151 @@
+"""
+Random question sampling for Kingdom Chronicles.
+
+Picking questions with ``order_by('?')`` makes the database sort the whole
+table on every request. Instead we keep a cached pool of candidate IDs per
+(model, filters), draw the sample in Python and fetch the rows by primary key.
+"""
+import random
+
+from django.core.cache import cache
+
+from .models import Question, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion
+
+POOL_TIMEOUT = 60 * 15
+
+
+class QuestionSampler:
+    """
+    Samples random questions for a model from a cached pool of IDs.
+
+    ``filter_map`` maps the public filter names (e.g. ``game_type``) to the
+    ORM lookups used to build the pool (e.g. ``game_type__name``).
+    """
+
+    def __init__(self, model, filter_map=None, timeout=POOL_TIMEOUT):
+        self.model = model
+        self.filter_map = filter_map or {}
+        self.timeout = timeout
+
+    @property
+    def _generation_key(self):
+        return f"question-pool:{self.model._meta.label_lower}:generation"
+
+    def _generation(self):
+        generation = cache.get(self._generation_key)
+        if generation is None:
+            cache.add(self._generation_key, 1, timeout=None)
+            generation = cache.get(self._generation_key, 1)
+        return generation
+
+    async def _ageneration(self):
+        generation = await cache.aget(self._generation_key)
+        if generation is None:
+            await cache.aadd(self._generation_key, 1, timeout=None)
+            generation = await cache.aget(self._generation_key, 1)
+        return generation
+
+    def _pool_key(self, filters, generation=None):
+        if generation is None:
+            generation = self._generation()
+        parts = [f"{name}={filters[name]}" for name in sorted(filters)]
+        return f"question-pool:{self.model._meta.label_lower}:{generation}:{'&'.join(parts)}"
+
+    def _pool_queryset(self, filters):
+        lookups = {self.filter_map[name]: value for name, value in filters.items()}
+        # A fixed order keeps ``?seed=`` samples the same across query plans and backends
+        return self.model._default_manager.filter(**lookups).order_by('pk').values_list('pk', flat=True)
+
+    def _clean_filters(self, filters):
+        return {name: value for name, value in filters.items() if name in self.filter_map and value}
+
+    def pool(self, **filters):
+        """
+        Returns the cached list of candidate IDs matching ``filters``.
+        """
+        filters = self._clean_filters(filters)
+        key = self._pool_key(filters)
+        ids = cache.get(key)
+        if ids is None:
+            ids = list(self._pool_queryset(filters))
+            cache.set(key, ids, timeout=self.timeout)
+        return ids
+
+    async def apool(self, **filters):
+        """
+        Async version of ``pool()``.
+        """
+        filters = self._clean_filters(filters)
+        key = self._pool_key(filters, await self._ageneration())
+        ids = await cache.aget(key)
+        if ids is None:
+            ids = [pk async for pk in self._pool_queryset(filters)]
+            await cache.aset(key, ids, timeout=self.timeout)
+        return ids
+
+    @staticmethod
+    def _draw(ids, limit, rng):
+        rng = rng or random
+        if limit is None or limit >= len(ids):
+            return rng.sample(ids, len(ids))
+        return rng.sample(ids, max(limit, 0))
+
+    def sample_ids(self, limit=None, rng=None, **filters):
+        """
+        Picks up to ``limit`` IDs uniformly at random from the pool.
+        A ``limit`` of None returns the whole pool in random order.
+        """
+        return self._draw(self.pool(**filters), limit, rng)
+
+    async def asample_ids(self, limit=None, rng=None, **filters):
+        """
+        Async version of ``sample_ids()``.
+        """
+        return self._draw(await self.apool(**filters), limit, rng)
+
+    def sample(self, queryset=None, limit=None, rng=None, **filters):
+        """
+        Returns a list of sampled instances, in sampled order.
+        """
+        ids = self.sample_ids(limit=limit, rng=rng, **filters)
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        instances = queryset.order_by().in_bulk(ids)
+        return [instances[pk] for pk in ids if pk in instances]
+
+    def invalidate(self):
+        """
+        Drops every cached pool for the model by bumping its generation.
+        """
+        try:
+            cache.incr(self._generation_key)
+        except ValueError:
+            cache.set(self._generation_key, 1, timeout=None)
+
+
+question_sampler = QuestionSampler(
+    Question,
+    filter_map={'game_type': 'game_type__name', 'difficulty': 'difficulty'},
+)
+scripture_sprint_sampler = QuestionSampler(
+    ScriptureSprintQuestion,
+    filter_map={'game_type': 'game_type__name', 'pack_type': 'pack_type'},
+)
+find_the_bible_verse_sampler = QuestionSampler(
+    FindTheBibleVerseQuestion,
+    filter_map={'game_type': 'game_type__name'},
+)
+bible_charades_sampler = QuestionSampler(
+    BibleCharadesQuestion,
+    filter_map={'game_type': 'game_type__name', 'difficulty': 'difficulty'},
+)
+
+SAMPLERS = {
+    sampler.model: sampler
+    for sampler in (
+        question_sampler,
+        scripture_sprint_sampler,
+        find_the_bible_verse_sampler,
+        bible_charades_sampler,
+    )
+}
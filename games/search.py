@@ -0,0 +1,124 @@
+"""
+Full-text scripture search.
+
+Verse translations and question texts are copied into SearchEntry rows by
+signals. The database keeps the inverted index over them in sync: an FTS5
+table maintained by triggers on SQLite, a generated ``tsvector`` column with
+a GIN index on PostgreSQL (see migration 0010). Other engines fall back to
+an unindexed ``icontains`` match.
+"""
+import re
+
+from django.db import connection
+
+from .models import SearchEntry, VerseVersion, FindTheBibleVerseQuestion, BibleCharadesQuestion, Question
+
+KINDS = {
+    VerseVersion: 'verse',
+    FindTheBibleVerseQuestion: 'find_the_bible_verse',
+    BibleCharadesQuestion: 'bible_charades',
+    Question: 'question',
+}
+
+_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def document_for(instance):
+    """
+    Returns the SearchEntry fields for a searchable model instance.
+    """
+    if isinstance(instance, VerseVersion):
+        return {'translation': instance.translation, 'title': instance.verse.verse, 'body': instance.text}
+    if isinstance(instance, FindTheBibleVerseQuestion):
+        return {'translation': '', 'title': instance.reference, 'body': instance.text}
+    return {'translation': '', 'title': instance.title, 'body': instance.description}
+
+def index_instance(instance):
+    SearchEntry.objects.update_or_create(
+        kind=KINDS[type(instance)],
+        object_id=instance.pk,
+        defaults=document_for(instance),
+    )
+
+def remove_instance(instance):
+    SearchEntry.objects.filter(kind=KINDS[type(instance)], object_id=instance.pk).delete()
+
+def parse_query(query):
+    """
+    Splits a user query into terms; double-quoted parts are kept as phrases.
+    Returns a list of ``(text, is_phrase)``.
+    """
+    terms = []
+    for phrase, word in _TERM_RE.findall(query):
+        text = (phrase or word).strip()
+        if text:
+            terms.append((text, bool(phrase)))
+    return terms
+
+def _fts5_query(terms):
+    # Quote every term so user input can never be read as FTS5 syntax
+    return ' '.join('"%s"' % text.replace('"', '""') for text, _ in terms)
+
+def _websearch_query(terms):
+    return ' '.join('"%s"' % text if is_phrase else text for text, is_phrase in terms)
+
+def _filters(kinds, translation, alias):
+    clauses, params = [], []
+    if kinds:
+        clauses.append(f"{alias}.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+    if translation:
+        clauses.append(f"{alias}.translation = %s")
+        params.append(translation)
+    return ''.join(f" AND {clause}" for clause in clauses), params
+
+def _rows(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def search(query, kinds=None, translation=None, limit=20):
+    """
+    Returns ranked matches as dicts with kind, object_id, translation, title,
+    snippet and rank (lower is better on SQLite, higher on PostgreSQL).
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+    where, params = _filters(kinds, translation, 'e')
+
+    if connection.vendor == 'sqlite':
+        return _rows(
+            "SELECT e.kind, e.object_id, e.translation, e.title, "
+            "snippet(games_searchentry_fts, 1, '[', ']', '...', 12) AS snippet, "
+            "bm25(games_searchentry_fts, 2.0, 1.0) AS rank "
+            "FROM games_searchentry_fts JOIN games_searchentry e ON e.id = games_searchentry_fts.rowid "
+            f"WHERE games_searchentry_fts MATCH %s{where} ORDER BY rank LIMIT %s",
+            [_fts5_query(terms), *params, limit],
+        )
+
+    if connection.vendor == 'postgresql':
+        return _rows(
+            "SELECT e.kind, e.object_id, e.translation, e.title, "
+            "ts_headline('english', e.body, q, 'StartSel=[, StopSel=], MaxWords=24, MinWords=8') AS snippet, "
+            "ts_rank(e.search_vector, q) AS rank "
+            "FROM games_searchentry e, websearch_to_tsquery('english', %s) q "
+            f"WHERE e.search_vector @@ q{where} ORDER BY rank DESC LIMIT %s",
+            [_websearch_query(terms), *params, limit],
+        )
+
+    queryset = SearchEntry.objects.all()
+    for text, _ in terms:
+        queryset = queryset.filter(body__icontains=text)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if translation:
+        queryset = queryset.filter(translation=translation)
+    return [
+        {
+            'kind': row['kind'], 'object_id': row['object_id'], 'translation': row['translation'],
+            'title': row['title'], 'snippet': row['body'][:200], 'rank': 0,
+        }
+        for row in queryset.values('kind', 'object_id', 'translation', 'title', 'body')[:limit]
+    ]
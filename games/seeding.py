@@ -0,0 +1,166 @@
+"""
+Synthetic dataset generation for query-plan checks and benchmarks.
+
+Rows are written with ``bulk_create`` in batches, so model signals do not
+run; call ``games.leaderboard.rebuild_totals`` afterwards when the
+leaderboard tables are needed.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .references import instance_range
+from .models import (
+    GameType, Question, QuestionOption, Score, GameSession, SessionScore,
+    ScriptureSprintQuestion, VerseVersion, FindTheBibleVerseQuestion, BibleCharadesQuestion
+)
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+PACK_TYPES = ['gospels', 'psalms', 'proverbs', 'epistles', 'prophets']
+TRANSLATIONS = ['KJV', 'NKJV', 'NIV', 'ESV']
+STATUSES = ['in_progress', 'completed', 'abandoned']
+
+
+def _with_references(instances):
+    # bulk_create skips the pre_save receiver that fills the reference keys
+    for instance in instances:
+        instance.ref_start, instance.ref_end = instance_range(instance)
+    return instances
+
+def _chunks(count, batch_size):
+    for start in range(0, count, batch_size):
+        yield start, min(batch_size, count - start)
+
+def seed_dataset(users=1000, scores=10000, questions=1000, sessions=1000, players_per_session=3,
+                 batch_size=5000, seed=0, stdout=None):
+    """
+    Creates a reproducible dataset of the given size and returns the created game types.
+    """
+    rng = random.Random(seed)
+    log = stdout.write if stdout else (lambda message: None)
+    User = get_user_model()
+    now = timezone.now()
+
+    game_types = []
+    for name in ['scripture_sprint', 'find_the_bible_verse', 'bible_charades', 'trivia']:
+        game_type, _ = GameType.objects.get_or_create(
+            name=name,
+            defaults={'description': name.replace('_', ' ').title(), 'max_players': 8, 'difficulty': 'medium'},
+        )
+        game_types.append(game_type)
+
+    password = make_password(None)
+    first_user_id = (User.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    prefix = f'seed{first_user_id}'
+    for start, size in _chunks(users, batch_size):
+        User.objects.bulk_create(
+            [
+                User(username=f'{prefix}_{start + offset}', email=f'{prefix}_{start + offset}@example.com',
+                     password=password, points=rng.randint(0, 10000))
+                for offset in range(size)
+            ],
+            batch_size=batch_size,
+        )
+    user_ids = list(User.objects.filter(username__startswith=f'{prefix}_').values_list('id', flat=True))
+    log(f"Seeded {len(user_ids)} users")
+
+    if not user_ids:
+        return game_types
+
+    for start, size in _chunks(scores, batch_size):
+        Score.objects.bulk_create(
+            [
+                Score(user_id=rng.choice(user_ids), game_type=rng.choice(game_types), points=rng.randint(0, 1000))
+                for _ in range(size)
+            ],
+            batch_size=batch_size,
+        )
+    log(f"Seeded {scores} scores")
+
+    per_model = max(questions // 4, 1)
+    for start, size in _chunks(per_model, batch_size):
+        created = Question.objects.bulk_create(
+            _with_references([
+                Question(game_type=rng.choice(game_types), title=f'Question {start + offset}',
+                         description='Who wrote this?', scripture='John 3:16',
+                         difficulty=rng.choice(DIFFICULTIES))
+                for offset in range(size)
+            ]),
+            batch_size=batch_size,
+        )
+        QuestionOption.objects.bulk_create(
+            [
+                QuestionOption(question=question, text=f'Option {index}', is_correct=index == 0)
+                for question in created
+                for index in range(4)
+            ],
+            batch_size=batch_size,
+        )
+
+        sprint = ScriptureSprintQuestion.objects.bulk_create(
+            _with_references([
+                ScriptureSprintQuestion(game_type=game_types[0], verse=f'John {start + offset}:16',
+                                        description='Complete the verse', pack_type=rng.choice(PACK_TYPES))
+                for offset in range(size)
+            ]),
+            batch_size=batch_size,
+        )
+        VerseVersion.objects.bulk_create(
+            [
+                VerseVersion(verse=question, translation=translation,
+                             text='For God so loved the world, that he gave his only begotten Son')
+                for question in sprint
+                for translation in rng.sample(TRANSLATIONS, 2)
+            ],
+            batch_size=batch_size,
+        )
+
+        FindTheBibleVerseQuestion.objects.bulk_create(
+            _with_references([
+                FindTheBibleVerseQuestion(game_type=game_types[1], reference=f'John {start + offset}:16',
+                                          text='For God so loved the world', book='John',
+                                          chapter=(start + offset) % 21 + 1, verse=16,
+                                          options=['John', 'Mark', 'Luke', 'Matthew'], correct_answer='John')
+                for offset in range(size)
+            ]),
+            batch_size=batch_size,
+        )
+        BibleCharadesQuestion.objects.bulk_create(
+            _with_references([
+                BibleCharadesQuestion(game_type=game_types[2], title=f'Charade {start + offset}',
+                                      description='Act it out', scripture='Genesis 6:9',
+                                      difficulty=rng.choice(DIFFICULTIES), image_url='https://example.com/a.png',
+                                      options=['Noah', 'Moses', 'Abraham', 'David'], correct_answer='Noah')
+                for offset in range(size)
+            ]),
+            batch_size=batch_size,
+        )
+    log(f"Seeded {per_model * 4} questions")
+
+    for start, size in _chunks(sessions, batch_size):
+        created = GameSession.objects.bulk_create(
+            [
+                GameSession(game_type=rng.choice(game_types), status=rng.choice(STATUSES))
+                for _ in range(size)
+            ],
+            batch_size=batch_size,
+        )
+        for session in created:
+            # auto_now_add ignores provided values, so spread start times afterwards
+            session.start_time = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            session.end_time = session.start_time + timedelta(minutes=rng.randint(1, 60))
+        GameSession.objects.bulk_update(created, ['start_time', 'end_time'], batch_size=batch_size)
+        SessionScore.objects.bulk_create(
+            [
+                SessionScore(session=session, user_id=user_id, score=rng.randint(0, 500))
+                for session in created
+                for user_id in rng.sample(user_ids, min(players_per_session, len(user_ids)))
+            ],
+            batch_size=batch_size,
+        )
+    log(f"Seeded {sessions} sessions")
+
+    return game_types
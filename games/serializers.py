@@ -1,10 +1,26 @@
+import random
+
+from django.db import models
 from rest_framework import serializers
-from .models import GameType, Question, QuestionOption, Score, GameSession, SessionScore, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion, VerseVersion
+from .models import GameType, Question, QuestionOption, Score, ScorePeriodTotal, GameSession, SessionScore, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion, VerseVersion, SearchEntry
+from .exports import FORMATS
+from .references import parse_reference
+
+class ShuffledListSerializer(serializers.ListSerializer):
+    """
+    List serializer that shuffles its items in Python, using the ``rng`` from
+    the serializer context so a seeded request gets a reproducible order.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.context.get('rng', random).shuffle(items)
+        return super().to_representation(items)
 
 class QuestionOptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuestionOption
         fields = ['id', 'text', 'is_correct']
+        list_serializer_class = ShuffledListSerializer
 
 class QuestionSerializer(serializers.ModelSerializer):
     options = QuestionOptionSerializer(many=True, read_only=True)
@@ -13,6 +29,44 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'title', 'description', 'scripture', 'difficulty', 'options']
 
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    kind = serializers.MultipleChoiceField(choices=SearchEntry.KIND_CHOICES, required=False)
+    translation = serializers.CharField(max_length=10, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class ReferenceQuerySerializer(serializers.Serializer):
+    KIND_CHOICES = ['question', 'scripture_sprint', 'find_the_bible_verse', 'bible_charades']
+
+    ref = serializers.CharField(max_length=100)
+    kind = serializers.MultipleChoiceField(choices=KIND_CHOICES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=200, default=50)
+
+    def validate_ref(self, value):
+        parsed = parse_reference(value)
+        if parsed is None:
+            raise serializers.ValidationError("Unrecognised scripture reference.")
+        return parsed
+
+class ExportQuerySerializer(serializers.Serializer):
+    DATE_FORMATS = ['iso-8601', '%Y-%m-%d']
+
+    output = serializers.ChoiceField(choices=sorted(FORMATS), default='csv')
+    since = serializers.DateTimeField(input_formats=DATE_FORMATS, required=False)
+    until = serializers.DateTimeField(input_formats=DATE_FORMATS, required=False)
+    game_type = serializers.CharField(max_length=100, required=False)
+
+    def validate(self, attrs):
+        if 'since' in attrs and 'until' in attrs and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError({'until': "Must be after since."})
+        return attrs
+
+class PeriodLeaderboardQuerySerializer(serializers.Serializer):
+    game_type = serializers.CharField(max_length=100)
+    period = serializers.ChoiceField(choices=ScorePeriodTotal.PERIOD_CHOICES)
+    date = serializers.DateField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
 class GameTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = GameType
@@ -56,7 +110,42 @@ class GameSessionSerializer(serializers.ModelSerializer):
         fields = ['id', 'game_type', 'start_time', 'end_time', 'status', 'scores']
 
     def get_scores(self, obj):
-        return SessionScoreSerializer(obj.scores.all(), many=True).data
+        scores = obj.scores.all()
+        if 'scores' not in getattr(obj, '_prefetched_objects_cache', {}):
+            # Not prefetched (e.g. a freshly created session): fetch the usernames in the same query
+            scores = scores.select_related('user')
+        return SessionScoreSerializer(scores, many=True).data
+
+class GameSessionSummarySerializer(serializers.ModelSerializer):
+    best_score = serializers.IntegerField(read_only=True)
+    player_count = serializers.IntegerField(read_only=True)
+    duration = serializers.DurationField(read_only=True)
+
+    class Meta:
+        model = GameSession
+        fields = ['id', 'game_type', 'start_time', 'end_time', 'status', 'best_score', 'player_count', 'duration']
+
+class SessionScoreInputSerializer(serializers.Serializer):
+    score = serializers.IntegerField()
+
+class GameSessionBulkListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # Check every game type with one query instead of one per session
+        game_type_ids = {data['game_type_id'] for data in attrs}
+        known = set(GameType.objects.filter(id__in=game_type_ids).values_list('id', flat=True))
+        missing = sorted(game_type_ids - known)
+        if missing:
+            raise serializers.ValidationError({'game_type': f"Invalid game types: {missing}"})
+        return attrs
+
+class GameSessionBulkSerializer(serializers.ModelSerializer):
+    game_type = serializers.IntegerField(source='game_type_id')
+    scores = SessionScoreInputSerializer(many=True, required=False)
+
+    class Meta:
+        model = GameSession
+        fields = ['game_type', 'end_time', 'status', 'scores']
+        list_serializer_class = GameSessionBulkListSerializer
 
 class SessionScoreSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -0,0 +1,54 @@
+"""
+Batched writes for game sessions and their scores.
+
+Sessions and scores are written with ``bulk_create`` inside one transaction,
+so a client flushing many finished sessions costs a few INSERTs instead of
+one round trip per score. ``bulk_create`` does not send ``post_save``, so
+``session_scores_created`` is sent instead for anything that needs to react
+to new SessionScore rows.
+"""
+from django.db import transaction
+from django.dispatch import Signal
+
+from .models import GameSession, SessionScore
+
+# Sent with ``scores``: the list of SessionScore rows just written
+session_scores_created = Signal()
+
+
+def record_sessions(user, sessions, batch_size=500):
+    """
+    Creates sessions and their scores for ``user``.
+
+    ``sessions`` is a list of validated session dicts, each with an optional
+    ``scores`` list of ``{'score': int}`` dicts. Returns the created sessions.
+    """
+    with transaction.atomic():
+        created = GameSession.objects.bulk_create(
+            [GameSession(**{key: value for key, value in data.items() if key != 'scores'}) for data in sessions],
+            batch_size=batch_size,
+        )
+        scores = SessionScore.objects.bulk_create(
+            [
+                SessionScore(session=session, user=user, score=score_data['score'])
+                for session, data in zip(created, sessions)
+                for score_data in data.get('scores', [])
+            ],
+            batch_size=batch_size,
+        )
+        if scores:
+            session_scores_created.send(sender=SessionScore, scores=scores)
+    return created
+
+def record_scores(user, session, scores, batch_size=500):
+    """
+    Adds validated ``{'score': int}`` dicts to an existing session for ``user``.
+    """
+    with transaction.atomic():
+        created = SessionScore.objects.bulk_create(
+            [SessionScore(session=session, user=user, score=score_data['score']) for score_data in scores],
+            batch_size=batch_size,
+        )
+        if created:
+            session_scores_created.send(sender=SessionScore, scores=created)
+    return created
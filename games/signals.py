@@ -0,0 +1,232 @@
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core import versioning
+from .jobs import schedule_achievements
+from .leaderboard import apply_score_delta
+from .models import (
+    GameType, Question, QuestionOption, ScriptureSprintQuestion, FindTheBibleVerseQuestion,
+    BibleCharadesQuestion, Score, VerseVersion, SearchEntry, GameSession, SessionScore
+)
+from .packs import mark_stale
+from . import search
+from .references import instance_range
+from .sampling import SAMPLERS
+from .sessions import session_scores_created
+from . import stats, streams
+
+versioning.track(
+    GameType, Question, QuestionOption, ScriptureSprintQuestion, VerseVersion,
+    FindTheBibleVerseQuestion, BibleCharadesQuestion
+)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=ScriptureSprintQuestion)
+@receiver(post_delete, sender=ScriptureSprintQuestion)
+@receiver(post_save, sender=FindTheBibleVerseQuestion)
+@receiver(post_delete, sender=FindTheBibleVerseQuestion)
+@receiver(post_save, sender=BibleCharadesQuestion)
+@receiver(post_delete, sender=BibleCharadesQuestion)
+def invalidate_question_pool(sender, **kwargs):
+    """
+    Drops the cached sampling pools whenever a question is added, changed or removed.
+    """
+    SAMPLERS[sender].invalidate()
+
+
+@receiver(pre_save, sender=Question)
+@receiver(pre_save, sender=ScriptureSprintQuestion)
+@receiver(pre_save, sender=FindTheBibleVerseQuestion)
+@receiver(pre_save, sender=BibleCharadesQuestion)
+def set_reference_keys(sender, instance, **kwargs):
+    """
+    Keeps the packed ref_start / ref_end keys in step with the reference text.
+    """
+    instance.ref_start, instance.ref_end = instance_range(instance)
+
+
+@receiver(pre_save, sender=Score)
+def remember_previous_score(sender, instance, **kwargs):
+    """
+    Keeps the stored values of an updated Score so post_save can apply the difference.
+    """
+    instance._leaderboard_previous = None
+    if instance.pk:
+        instance._leaderboard_previous = (
+            Score.objects.filter(pk=instance.pk).values_list('user_id', 'game_type_id', 'points').first()
+        )
+
+
+@receiver(post_save, sender=Score)
+def update_leaderboard_on_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_leaderboard_previous', None)
+    if previous:
+        user_id, game_type_id, points = previous
+        apply_score_delta(user_id, game_type_id, -points, create_missing=False, timestamp=instance.timestamp)
+    apply_score_delta(instance.user_id, instance.game_type_id, instance.points, timestamp=instance.timestamp)
+
+
+@receiver(post_delete, sender=Score)
+def update_leaderboard_on_delete(sender, instance, **kwargs):
+    apply_score_delta(
+        instance.user_id, instance.game_type_id, -instance.points, create_missing=False, timestamp=instance.timestamp
+    )
+
+
+@receiver(post_save, sender=Score)
+def update_stats_on_score_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_leaderboard_previous', None)
+    if previous and previous[:2] == (instance.user_id, instance.game_type_id):
+        stats.change_play(instance.user_id, instance.game_type_id, previous[2], instance.points)
+        return
+    if previous:
+        user_id, game_type_id, points = previous
+        stats.remove_play(user_id, game_type_id, points, instance.timestamp)
+    stats.add_plays(instance.user_id, instance.game_type_id, 1, instance.points, instance.points, instance.timestamp)
+
+
+@receiver(post_delete, sender=Score)
+def update_stats_on_score_delete(sender, instance, **kwargs):
+    stats.remove_play(instance.user_id, instance.game_type_id, instance.points, instance.timestamp)
+
+
+def session_game_type(session_id):
+    return Subquery(GameSession.objects.filter(pk=session_id).values('game_type_id')[:1])
+
+
+@receiver(pre_save, sender=SessionScore)
+def remember_previous_session_score(sender, instance, **kwargs):
+    instance._stats_previous = None
+    if instance.pk:
+        instance._stats_previous = (
+            SessionScore.objects.filter(pk=instance.pk).values_list('user_id', 'session_id', 'score').first()
+        )
+
+
+@receiver(post_save, sender=SessionScore)
+def update_stats_on_session_score_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if previous:
+        user_id, session_id, score = previous
+        if (user_id, session_id) == (instance.user_id, instance.session_id):
+            stats.change_play(user_id, instance.session.game_type_id, score, instance.score)
+            return
+        stats.remove_play(user_id, session_game_type(session_id), score, instance.timestamp)
+    stats.add_plays(
+        instance.user_id, instance.session.game_type_id, 1, instance.score, instance.score, instance.timestamp
+    )
+
+
+@receiver(post_delete, sender=SessionScore)
+def update_stats_on_session_score_delete(sender, instance, **kwargs):
+    # The session is deleted after its scores when the delete cascades from it
+    stats.remove_play(instance.user_id, session_game_type(instance.session_id), instance.score, instance.timestamp)
+
+
+@receiver(session_scores_created, sender=SessionScore)
+def update_stats_on_session_scores_created(sender, scores, **kwargs):
+    stats.add_session_scores(scores)
+
+
+@receiver(post_save, sender=Score)
+@receiver(post_save, sender=SessionScore)
+def schedule_achievements_on_save(sender, created, **kwargs):
+    # Only new rows are achievement events
+    if created:
+        schedule_achievements()
+
+
+@receiver(session_scores_created, sender=SessionScore)
+def schedule_achievements_on_scores_created(sender, **kwargs):
+    schedule_achievements()
+
+
+@receiver(pre_save, sender=GameSession)
+def remember_previous_session_game_type(sender, instance, **kwargs):
+    instance._previous_game_type_id = None
+    if instance.pk:
+        instance._previous_game_type_id = (
+            GameSession.objects.filter(pk=instance.pk).values_list('game_type_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=GameSession)
+def move_session_stats(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_game_type_id', None)
+    if previous is None or previous == instance.game_type_id:
+        return
+    # The session's plays now count for another game type
+    for user_id in set(instance.scores.values_list('user_id', flat=True)):
+        stats.refresh_stats(user_id, previous)
+        stats.refresh_stats(user_id, instance.game_type_id)
+
+
+@receiver(pre_save, sender=ScriptureSprintQuestion)
+def remember_previous_pack(sender, instance, **kwargs):
+    instance._previous_pack_type = None
+    if instance.pk:
+        instance._previous_pack_type = (
+            ScriptureSprintQuestion.objects.filter(pk=instance.pk).values_list('pack_type', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ScriptureSprintQuestion)
+@receiver(post_delete, sender=ScriptureSprintQuestion)
+def invalidate_pack_snapshot(sender, instance, **kwargs):
+    mark_stale(instance.pack_type, getattr(instance, '_previous_pack_type', None))
+
+
+@receiver(post_save, sender=VerseVersion)
+@receiver(post_delete, sender=VerseVersion)
+def invalidate_pack_snapshot_for_version(sender, instance, **kwargs):
+    mark_stale(ScriptureSprintQuestion.objects.filter(pk=instance.verse_id).values_list('pack_type', flat=True).first())
+
+
+@receiver(post_save, sender=VerseVersion)
+@receiver(post_save, sender=FindTheBibleVerseQuestion)
+@receiver(post_save, sender=BibleCharadesQuestion)
+@receiver(post_save, sender=Question)
+def update_search_entry(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=VerseVersion)
+@receiver(post_delete, sender=FindTheBibleVerseQuestion)
+@receiver(post_delete, sender=BibleCharadesQuestion)
+@receiver(post_delete, sender=Question)
+def remove_search_entry(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+@receiver(post_save, sender=ScriptureSprintQuestion)
+def update_verse_search_titles(sender, instance, created, **kwargs):
+    if not created:
+        SearchEntry.objects.filter(
+            kind='verse', object_id__in=instance.versions.values('id')
+        ).exclude(title=instance.verse).update(title=instance.verse)
+
+
+def notify_session_streams(session_ids):
+    # Publishers re-read the database, so wake them once the write is visible
+    transaction.on_commit(lambda: streams.notify(session_ids))
+
+
+@receiver(session_scores_created, sender=SessionScore)
+def stream_created_scores(sender, scores, **kwargs):
+    notify_session_streams({score.session_id for score in scores})
+
+
+@receiver(post_save, sender=SessionScore)
+def stream_saved_score(sender, instance, created, **kwargs):
+    if created:
+        notify_session_streams({instance.session_id})
+
+
+@receiver(post_save, sender=GameSession)
+@receiver(post_delete, sender=GameSession)
+def stream_session_change(sender, instance, **kwargs):
+    notify_session_streams({instance.pk})
@@ -0,0 +1,168 @@
+"""
+Incrementally maintained per-(user, game_type) play statistics.
+
+Every Score and SessionScore counts as one game played. Writes to either
+are applied to the user's ``UserGameStats`` row as running counts and sums
+with atomic ``F()`` updates, and ``Greatest`` keeps the best score and the
+last played time, so reading the statistics is a single indexed lookup.
+
+A maximum cannot be decremented: only when the removed play may have been
+the best score or the last one are those two read back from Score and
+SessionScore.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Score, SessionScore, UserGameStats
+
+
+def _changes(plays, points, best, last_played):
+    changes = {'games_played': F('games_played') + plays, 'points_total': F('points_total') + points}
+    # SQLite's GREATEST is NULL when any argument is, so empty rows are coalesced first
+    if best is not None:
+        changes['best_score'] = Greatest(Coalesce(F('best_score'), best), best)
+    if last_played is not None:
+        changes['last_played'] = Greatest(Coalesce(F('last_played'), last_played), last_played)
+    return changes
+
+def add_plays(user_id, game_type_id, plays, points, best, last_played):
+    """
+    Adds ``plays`` games worth ``points`` in total to a user's statistics.
+    """
+    stats = UserGameStats.objects.filter(user_id=user_id, game_type_id=game_type_id)
+    if stats.update(**_changes(plays, points, best, last_played)):
+        return
+    try:
+        with transaction.atomic():
+            UserGameStats.objects.create(
+                user_id=user_id, game_type_id=game_type_id, games_played=plays, points_total=points,
+                best_score=best, last_played=last_played,
+            )
+    except IntegrityError:
+        # Another request created the row first
+        stats.update(**_changes(plays, points, best, last_played))
+
+def remove_play(user_id, game_type_id, points, timestamp):
+    """
+    Removes one game from a user's statistics. ``game_type_id`` may be an
+    expression, such as a subquery on the game session.
+
+    Does nothing when the row is gone, as when the delete cascades from a
+    removed user or game type.
+    """
+    stats = UserGameStats.objects.filter(user_id=user_id, game_type_id=game_type_id)
+    changes = {'games_played': F('games_played') - 1, 'points_total': F('points_total') - points}
+    extreme = Q(best_score__lte=points) | Q(last_played__lte=timestamp)
+    if stats.exclude(extreme).update(**changes):
+        return
+    for pk, stats_game_type_id in stats.filter(extreme).values_list('pk', 'game_type_id'):
+        # A user's last play of a game type takes its row with it
+        if UserGameStats.objects.filter(pk=pk, games_played__lte=1).delete()[0]:
+            continue
+        UserGameStats.objects.filter(pk=pk).update(**changes)
+        refresh_extremes(user_id, stats_game_type_id)
+
+def change_play(user_id, game_type_id, old_points, new_points):
+    """
+    Changes the points of one of a user's games.
+    """
+    stats = UserGameStats.objects.filter(user_id=user_id, game_type_id=game_type_id)
+    points_total = F('points_total') + (new_points - old_points)
+    if new_points >= old_points:
+        stats.update(points_total=points_total, best_score=Greatest(Coalesce(F('best_score'), new_points), new_points))
+    elif not stats.exclude(best_score__lte=old_points).update(points_total=points_total):
+        # The best score went down
+        if stats.update(points_total=points_total):
+            refresh_extremes(user_id, game_type_id)
+
+def _scores(user_id, game_type_id):
+    return (
+        Score.objects.filter(user_id=user_id, game_type_id=game_type_id),
+        SessionScore.objects.filter(user_id=user_id, session__game_type_id=game_type_id),
+    )
+
+def refresh_extremes(user_id, game_type_id):
+    """
+    Reads a user's best score and last played time back from their plays.
+    """
+    scores, session_scores = _scores(user_id, game_type_id)
+    score = scores.aggregate(best=Max('points'), last=Max('timestamp'))
+    session_score = session_scores.aggregate(best=Max('score'), last=Max('timestamp'))
+    UserGameStats.objects.filter(user_id=user_id, game_type_id=game_type_id).update(
+        best_score=_max(score['best'], session_score['best']),
+        last_played=_max(score['last'], session_score['last']),
+    )
+
+def refresh_stats(user_id, game_type_id):
+    """
+    Recomputes a user's statistics for one game type from scratch.
+    """
+    scores, session_scores = _scores(user_id, game_type_id)
+    score = scores.aggregate(plays=Count('id'), total=Sum('points'), best=Max('points'), last=Max('timestamp'))
+    session_score = session_scores.aggregate(
+        plays=Count('id'), total=Sum('score'), best=Max('score'), last=Max('timestamp')
+    )
+    if not score['plays'] and not session_score['plays']:
+        UserGameStats.objects.filter(user_id=user_id, game_type_id=game_type_id).delete()
+        return
+    UserGameStats.objects.update_or_create(
+        user_id=user_id,
+        game_type_id=game_type_id,
+        defaults={
+            'games_played': score['plays'] + session_score['plays'],
+            'points_total': (score['total'] or 0) + (session_score['total'] or 0),
+            'best_score': _max(score['best'], session_score['best']),
+            'last_played': _max(score['last'], session_score['last']),
+        },
+    )
+
+def _max(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+def add_session_scores(scores):
+    """
+    Applies SessionScore rows written with ``bulk_create``, one update per
+    (user, game type). Each score's ``session`` must be loaded.
+    """
+    groups = {}
+    for score in scores:
+        key = (score.user_id, score.session.game_type_id)
+        plays, points, best, last = groups.get(key, (0, 0, None, None))
+        groups[key] = (plays + 1, points + score.score, _max(best, score.score), _max(last, score.timestamp))
+    for (user_id, game_type_id), (plays, points, best, last) in groups.items():
+        add_plays(user_id, game_type_id, plays, points, best, last)
+
+def rebuild_stats(batch_size=1000):
+    """
+    Recomputes every statistics row from Score and SessionScore. Used for repairs.
+    """
+    rows = {}
+    per_game = (
+        Score.objects.order_by().values('user_id', 'game_type_id')
+        .annotate(plays=Count('id'), total=Sum('points'), best=Max('points'), last=Max('timestamp'))
+        .values_list('user_id', 'game_type_id', 'plays', 'total', 'best', 'last')
+    )
+    per_session_game = (
+        SessionScore.objects.order_by().values('user_id', 'session__game_type_id')
+        .annotate(plays=Count('id'), total=Sum('score'), best=Max('score'), last=Max('timestamp'))
+        .values_list('user_id', 'session__game_type_id', 'plays', 'total', 'best', 'last')
+    )
+    for queryset in (per_game, per_session_game):
+        for user_id, game_type_id, plays, points, best, last in queryset.iterator():
+            total = rows.setdefault((user_id, game_type_id), [0, 0, None, None])
+            total[0] += plays
+            total[1] += points
+            total[2] = _max(total[2], best)
+            total[3] = _max(total[3], last)
+
+    with transaction.atomic():
+        UserGameStats.objects.all().delete()
+        UserGameStats.objects.bulk_create(
+            (UserGameStats(
+                user_id=user_id, game_type_id=game_type_id, games_played=plays, points_total=points,
+                best_score=best, last_played=last,
+            ) for (user_id, game_type_id), (plays, points, best, last) in rows.items()),
+            batch_size=batch_size,
+        )
@@ -0,0 +1,263 @@
+"""
+Live session scoreboards over server-sent events.
+
+Every streamed session has one ``SessionPublisher`` per event loop. It keeps
+the scoreboard in memory and fans each change out to the queues of all
+connected clients, so a thousand spectators cost about as much as one: the
+database is read once per change, not once per client.
+
+The publisher re-reads the session and its new scores (``id`` above the last
+one seen) when this process commits a write to them (see ``notify``, called
+from ``games.signals``) and every ``POLL_INTERVAL`` seconds, to pick up
+writes made by other processes.
+"""
+import asyncio
+import json
+import weakref
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import GameSession, SessionScore
+
+DEFAULT_SESSION_STREAM = {
+    'POLL_INTERVAL': 2.0,  # Seconds between reads that catch writes from other processes
+    'HEARTBEAT': 15.0,     # Seconds of silence before a keep-alive comment
+    'RETRY_MS': 3000,      # Reconnection delay suggested to clients
+    'QUEUE_SIZE': 100,     # Events buffered per client before it is disconnected
+}
+
+FINISHED_STATUSES = ('completed', 'abandoned')
+
+_datetime_field = serializers.DateTimeField()
+
+# event loop -> {session id: SessionPublisher}
+_publishers = weakref.WeakKeyDictionary()
+
+
+def get_config():
+    return {**DEFAULT_SESSION_STREAM, **getattr(settings, 'SESSION_STREAM', {})}
+
+def format_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+def score_data(row):
+    # Same keys and formats as SessionScoreSerializer
+    return {
+        'id': row['id'],
+        'username': row['user__username'],
+        'score': row['score'],
+        'timestamp': _datetime_field.to_representation(row['timestamp']),
+    }
+
+
+class Subscription:
+    def __init__(self, size):
+        self.queue = asyncio.Queue(maxsize=size)
+        self.initial_events = None  # Set when the client starts receiving changes
+
+    def put(self, message):
+        """
+        Queues a message, or ends a client that fell too far behind; it can
+        reconnect with ``Last-Event-ID`` and miss nothing.
+        """
+        if self.initial_events is None:
+            return  # Already part of the initial events
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.close()
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class SessionPublisher:
+    """
+    Keeps one session's scoreboard and streams its changes to subscribers.
+    """
+
+    def __init__(self, session_id, loop):
+        self.session_id = session_id
+        self.loop = loop
+        self.config = get_config()
+        self.subscribers = set()
+        self.session = None
+        self.scores = {}
+        self.sort_keys = {}
+        self.last_id = 0
+        self.finished = False
+        self.loaded = asyncio.Event()
+        self.wake = asyncio.Event()
+        self.task = loop.create_task(self.run())
+
+    async def refresh(self):
+        """
+        Reads the session and its new scores; returns the events to send.
+        """
+        session = await (
+            GameSession.objects.filter(pk=self.session_id)
+            .values('id', 'game_type', 'start_time', 'end_time', 'status')
+            .afirst()
+        )
+        rows = []
+        if session is not None:
+            rows = [
+                row async for row in
+                SessionScore.objects.filter(session_id=self.session_id, id__gt=self.last_id)
+                .order_by('id')
+                .values('id', 'user__username', 'score', 'timestamp')
+            ]
+        # No awaits from here on, so subscribers see either the old state or the new one and its events
+        return self.apply(session, rows)
+
+    def apply(self, session, rows):
+        if session is None:
+            self.finished = True
+            return [format_event('end', {'id': self.session_id, 'status': 'deleted'})]
+
+        events = []
+        for row in rows:
+            score = score_data(row)
+            self.scores[score['id']] = score
+            self.sort_keys[score['id']] = (row['score'], row['timestamp'])
+            self.last_id = score['id']
+            events.append(format_event('score', score, score['id']))
+
+        session = {
+            **session,
+            'start_time': _datetime_field.to_representation(session['start_time']),
+            'end_time': _datetime_field.to_representation(session['end_time']) if session['end_time'] else None,
+        }
+        if self.session is not None and session['status'] != self.session['status']:
+            events.append(format_event('status', {key: session[key] for key in ('id', 'status', 'end_time')}))
+        self.session = session
+        if session['status'] in FINISHED_STATUSES:
+            self.finished = True
+            events.append(format_event('end', {'id': self.session_id, 'status': session['status']}))
+        return events
+
+    async def run(self):
+        try:
+            await self.refresh()
+            self.loaded.set()
+            while self.subscribers and not self.finished:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), self.config['POLL_INTERVAL'])
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+                if not self.subscribers:
+                    break
+                for event in await self.refresh():
+                    self.broadcast(event)
+        finally:
+            self.loaded.set()
+            self.stop()
+            for subscription in list(self.subscribers):
+                subscription.put(None)
+
+    def broadcast(self, message):
+        for subscription in list(self.subscribers):
+            subscription.put(message)
+
+    def snapshot(self):
+        """
+        Returns the scoreboard in GameSessionSerializer's shape, scores in model order.
+        """
+        ordered = sorted(self.scores, key=self.sort_keys.__getitem__, reverse=True)
+        return {**self.session, 'scores': [self.scores[score_id] for score_id in ordered]}
+
+    def initial_events(self, last_event_id=None):
+        """
+        A snapshot for new clients; only the missed scores for reconnecting ones.
+        """
+        if self.session is None:
+            # Deleted, or the first read failed
+            return [format_event('end', {'id': self.session_id, 'status': 'deleted'})] if self.finished else []
+        if last_event_id is None:
+            events = [format_event('snapshot', self.snapshot(), self.last_id)]
+        else:
+            events = [
+                format_event('score', score, score['id'])
+                for score_id, score in sorted(self.scores.items()) if score_id > last_event_id
+            ]
+        if self.finished:
+            events.append(format_event('end', {'id': self.session_id, 'status': self.session['status']}))
+        return events
+
+    def subscribe(self):
+        subscription = Subscription(self.config['QUEUE_SIZE'])
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers:
+            self.wake.set()  # Lets run() see there is nobody left and stop
+
+    def stop(self):
+        publishers = _publishers.get(self.loop, {})
+        if publishers.get(self.session_id) is self:
+            del publishers[self.session_id]
+
+    def notify(self):
+        # Called from the thread that committed the write
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.wake.set)
+
+
+async def subscribe(session_id, last_event_id=None):
+    """
+    Returns the session's publisher and a new subscription to it, holding the
+    events that bring the client up to date.
+    """
+    loop = asyncio.get_running_loop()
+    publishers = _publishers.setdefault(loop, {})
+    publisher = publishers.get(session_id)
+    if publisher is None:
+        publisher = publishers[session_id] = SessionPublisher(session_id, loop)
+    subscription = publisher.subscribe()
+    await publisher.loaded.wait()
+    subscription.initial_events = publisher.initial_events(last_event_id)
+    return publisher, subscription
+
+async def event_stream(publisher, subscription):
+    """
+    Yields the server-sent events of one client until the session ends or the client goes away.
+    """
+    heartbeat = publisher.config['HEARTBEAT']
+    try:
+        yield f"retry: {publisher.config['RETRY_MS']}\n\n"
+        for event in subscription.initial_events:
+            yield event
+        if publisher.finished or publisher.session is None:
+            return
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        publisher.unsubscribe(subscription)
+
+def notify(session_ids):
+    """
+    Wakes the publishers of ``session_ids`` in every event loop of this process.
+    """
+    session_ids = set(session_ids)
+    for publishers in list(_publishers.values()):
+        for session_id, publisher in list(publishers.items()):
+            if session_id in session_ids:
+                publisher.notify()
@@ -1,13 +1,35 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'games', views.GameTypeViewSet)
+router.register(r'questions', views.QuestionViewSet, basename='question')
+router.register(r'scores', views.ScoreViewSet, basename='score')
+router.register(r'sessions', views.GameSessionViewSet, basename='game-session')
 router.register(r'scripture-sprint-questions', views.ScriptureSprintQuestionViewSet, basename='scripture-sprint-question')
 router.register(r'find-the-bible-verse-questions', views.FindTheBibleVerseQuestionViewSet, basename='find-the-bible-verse-question')
 router.register(r'bible-charades-questions', views.BibleCharadesQuestionViewSet, basename='bible-charades-question')
 
 urlpatterns = [
     path('', include(router.urls)),
-]
\ No newline at end of file
+    path('search/', views.ScriptureSearchView.as_view(), name='scripture-search'),
+    path('references/', views.ReferenceSearchView.as_view(), name='reference-search'),
+    path('sessions/<int:pk>/stream/', async_views.session_stream, name='game-session-stream'),
+    path('exports/<str:kind>/', views.DataExportView.as_view(), name='data-export'),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Matched before the router, so these replace the DRF list and leaderboard actions
+    urlpatterns = [
+        path('games/', async_views.game_type_list, name='gametype-list-async'),
+        path('questions/', async_views.question_list, name='question-list-async'),
+        path('scores/leaderboard/', async_views.leaderboard, name='score-leaderboard-async'),
+        path('scripture-sprint-questions/', async_views.scripture_sprint_question_list,
+             name='scripture-sprint-question-list-async'),
+        path('find-the-bible-verse-questions/', async_views.find_the_bible_verse_question_list,
+             name='find-the-bible-verse-question-list-async'),
+        path('bible-charades-questions/', async_views.bible_charades_question_list,
+             name='bible-charades-question-list-async'),
+    ] + urlpatterns
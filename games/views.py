@@ -1,32 +1,112 @@
-from rest_framework import viewsets, permissions
+import gzip
+import random
+
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import generics, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum
-from .models import GameType, Question, Score, GameSession, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion, VerseVersion
+from rest_framework.reverse import reverse
+from django.db import transaction
+from django.db.models import Count, DurationField, Exists, ExpressionWrapper, F, Max, OuterRef, Prefetch
+from .models import GameType, Question, QuestionOption, Score, GameSession, SessionScore, ScriptureSprintQuestion, FindTheBibleVerseQuestion, BibleCharadesQuestion, VerseVersion
 from .serializers import (
     GameTypeSerializer, 
     QuestionSerializer,
     ScoreSerializer,
     GameSessionSerializer,
+    GameSessionSummarySerializer,
+    GameSessionBulkSerializer,
+    SessionScoreInputSerializer,
     ScriptureSprintQuestionSerializer,
     FindTheBibleVerseQuestionSerializer,
     BibleCharadesQuestionSerializer,
-    VerseVersionSerializer
+    VerseVersionSerializer,
+    SearchQuerySerializer,
+    ReferenceQuerySerializer,
+    ExportQuerySerializer,
+    PeriodLeaderboardQuerySerializer
+)
+from .fast_serializers import (
+    QuestionValuesSerializer,
+    ScriptureSprintQuestionValuesSerializer,
+    FindTheBibleVerseQuestionValuesSerializer,
+    BibleCharadesQuestionValuesSerializer
 )
-from core.mixins import ResponseMixin
+from .packs import get_manifest_snapshots, get_snapshot
+from .exports import EXPORTS, FORMATS
+from .leaderboard import FROZEN_BOARD_CACHE_CONTROL, get_period_board, total_board_queryset
+from . import references, search
+from .sessions import record_scores, record_sessions
+from .sampling import question_sampler, scripture_sprint_sampler, find_the_bible_verse_sampler, bible_charades_sampler
+from core import timing
+from core.mixins import ConditionalResponseMixin, ResponseMixin
+
+
+class SampledListMixin:
+    """
+    Serves list requests as a random sample drawn by a ``games.sampling.QuestionSampler``
+    instead of ordering the table randomly in the database.
+
+    Setting ``values_serializer_class`` opts the list into the values-based
+    fast path from ``games.fast_serializers``.
+    """
+    sampler = None
+    default_limit = None
+    values_serializer_class = None
+
+    def get_rng(self):
+        """
+        Returns the random generator for this request, seeded from ``?seed=``
+        so clients can reproduce a sample and its option order.
+        """
+        if not hasattr(self, '_rng'):
+            seed = self.request.query_params.get('seed')
+            self._rng = random.Random(seed) if seed else random.Random()
+        return self._rng
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['rng'] = self.get_rng()
+        return context
+
+    def is_conditional(self, request):
+        # An unseeded sample is different on every request
+        if self.action == 'list' and not request.query_params.get('seed'):
+            return False
+        return super().is_conditional(request)
+
+    def get_sample_kwargs(self):
+        limit = self.request.query_params.get('limit', self.default_limit)
+        filters = {name: self.request.query_params.get(name, '') for name in self.sampler.filter_map}
+        return {'limit': int(limit) if limit is not None else None, 'rng': self.get_rng(), **filters}
+
+    def get_sample(self):
+        return self.sampler.sample(self.filter_queryset(self.get_queryset()), **self.get_sample_kwargs())
+
+    def get_list_data(self):
+        if self.values_serializer_class is not None:
+            serializer = self.values_serializer_class(context=self.get_serializer_context())
+            ids = self.sampler.sample_ids(**self.get_sample_kwargs())
+            with timing.measure('serialize'):
+                return serializer.serialize_ids(self.filter_queryset(self.get_queryset()), ids)
+        return self.get_serializer(self.get_sample(), many=True).data
 
-class GameTypeViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_list_data())
+
+class GameTypeViewSet(ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = GameType.objects.all()
     serializer_class = GameTypeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 1, 'retrieve': 1}
+    conditional_models = [GameType]
+    pagination_ordering = ('id',)
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return self.success_response(
-            data=serializer.data,
-            message="Game types retrieved successfully"
-        )
+        return self.paginated_response(queryset, message="Game types retrieved successfully")
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -36,29 +116,31 @@ class GameTypeViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
             message="Game type details retrieved successfully"
         )
 
-class QuestionViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
+class QuestionViewSet(SampledListMixin, ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = QuestionSerializer
+    values_serializer_class = QuestionValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 3, 'retrieve': 2}
+    conditional_models = [GameType, Question, QuestionOption]
+    sampler = question_sampler
+    default_limit = 10
 
     def get_queryset(self):
         game_type = self.request.query_params.get('game_type', '')
         difficulty = self.request.query_params.get('difficulty', '')
-        limit = int(self.request.query_params.get('limit', 10))
         
-        queryset = Question.objects.all()
+        queryset = Question.objects.prefetch_related('options')
         
         if game_type:
             queryset = queryset.filter(game_type__name=game_type)
         if difficulty:
             queryset = queryset.filter(difficulty=difficulty)
             
-        return queryset.order_by('?')[:limit]
+        return queryset
     
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
         return self.success_response(
-            data=serializer.data,
+            data=self.get_list_data(),
             message="Questions retrieved successfully"
         )
 
@@ -73,10 +155,14 @@ class QuestionViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
 class ScoreViewSet(ResponseMixin, viewsets.ModelViewSet):
     serializer_class = ScoreSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = {
+        'list': 1, 'retrieve': 1, 'create': 7, 'update': 10, 'partial_update': 10, 'destroy': 8, 'leaderboard': 1,
+    }
+    pagination_ordering = ('-points', '-timestamp', '-id')
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Score.objects.filter(user=self.request.user)
+            return Score.objects.filter(user=self.request.user).select_related('user', 'game_type')
         return Score.objects.none()  # Return an empty queryset if not authenticated
 
     def perform_create(self, serializer):
@@ -84,11 +170,7 @@ class ScoreViewSet(ResponseMixin, viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return self.success_response(
-            data=serializer.data,
-            message="Scores retrieved successfully"
-        )
+        return self.paginated_response(queryset, message="Scores retrieved successfully")
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -137,46 +219,81 @@ class ScoreViewSet(ResponseMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def leaderboard(self, request):
+        """
+        All-time totals, or with ``period=day|week|month`` the board of one
+        game type for the period containing ``date`` (default today).
+        """
+        if 'period' in request.query_params:
+            return self.period_leaderboard(request)
         game_type = request.query_params.get('game_type', '')
         limit = int(request.query_params.get('limit', 10))
-        
-        queryset = Score.objects.values('user__username')\
-            .annotate(total_score=Sum('points'))\
-            .order_by('-total_score')
-            
-        if game_type:
-            queryset = queryset.filter(game_type__name=game_type)
             
         return self.success_response(
-            data=list(queryset[:limit]),
+            data=list(total_board_queryset(game_type)[:limit]),
             message="Leaderboard retrieved successfully"
         )
 
+    def period_leaderboard(self, request):
+        serializer = PeriodLeaderboardQuerySerializer(data=request.query_params.dict())
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Invalid leaderboard query",
+                errors=serializer.errors
+            )
+
+        params = serializer.validated_data
+        board = get_period_board(
+            params['game_type'], params['period'], params.get('date') or timezone.localdate(), params['limit']
+        )
+        response = self.success_response(
+            data=board,
+            message="Leaderboard retrieved successfully"
+        )
+        if board['frozen']:
+            response['Cache-Control'] = FROZEN_BOARD_CACHE_CONTROL
+        return response
+
 class GameSessionViewSet(ResponseMixin, viewsets.ModelViewSet):
     serializer_class = GameSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = {'list': 2, 'retrieve': 2, 'create': 5, 'bulk': 4}
+    pagination_ordering = ('-start_time', '-id')
+
+    def is_summary(self):
+        return self.request.query_params.get('summary', '').lower() in ('1', 'true', 'yes')
+
+    def get_serializer_class(self):
+        if self.action in ['list', 'retrieve'] and self.is_summary():
+            return GameSessionSummarySerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
-        if self.request.user.is_authenticated:
-            return GameSession.objects.filter(scores__user=self.request.user).distinct()
-        return GameSession.objects.none()  # Return an empty queryset if not authenticated
+        if not self.request.user.is_authenticated:
+            return GameSession.objects.none()  # Return an empty queryset if not authenticated
 
-    def perform_create(self, serializer):
-        session = serializer.save()
-        if 'scores' in self.request.data:
-            for score_data in self.request.data['scores']:
-                session.scores.create(
-                    user=self.request.user,
-                    score=score_data['score']
-                )
+        queryset = GameSession.objects.filter(
+            Exists(SessionScore.objects.filter(session=OuterRef('pk'), user=self.request.user))
+        )
+        if self.action in ['list', 'retrieve'] and self.is_summary():
+            return queryset.annotate(
+                best_score=Max('scores__score'),
+                player_count=Count('scores__user', distinct=True),
+                duration=ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField()),
+            )
+        return queryset.prefetch_related(
+            Prefetch('scores', queryset=SessionScore.objects.select_related('user'))
+        )
+
+    max_bulk_sessions = 500
+
+    def perform_create(self, serializer, scores=()):
+        with transaction.atomic():
+            session = serializer.save()
+            record_scores(self.request.user, session, scores)
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return self.success_response(
-            data=serializer.data,
-            message="Game sessions retrieved successfully"
-        )
+        return self.paginated_response(queryset, message="Game sessions retrieved successfully")
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -187,17 +304,59 @@ class GameSessionViewSet(ResponseMixin, viewsets.ModelViewSet):
         )
 
     def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            return self.error_response(
+                message="Failed to create game session",
+                errors={'non_field_errors': ["Expected a session object."]}
+            )
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
-            self.perform_create(serializer)
+        scores_serializer = SessionScoreInputSerializer(data=request.data.get('scores', []), many=True)
+        session_valid = serializer.is_valid()
+        scores_valid = scores_serializer.is_valid()
+        if session_valid and scores_valid:
+            self.perform_create(serializer, scores_serializer.validated_data)
             return self.success_response(
                 data=serializer.data,
                 message="Game session created successfully",
                 status_code=201
             )
+        errors = dict(serializer.errors)
+        if not scores_valid:
+            errors['scores'] = scores_serializer.errors
         return self.error_response(
             message="Failed to create game session",
-            errors=serializer.errors
+            errors=errors
+        )
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        sessions = request.data.get('sessions', []) if isinstance(request.data, dict) else request.data
+        if not isinstance(sessions, list):
+            return self.error_response(
+                message="Failed to create game sessions",
+                errors={'sessions': ["Expected a list of sessions."]}
+            )
+        if len(sessions) > self.max_bulk_sessions:
+            return self.error_response(
+                message=f"At most {self.max_bulk_sessions} sessions can be created per request"
+            )
+
+        serializer = GameSessionBulkSerializer(data=sessions, many=True)
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Failed to create game sessions",
+                errors=serializer.errors
+            )
+
+        created = record_sessions(request.user, serializer.validated_data)
+        return self.success_response(
+            data={
+                'ids': [session.id for session in created],
+                'sessions': len(created),
+                'scores': sum(len(data.get('scores', [])) for data in serializer.validated_data),
+            },
+            message="Game sessions created successfully",
+            status_code=201
         )
 
     def update(self, request, *args, **kwargs):
@@ -223,10 +382,14 @@ class GameSessionViewSet(ResponseMixin, viewsets.ModelViewSet):
             status_code=204
         )
 
-class ScriptureSprintQuestionViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
+class ScriptureSprintQuestionViewSet(SampledListMixin, ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ScriptureSprintQuestion.objects.all()
     serializer_class = ScriptureSprintQuestionSerializer
+    values_serializer_class = ScriptureSprintQuestionValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 3, 'retrieve': 2, 'add_version': 6, 'packs': 2, 'pack': 1}
+    conditional_models = [GameType, ScriptureSprintQuestion, VerseVersion]
+    sampler = scripture_sprint_sampler
 
     @action(detail=True, methods=['post'])
     def add_version(self, request, pk=None):
@@ -244,12 +407,175 @@ class ScriptureSprintQuestionViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSe
             errors=serializer.errors
         )
 
-class FindTheBibleVerseQuestionViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=['get'])
+    def packs(self, request):
+        pack_types = ScriptureSprintQuestion.objects.order_by('pack_type').values_list('pack_type', flat=True).distinct()
+        manifest = []
+        for snapshot in get_manifest_snapshots(list(pack_types)):
+            manifest.append({
+                'pack_type': snapshot.pack_type,
+                'version': snapshot.version,
+                'digest': snapshot.digest,
+                'size': snapshot.size,
+                'question_count': snapshot.question_count,
+                'url': reverse(
+                    'scripture-sprint-question-pack',
+                    kwargs={'pack_type': snapshot.pack_type, 'digest': snapshot.digest},
+                    request=request
+                ),
+            })
+        return self.success_response(
+            data=manifest,
+            message="Question packs retrieved successfully"
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'packs/(?P<pack_type>[^/]+)(?:/(?P<digest>[0-9a-f]{64}))?')
+    def pack(self, request, pack_type=None, digest=None):
+        snapshot = get_snapshot(pack_type)
+        if snapshot is None:
+            return self.error_response(message="Pack not found", status_code=404)
+        if digest and digest != snapshot.digest:
+            return self.error_response(message="Pack version not found", status_code=404)
+
+        etag = f'"{snapshot.digest}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(bytes(snapshot.content), content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(snapshot.content), content_type='application/json')
+
+        response['ETag'] = etag
+        response['X-Pack-Version'] = str(snapshot.version)
+        response['Vary'] = 'Accept-Encoding'
+        if digest:
+            # Content-addressed URLs never change
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = 'public, max-age=300, must-revalidate'
+        return response
+
+class FindTheBibleVerseQuestionViewSet(SampledListMixin, ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = FindTheBibleVerseQuestion.objects.all()
     serializer_class = FindTheBibleVerseQuestionSerializer
+    values_serializer_class = FindTheBibleVerseQuestionValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 2, 'retrieve': 1}
+    conditional_models = [GameType, FindTheBibleVerseQuestion]
+    sampler = find_the_bible_verse_sampler
 
-class BibleCharadesQuestionViewSet(ResponseMixin, viewsets.ReadOnlyModelViewSet):
+class BibleCharadesQuestionViewSet(SampledListMixin, ConditionalResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = BibleCharadesQuestion.objects.all()
     serializer_class = BibleCharadesQuestionSerializer
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
\ No newline at end of file
+    values_serializer_class = BibleCharadesQuestionValuesSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'list': 2, 'retrieve': 1}
+    conditional_models = [GameType, BibleCharadesQuestion]
+    sampler = bible_charades_sampler
+
+class ScriptureSearchView(ResponseMixin, generics.GenericAPIView):
+    serializer_class = SearchQuerySerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'get': 1}
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data={
+            **request.query_params.dict(),
+            'kind': request.query_params.getlist('kind'),
+        })
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Invalid search",
+                errors=serializer.errors
+            )
+
+        params = serializer.validated_data
+        results = search.search(
+            params['q'],
+            kinds=sorted(params.get('kind', [])),
+            translation=params.get('translation'),
+            limit=params['limit'],
+        )
+        return self.success_response(
+            data=results,
+            message="Search results retrieved successfully"
+        )
+
+
+class ReferenceSearchView(ResponseMixin, generics.GenericAPIView):
+    """
+    Lists the questions whose scripture reference overlaps ``ref``, e.g.
+    ``?ref=Romans 8`` or ``?ref=Genesis 1-11``, grouped by question kind.
+    """
+    serializer_class = ReferenceQuerySerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budgets = {'get': 6}
+    sources = {
+        'question': (Question.objects.prefetch_related('options'), QuestionSerializer),
+        'scripture_sprint': (ScriptureSprintQuestion.objects.prefetch_related('versions'), ScriptureSprintQuestionSerializer),
+        'find_the_bible_verse': (FindTheBibleVerseQuestion.objects.all(), FindTheBibleVerseQuestionSerializer),
+        'bible_charades': (BibleCharadesQuestion.objects.all(), BibleCharadesQuestionSerializer),
+    }
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data={
+            **request.query_params.dict(),
+            'kind': request.query_params.getlist('kind'),
+        })
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Invalid reference",
+                errors=serializer.errors
+            )
+
+        params = serializer.validated_data
+        start, end = params['ref']
+        kinds = params.get('kind') or self.sources.keys()
+        results = {}
+        for kind in sorted(kinds):
+            queryset, serializer_class = self.sources[kind]
+            matches = references.overlapping(queryset, start, end)[:params['limit']]
+            results[kind] = serializer_class(matches, many=True, context=self.get_serializer_context()).data
+
+        return self.success_response(
+            data={
+                'reference': {
+                    'start': start,
+                    'end': end,
+                    'label': references.format_range(start, end),
+                },
+                'results': results,
+            },
+            message="Questions retrieved successfully"
+        )
+
+class DataExportView(ResponseMixin, generics.GenericAPIView):
+    """
+    Streams every Score, SessionScore or GameSession matching the filters as
+    CSV or JSONL, e.g. ``exports/scores/?output=jsonl&since=2024-01-01&game_type=trivia``.
+    ``since`` is inclusive, ``until`` exclusive.
+    """
+    serializer_class = ExportQuerySerializer
+    permission_classes = [permissions.IsAdminUser]
+    query_budgets = {'get': 1}
+
+    def get(self, request, kind=None, *args, **kwargs):
+        export = EXPORTS.get(kind)
+        if export is None:
+            return self.error_response(message="Export not found", status_code=404)
+        serializer = self.get_serializer(data=request.query_params.dict())
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Invalid export",
+                errors=serializer.errors
+            )
+
+        params = serializer.validated_data
+        queryset = export.get_queryset(params.get('since'), params.get('until'), params.get('game_type'))
+        response = StreamingHttpResponse(
+            export.stream(queryset, params['output']),
+            content_type=f"{FORMATS[params['output']]}; charset=utf-8",
+        )
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{params["output"]}"'
+        return response
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -89,6 +90,22 @@ DATABASES = {
 }
 
 
+# Cache
+# Question pools, collection version stamps and rank board versions live
+# here, so deployments running several processes must point this at a shared cache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+
+# Covering-index columns (Index.include) only apply on PostgreSQL
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -137,6 +154,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
 }
 
 # JWT Settings
@@ -174,5 +192,36 @@ CORS_ALLOW_ALL_ORIGINS = True  # For development only
 #     "https://yourdomain.com",
 # ]
 
+# Rank engine backend (see core.ranking)
+RANKING_BACKEND = os.environ.get('RANKING_BACKEND', 'core.ranking.InMemoryRankBackend')
+
+# Serve the busiest read endpoints from native async views under ASGI (see core.async_views)
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Server-Timing breakdown of sampled requests (see core.middleware)
+SERVER_TIMING = {
+    'SAMPLE_RATE': float(os.environ.get('SERVER_TIMING_SAMPLE_RATE', '1.0' if DEBUG else '0.01')),
+    'HEADER': os.environ.get('SERVER_TIMING_HEADER', 'True') == 'True',
+    'LOG': os.environ.get('SERVER_TIMING_LOG', 'True') == 'True',
+    'SLOW_MS': float(os.environ['SERVER_TIMING_SLOW_MS']) if os.environ.get('SERVER_TIMING_SLOW_MS') else None,
+}
+
+# Background job worker, run with `manage.py run_jobs` (see core.jobs)
+JOBS = {
+    'THREADS': int(os.environ.get('JOBS_THREADS', 4)),
+    'MAX_ATTEMPTS': int(os.environ.get('JOBS_MAX_ATTEMPTS', 5)),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'kingdom_chronicles.timing': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
\ No newline at end of file
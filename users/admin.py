@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Achievement
+from .models import User, Achievement, PointsTransaction
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -17,6 +17,12 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(Achievement)
 class AchievementAdmin(admin.ModelAdmin):
-    list_display = ('title', 'user', 'unlocked_at')
-    list_filter = ('unlocked_at',)
-    search_fields = ('title', 'description', 'user__username')
\ No newline at end of file
+    list_display = ('title', 'code', 'user', 'unlocked_at')
+    list_filter = ('code', 'unlocked_at')
+    search_fields = ('title', 'description', 'user__username')
+
+@admin.register(PointsTransaction)
+class PointsTransactionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'delta', 'reason', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('user__username', 'reason')
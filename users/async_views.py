@@ -0,0 +1,18 @@
+"""
+Async versions of the busiest users read endpoints, routed in place of the
+DRF actions when ``ASYNC_READ_VIEWS`` is on (see ``core.async_views``).
+"""
+from core import timing
+from core.async_views import aauthenticate, async_api_view, success_response
+from .serializers import UserSerializer
+
+
+@async_api_view(query_budgets={'get': 0})
+async def me(request):
+    user = await aauthenticate(request)
+    with timing.measure('serialize'):
+        data = UserSerializer(user).data
+    return success_response(
+        data=data,
+        message="User profile retrieved successfully"
+    )
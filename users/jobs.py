@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.jobs import enqueue_mail, job
+
+User = get_user_model()
+
+
+@job
+def send_password_reset(email):
+    """
+    Mails a password reset link to the users with ``email``, if there are any.
+    """
+    for user in User.objects.filter(email=email):
+        token = default_token_generator.make_token(user)
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        # Build reset URL (frontend URL)
+        reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
+        enqueue_mail(
+            "Password Reset Request",
+            f"Click the link below to reset your password:\n{reset_url}",
+            [user.email],
+        )
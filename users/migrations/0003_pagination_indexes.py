@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_points_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(fields=['user', '-unlocked_at', '-id'], name='achievement_user_unlocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-points', 'id'], name='user_points_id_idx'),
+        ),
+    ]
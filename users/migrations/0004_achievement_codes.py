@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-18 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='achievement',
+            name='code',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='achievement',
+            constraint=models.UniqueConstraint(condition=models.Q(('code', ''), _negated=True), fields=('user', 'code'), name='unique_achievement_code_per_user'),
+        ),
+    ]
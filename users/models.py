@@ -24,12 +24,39 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['-points']
+        indexes = [
+            models.Index(fields=['-points', 'id'], name='user_points_id_idx'),
+        ]
 
 class Achievement(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='achievements')
+    code = models.CharField(max_length=50, blank=True)  # The games.achievements rule that unlocked it
     title = models.CharField(max_length=100)
     description = models.TextField()
     unlocked_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-unlocked_at']
\ No newline at end of file
+        ordering = ['-unlocked_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'code'], condition=~models.Q(code=''), name='unique_achievement_code_per_user'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-unlocked_at', '-id'], name='achievement_user_unlocked_idx'),
+        ]
+
+class PointsTransaction(models.Model):
+    """
+    Append-only ledger of point changes. ``User.points`` is the running total.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_transactions')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='points_tx_user_created_idx'),
+        ]
@@ -0,0 +1,54 @@
+"""
+Points ledger for users.
+
+Every change is appended to PointsTransaction and applied to ``User.points``
+with a single atomic ``F()`` UPDATE, so concurrent requests never lose
+updates and only the ``points`` and ``updated_at`` columns are written.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, When
+from django.utils import timezone
+
+from core.ranking import get_rank_backend
+from .models import PointsTransaction
+from .ranking import POINTS_BOARD
+
+
+def apply_points(entries, batch_size=500):
+    """
+    Applies ``entries`` of ``(user_id, delta, reason)`` in one transaction.
+    Returns a dict mapping each user id to its new points total.
+    """
+    User = get_user_model()
+    totals = defaultdict(int)
+    for user_id, delta, _ in entries:
+        totals[user_id] += delta
+
+    with transaction.atomic():
+        PointsTransaction.objects.bulk_create(
+            [PointsTransaction(user_id=user_id, delta=delta, reason=reason) for user_id, delta, reason in entries if delta],
+            batch_size=batch_size,
+        )
+        changed = {user_id: delta for user_id, delta in totals.items() if delta}
+        if changed:
+            User.objects.filter(pk__in=changed).update(
+                points=Case(
+                    *[When(pk=user_id, then=F('points') + delta) for user_id, delta in changed.items()],
+                    default=F('points'),
+                    output_field=IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+        points = dict(User.objects.filter(pk__in=totals).order_by().values_list('id', 'points'))
+
+        def update_ranks():
+            backend = get_rank_backend()
+            for user_id in changed:
+                if user_id in points:
+                    backend.set_score(POINTS_BOARD, user_id, points[user_id])
+
+        transaction.on_commit(update_ranks)
+    return points
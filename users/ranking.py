@@ -0,0 +1,51 @@
+"""
+Rank boards for users.
+
+``POINTS_BOARD`` ranks users by ``User.points``; one board per game type
+ranks them by their ScoreTotal for that game. Boards are loaded from the
+database the first time they are read and kept current by signals and the
+leaderboard delta hooks.
+"""
+from django.apps import apps
+from django.contrib.auth import get_user_model
+
+from core.ranking import get_rank_backend
+
+POINTS_BOARD = 'points'
+
+
+def game_board(game_type_id):
+    return f'game:{game_type_id}'
+
+def _entries(board):
+    if board == POINTS_BOARD:
+        return get_user_model().objects.order_by().values_list('id', 'points').iterator()
+    game_type_id = int(board.split(':', 1)[1])
+    ScoreTotal = apps.get_model('games', 'ScoreTotal')
+    return (
+        ScoreTotal.objects.filter(game_type_id=game_type_id)
+        .order_by()
+        .values_list('user_id', 'points')
+        .iterator()
+    )
+
+def get_board(board):
+    """
+    Returns the backend with ``board`` loaded.
+    """
+    backend = get_rank_backend()
+    if not backend.is_loaded(board):
+        backend.load(board, _entries(board))
+    return backend
+
+def with_usernames(entries):
+    """
+    Turns ``(rank, user_id, score)`` tuples into response dicts with one query.
+    """
+    usernames = dict(
+        get_user_model().objects.filter(id__in=[member for _, member, _ in entries]).values_list('id', 'username')
+    )
+    return [
+        {'rank': rank, 'user_id': member, 'username': usernames.get(member), 'points': score}
+        for rank, member, score in entries
+    ]
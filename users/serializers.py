@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Achievement
+from games.models import UserGameStats
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 
@@ -22,7 +23,22 @@ class UserSerializer(serializers.ModelSerializer):
 class AchievementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Achievement
-        fields = ['id', 'title', 'description', 'unlocked_at']
+        fields = ['id', 'code', 'title', 'description', 'unlocked_at']
+
+class UserGameStatsSerializer(serializers.ModelSerializer):
+    game_type = serializers.CharField(source='game_type.name', read_only=True)
+    average_score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = UserGameStats
+        fields = ['game_type', 'games_played', 'best_score', 'average_score', 'last_played']
+
+class PointsUpdateSerializer(serializers.Serializer):
+    points = serializers.IntegerField()
+    reason = serializers.CharField(max_length=100, required=False, default='')
+
+class PointsBatchEntrySerializer(PointsUpdateSerializer):
+    user = serializers.IntegerField()
 
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
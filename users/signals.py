@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.ranking import get_rank_backend
+from .models import User
+from .ranking import POINTS_BOARD, game_board
+
+
+@receiver(post_save, sender=User)
+def update_points_rank(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'points' not in update_fields:
+        return
+    transaction.on_commit(lambda: get_rank_backend().set_score(POINTS_BOARD, instance.id, instance.points))
+
+
+@receiver(post_delete, sender=User)
+def remove_from_ranks(sender, instance, **kwargs):
+    from games.models import GameType
+
+    boards = [POINTS_BOARD] + [game_board(pk) for pk in GameType.objects.values_list('id', flat=True)]
+
+    def remove():
+        backend = get_rank_backend()
+        for board in boards:
+            backend.remove(board, instance.id)
+
+    transaction.on_commit(remove)
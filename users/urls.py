@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet)
@@ -11,4 +12,10 @@ urlpatterns = [
     path('login/', views.LoginView.as_view(), name='login'),
     path('password-reset/', views.PasswordResetRequestView.as_view(), name='password-reset-request'),
     path('password-reset/confirm/', views.PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Matched before the router, so it replaces the DRF me action
+    urlpatterns = [
+        path('users/me/', async_views.me, name='user-me-async'),
+    ] + urlpatterns
@@ -1,25 +1,32 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model, authenticate, login
 from .models import Achievement
 from .serializers import (
     UserSerializer, 
     AchievementSerializer, 
+    UserGameStatsSerializer,
     LoginSerializer,
     PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    PointsUpdateSerializer,
+    PointsBatchEntrySerializer
 )
 from rest_framework import generics
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.permissions import AllowAny
+from core.jobs import enqueue
 from core.mixins import ResponseMixin
+from games.models import GameType, UserGameStats
+from .jobs import send_password_reset
+from .points import apply_points
+from .ranking import POINTS_BOARD, game_board, get_board, with_usernames
 from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
-from django.conf import settings
+from django.utils.http import urlsafe_base64_decode
+from django.utils.encoding import force_str
 from django.urls import reverse
 from django.template.loader import render_to_string
 
@@ -29,9 +36,15 @@ class UserViewSet(ResponseMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budgets = {
+        'list': 1, 'retrieve': 1, 'create': 2, 'update': 2, 'partial_update': 2, 'destroy': 14, 'me': 0,
+        'achievements': 2, 'stats': 2, 'rank': 2, 'top': 2, 'neighbours': 2, 'update_points': 4, 'batch_points': 4,
+        'change_password': 1,
+    }
+    pagination_ordering = ('-points', 'id')
 
     def get_queryset(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'rank']:
             return User.objects.all()
         if self.request.user.is_authenticated:
             return User.objects.filter(id=self.request.user.id)
@@ -39,11 +52,7 @@ class UserViewSet(ResponseMixin, viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return self.success_response(
-            data=serializer.data,
-            message="Users retrieved successfully"
-        )
+        return self.paginated_response(queryset, message="Users retrieved successfully")
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -101,11 +110,84 @@ class UserViewSet(ResponseMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def achievements(self, request, pk=None):
         user = self.get_object()
+        self.pagination_ordering = ('-unlocked_at', '-id')
         achievements = Achievement.objects.filter(user=user)
-        serializer = AchievementSerializer(achievements, many=True)
+        return self.paginated_response(
+            achievements,
+            message="User achievements retrieved successfully",
+            serializer_class=AchievementSerializer
+        )
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        Games played, best and average score and last played time per game type.
+        """
+        try:
+            user_id = int(pk)
+        except ValueError:
+            raise NotFound("No User matches the given query.")
+        stats = list(UserGameStats.objects.filter(user_id=user_id).select_related('game_type').order_by('game_type__name'))
+        # Only a user without plays needs a second query
+        if not stats and not User.objects.filter(pk=user_id).exists():
+            raise NotFound("No User matches the given query.")
         return self.success_response(
-            data=serializer.data,
-            message="User achievements retrieved successfully"
+            data=UserGameStatsSerializer(stats, many=True).data,
+            message="User statistics retrieved successfully"
+        )
+
+    def get_rank_board(self):
+        """
+        Returns the rank board for ``?game_type=<name>``, or the points board when absent.
+        Raises GameType.DoesNotExist for an unknown game type.
+        """
+        game_type = self.request.query_params.get('game_type', '')
+        if not game_type:
+            return POINTS_BOARD
+        return game_board(GameType.objects.values_list('id', flat=True).get(name=game_type))
+
+    @action(detail=True, methods=['get'])
+    def rank(self, request, pk=None):
+        user = self.get_object()
+        try:
+            board = self.get_rank_board()
+        except GameType.DoesNotExist:
+            return self.error_response(message="Game type not found", status_code=status.HTTP_404_NOT_FOUND)
+
+        ranked = get_board(board).rank(board, user.id)
+        if ranked is None:
+            return self.error_response(message="User is not ranked", status_code=status.HTTP_404_NOT_FOUND)
+
+        position, points = ranked
+        return self.success_response(
+            data={'rank': position, 'user_id': user.id, 'username': user.username, 'points': points},
+            message="User rank retrieved successfully"
+        )
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        limit = int(request.query_params.get('limit', 10))
+        try:
+            board = self.get_rank_board()
+        except GameType.DoesNotExist:
+            return self.error_response(message="Game type not found", status_code=status.HTTP_404_NOT_FOUND)
+
+        return self.success_response(
+            data=with_usernames(get_board(board).top(board, limit)),
+            message="Top ranked users retrieved successfully"
+        )
+
+    @action(detail=False, methods=['get'])
+    def neighbours(self, request):
+        radius = int(request.query_params.get('radius', 5))
+        try:
+            board = self.get_rank_board()
+        except GameType.DoesNotExist:
+            return self.error_response(message="Game type not found", status_code=status.HTTP_404_NOT_FOUND)
+
+        return self.success_response(
+            data=with_usernames(get_board(board).around(board, request.user.id, radius)),
+            message="Neighbouring ranks retrieved successfully"
         )
 
     @action(detail=True, methods=['post'])
@@ -117,14 +199,45 @@ class UserViewSet(ResponseMixin, viewsets.ModelViewSet):
             )
 
         user = self.get_object()
-        points = request.data.get('points', 0)
-        
-        if points:
-            user.points += points
-            user.save()
+        serializer = PointsUpdateSerializer(data={'points': 0, **request.data})
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Failed to update points",
+                errors=serializer.errors
+            )
+
+        points = apply_points([
+            (user.id, serializer.validated_data['points'], serializer.validated_data['reason'])
+        ])
             
         return self.success_response(
-            data={'points': user.points},
+            data={'points': points[user.id]},
+            message="Points updated successfully"
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def batch_points(self, request):
+        entries = request.data.get('entries', []) if isinstance(request.data, dict) else request.data
+        serializer = PointsBatchEntrySerializer(data=entries, many=True)
+        if not serializer.is_valid():
+            return self.error_response(
+                message="Failed to update points",
+                errors=serializer.errors
+            )
+
+        user_ids = {entry['user'] for entry in serializer.validated_data}
+        missing = user_ids - set(User.objects.filter(pk__in=user_ids).values_list('id', flat=True))
+        if missing:
+            return self.error_response(
+                message="Failed to update points",
+                errors={'user': f"Invalid users: {sorted(missing)}"}
+            )
+
+        points = apply_points([
+            (entry['user'], entry['points'], entry['reason']) for entry in serializer.validated_data
+        ])
+        return self.success_response(
+            data={'points': points},
             message="Points updated successfully"
         )
     
@@ -143,7 +256,8 @@ class UserViewSet(ResponseMixin, viewsets.ModelViewSet):
                 
             # Set new password
             user.set_password(serializer.validated_data['new_password'])
-            user.save()
+            # points may have moved since the user was loaded
+            user.save(update_fields=['password'])
             
             return self.success_response(
                 message="Password changed successfully"
@@ -157,6 +271,7 @@ class UserViewSet(ResponseMixin, viewsets.ModelViewSet):
 class SignupView(ResponseMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = [AllowAny]
+    query_budgets = {'post': 2}
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -175,6 +290,7 @@ class SignupView(ResponseMixin, generics.CreateAPIView):
 class LoginView(ResponseMixin, generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [AllowAny]
+    query_budgets = {'post': 5}
     
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -202,37 +318,16 @@ class LoginView(ResponseMixin, generics.GenericAPIView):
 class PasswordResetRequestView(ResponseMixin, generics.GenericAPIView):
     serializer_class = PasswordResetRequestSerializer
     permission_classes = [AllowAny]
+    query_budgets = {'post': 1}
     
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            email = serializer.validated_data['email']
-            try:
-                user = User.objects.get(email=email)
-                
-                # Generate token and uid
-                token = default_token_generator.make_token(user)
-                uid = urlsafe_base64_encode(force_bytes(user.pk))
-                
-                # Build reset URL (frontend URL)
-                reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
-                
-                # Send email
-                subject = "Password Reset Request"
-                message = f"Click the link below to reset your password:\n{reset_url}"
-                email_from = settings.DEFAULT_FROM_EMAIL
-                recipient_list = [user.email]
-                
-                send_mail(subject, message, email_from, recipient_list)
-                
-                return self.success_response(
-                    message="Password reset link sent to your email"
-                )
-            except User.DoesNotExist:
-                # For security reasons, don't reveal that the email doesn't exist
-                return self.success_response(
-                    message="If your email exists in our system, you will receive a password reset link"
-                )
+            # The job looks the user up, so the response reveals nothing about the email, not even in its timing
+            enqueue(send_password_reset, {'email': serializer.validated_data['email']})
+            return self.success_response(
+                message="If your email exists in our system, you will receive a password reset link"
+            )
         
         return self.error_response(
             message="Invalid request",
@@ -242,6 +337,7 @@ class PasswordResetRequestView(ResponseMixin, generics.GenericAPIView):
 class PasswordResetConfirmView(ResponseMixin, generics.GenericAPIView):
     serializer_class = PasswordResetConfirmSerializer
     permission_classes = [AllowAny]
+    query_budgets = {'post': 2}
     
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -254,7 +350,7 @@ class PasswordResetConfirmView(ResponseMixin, generics.GenericAPIView):
                 if default_token_generator.check_token(user, serializer.validated_data['token']):
                     # Set new password
                     user.set_password(serializer.validated_data['new_password'])
-                    user.save()
+                    user.save(update_fields=['password'])
                     
                     return self.success_response(
                         message="Password has been reset successfully"